@@ -1,15 +1,24 @@
 import streamlit as st
 import io
-import zipfile
 import csv
 import json
-import requests
+import shutil
+import time
+import uuid
 from bs4 import BeautifulSoup
 import re
-import unicodedata
 from dataclasses import dataclass
 from pathlib import Path
 from system import image_downloader
+from system.album_cache import get_album_cache
+from system.classificador_url import chave_url
+from system.rate_limiter import get_limiter
+from system.zip_stream import ZipStream
+from system.text_norm import clean_site_suffix, strip_accents
+from system.job_queue import (
+    JobQueue, ACTIVE_STATUS, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED, STATUS_INTERRUPTED,
+    STATUS_CANCELLED,
+)
 
 # ---------------- Logger Fake ---------------- #
 class LoggerFake:
@@ -33,7 +42,7 @@ class SanitizadorNomes:
         ]
 
     def _remover_acentos(self, texto: str) -> str:
-        return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+        return strip_accents(texto)
 
     def _limpar_caracteres_especiais(self, texto: str) -> str:
         for char in self.caracteres_proibidos:
@@ -77,26 +86,70 @@ class SanitizadorNomes:
         return nome_limpo
 
 # ---------------- Funções Auxiliares ---------------- #
-def extrair_album_name(url: str) -> str:
+def _buscar_titulo(url: str) -> str:
+    resp = get_limiter().get(None, url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
+    resp.raise_for_status()
+    soup = BeautifulSoup(resp.text, "html.parser")
+    titulo = None
+    if soup.title and soup.title.string:
+        titulo = soup.title.string.strip()
+    elif soup.find("h1"):
+        titulo = soup.find("h1").get_text(strip=True)
+    elif soup.find("h2"):
+        titulo = soup.find("h2").get_text(strip=True)
+    # mesmo título que scraper_engine grava no cache compartilhado (sem "| Yupoo")
+    return clean_site_suffix(titulo) or url
+
+def extrair_album_name(url: str, refresh: bool = False) -> str:
+    # cache compartilhado com scraper_engine: URLs já vistas não geram requisição (refresh busca de novo)
+    cache = get_album_cache()
     try:
-        resp = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        titulo = None
-        if soup.title and soup.title.string:
-            titulo = soup.title.string.strip()
-        elif soup.find("h1"):
-            titulo = soup.find("h1").get_text(strip=True)
-        elif soup.find("h2"):
-            titulo = soup.find("h2").get_text(strip=True)
-        if not titulo:
-            titulo = url
+        entrada = {} if refresh else cache.get(url) or {}
+        if entrada.get("folder_name"):
+            return entrada["folder_name"]
+        titulo = entrada.get("title") or _buscar_titulo(url)
         sanitizador = SanitizadorNomes()
         info = sanitizador.sanitizar_nome(titulo)
-        return sanitizador.validar_nome_arquivo(info.nome_limpo)
+        nome = sanitizador.validar_nome_arquivo(info.nome_limpo)
+        cache.update(url, title=titulo, folder_name=nome)
+        return nome
     except Exception:
         return f"album_sem_nome_{abs(hash(url)) % 10000}"
 
+def processar_job(job_id: str, urls: list, pasta: Path, progresso, forcar: bool = False) -> dict:
+    """Worker da fila: nomeia os álbuns, baixa as imagens e monta o ZIP do job.
+    forcar: ignora o cache de álbuns e busca os títulos de novo."""
+    progresso(message="Resolvendo nomes dos álbuns...")
+    metadados = [{"album_url": u, "album_folder_name": extrair_album_name(u, refresh=forcar)} for u in urls]
+    output_dir = pasta / "imagens"
+    temp_file = pasta / "temp_metadata.json"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(metadados, f, indent=4, ensure_ascii=False)
+
+    contagem = {"done": 0, "failed": 0}
+
+    def on_album(url, ok):
+        contagem["done" if ok else "failed"] += 1
+        progresso(done=contagem["done"], failed=contagem["failed"], message=f"Último álbum: {url}")
+
+    progresso(message="Baixando imagens...")
+    # cada imagem vai para o ZIP (em disco) assim que é gravada e é removida da pasta;
+    # forcar: o ZIP do job precisa de todos os álbuns, mesmo os que outro job já baixou
+    with ZipStream(pasta / "imagens.zip", base_dir=output_dir) as zs:
+        res = image_downloader.main_integrated(
+            LoggerFake(), [temp_file], out_root=output_dir, on_saved=zs.add, on_album=on_album, forcar=True
+        )
+    shutil.rmtree(output_dir, ignore_errors=True)
+    resultado = {"zip": str(zs.zip_path), "arquivos": zs.count, "success": bool(res.get("success"))}
+    if not resultado["success"]:
+        resultado["erro"] = f"{contagem['failed']} álbum(ns) com falha; o ZIP tem só o que foi baixado"
+    return resultado
+
+@st.cache_resource
+def fila_de_jobs() -> JobQueue:
+    """Uma fila por processo do Streamlit, compartilhada por todas as sessões."""
+    return JobQueue(worker=processar_job, base_dir=Path("jobs"), max_workers=2)
+
 def gerar_csv_stub(metadados):
     output = io.StringIO()
     writer = csv.writer(output)
@@ -114,30 +167,42 @@ if "urls" not in st.session_state:
     st.session_state.urls = []
 if "url_input" not in st.session_state:
     st.session_state.url_input = ""
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+fila = fila_de_jobs()
 
-st.subheader("Adicionar URLs (máx. 2)")
-st.text_input(
-    "Informe a URL (Yupoo ou WordPress)",
+def adicionar_urls():
+    novas = [u.strip() for u in (st.session_state.url_input or "").splitlines() if u.strip()]
+    if not novas:
+        st.session_state.aviso = "Informe uma URL antes de adicionar."
+        return
+    # mesma forma canônica = mesmo álbum (?uid=1, http/https, barra final, rastreio)
+    na_fila = {chave_url(u) for u in st.session_state.urls}
+    repetidas = []
+    for u in novas:
+        if chave_url(u) in na_fila:
+            repetidas.append(u)
+        else:
+            na_fila.add(chave_url(u))
+            st.session_state.urls.append(u)
+    st.session_state.url_input = ""   # limpa o campo após adicionar
+    if repetidas:
+        st.session_state.aviso = f"⚠️ {len(repetidas)} URL(s) já estavam na fila."
+
+st.subheader("Adicionar URLs")
+st.text_area(
+    "Informe uma ou mais URLs (Yupoo ou WordPress), uma por linha",
     key="url_input",
     placeholder="https://exemplo.com/...",
 )
-add_disabled = len(st.session_state.urls) >= 2
-if st.button("➕ Adicionar URL", type="primary", disabled=add_disabled):
-    nova_url = (st.session_state.url_input or "").strip()
-    if nova_url:
-        if nova_url in st.session_state.urls:
-            st.warning("⚠️ Esta URL já foi adicionada.")
-        elif len(st.session_state.urls) >= 2:
-            st.error("❌ Máximo de 2 URLs permitido!")
-        else:
-            st.session_state.urls.append(nova_url)
-            st.session_state.url_input = ""   # limpa o campo após adicionar
-    else:
-        st.warning("Informe uma URL antes de adicionar.")
+st.button("➕ Adicionar URL", type="primary", on_click=adicionar_urls)
+if st.session_state.get("aviso"):
+    st.warning(st.session_state.pop("aviso"))
 
 # Lista com botão de lixeira
 if st.session_state.urls:
-    st.subheader("📋 Fila de URLs")
+    st.subheader(f"📋 Fila de URLs ({len(st.session_state.urls)})")
     for i, url in enumerate(st.session_state.urls):
         c1, c2 = st.columns([10, 1])
         with c1:
@@ -147,34 +212,58 @@ if st.session_state.urls:
                 st.session_state.urls.pop(i)
                 st.experimental_rerun()
 else:
-    st.info("Nenhuma URL na fila ainda. Adicione até 2.")
+    st.info("Nenhuma URL na fila ainda.")
 
-# Botão principal renomeado
+# Envia a fila para processamento em segundo plano
 process_disabled = len(st.session_state.urls) == 0
+forcar = st.checkbox("🔄 Forçar (ignorar cache de álbuns)", key="forcar",
+                     help="Busca de novo os títulos dos álbuns em vez de usar o cache")
 if st.button("📷 Processar Imagens", type="primary", disabled=process_disabled):
     if st.session_state.urls:
-        metadados = [{"album_url": u, "album_folder_name": extrair_album_name(u)} for u in st.session_state.urls]
-        temp_file = Path("temp_metadata.json")
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(metadados, f, indent=4, ensure_ascii=False)
-        try:
-            logger = LoggerFake()
-            image_downloader.main_integrated(logger, [temp_file])
-            # ZIP da pasta "imagens"
-            output_dir = Path("imagens")
-            mem_zip = io.BytesIO()
-            with zipfile.ZipFile(mem_zip, mode="w") as zf:
-                for path in output_dir.rglob("*"):
-                    if path.is_file():
-                        zf.write(path, path.relative_to(output_dir))
-            mem_zip.seek(0)
-            st.success("✅ Imagens baixadas com sucesso!")
-            st.download_button("⬇️ Baixar Imagens (ZIP)", mem_zip, file_name="imagens.zip")
-        except Exception as e:
-            st.error(f"Erro ao baixar imagens: {e}")
+        fila.submit(st.session_state.session_id, list(st.session_state.urls), opcoes={"forcar": forcar})
+        st.session_state.urls = []
+        st.success("✅ Job enviado! Acompanhe o progresso abaixo.")
     else:
         st.warning("Nenhuma URL adicionada.")
 
+# Jobs desta sessão (progresso por polling)
+ROTULOS = {
+    STATUS_QUEUED: "⏳ Na fila",
+    STATUS_RUNNING: "⚙️ Processando",
+    STATUS_DONE: "✅ Concluído",
+    STATUS_FAILED: "❌ Falhou",
+    STATUS_INTERRUPTED: "⏹️ Interrompido",
+    STATUS_CANCELLED: "⏹️ Cancelado",
+}
+jobs = fila.list_jobs(st.session_state.session_id)
+if jobs:
+    st.subheader("🗂️ Jobs")
+    for job in jobs:
+        processados = job["done"] + job["failed"]
+        with st.container():
+            st.write(f"**{ROTULOS.get(job['status'], job['status'])}** — {job['total']} URL(s) · job `{job['id']}`")
+            st.progress(processados / job["total"] if job["total"] else 0.0)
+            st.caption(f"{job['done']} ok · {job['failed']} falha(s) · {job['message']}")
+            if job["status"] in ACTIVE_STATUS:
+                if st.button("⏹️ Cancelar", key=f"cancel_{job['id']}"):
+                    fila.cancel(job["id"])
+                    st.experimental_rerun()
+            zip_path = Path(job["result"].get("zip", ""))
+            # job com falha parcial ainda entrega o que foi baixado
+            parcial = job["status"] == STATUS_FAILED and job["result"].get("arquivos")
+            if (job["status"] == STATUS_DONE or parcial) and zip_path.is_file():
+                with open(zip_path, "rb") as zip_file:
+                    st.download_button(
+                        f"⬇️ Baixar Imagens (ZIP, {job['result'].get('arquivos', 0)} arquivo(s))",
+                        zip_file,
+                        file_name=f"imagens-{job['id']}.zip",
+                        key=f"zip_{job['id']}",
+                    )
+
+if any(j["status"] in ACTIVE_STATUS for j in jobs):
+    time.sleep(2)
+    st.experimental_rerun()
+
 # Ocultar (por enquanto) o botão de CSV
 if False:
     if st.button("📊 Coletar Metadados + Gerar CSV"):
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+bench_lcs.py — _longest_common_substring (metadata_generator): autômato de sufixos × DP antiga
+- Verificação por propriedade: pares aleatórios (alfabetos pequenos, títulos mistos chinês/inglês,
+  vazios, só espaços) têm de dar exatamente o mesmo resultado da DP O(m·n) copiada abaixo
+- Benchmark: pares de títulos Yupoo longos, como os vistos por MetadataGenerator.gerar_arquivo
+
+Uso:
+    python benchmarks/bench_lcs.py [--casos 20000] [--pares 300] [--tamanho 400]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from system.metadata.metadata_generator import _longest_common_substring  # noqa: E402
+
+
+def old_lcs(a, b):
+    if not a or not b:
+        return ''
+    a, b = a.strip(), b.strip()
+    m, n = len(a), len(b)
+    dp = [0] * (n + 1)
+    longest_len = 0
+    end_pos = 0
+    for i in range(1, m + 1):
+        prev = 0
+        for j in range(1, n + 1):
+            temp = dp[j]
+            if a[i-1] == b[j-1]:
+                dp[j] = prev + 1
+                if dp[j] > longest_len:
+                    longest_len = dp[j]
+                    end_pos = i
+            else:
+                dp[j] = 0
+            prev = temp
+    return a[end_pos - longest_len:end_pos] if longest_len else ''
+
+
+PALAVRAS = ['Real', 'Madrid', '25/26', 'Home', 'Away', 'Kit', 'S-XXL', 'Retro', '球衣', '主场', '客场',
+            '又拍图片管家', 'Yupoo', '|', 'Player', 'Version', '长袖', 'Kids', 'Women', '2025']
+
+
+def titulo(rnd, n_palavras):
+    return ' '.join(rnd.choice(PALAVRAS) for _ in range(n_palavras))
+
+
+def propriedade(casos, rnd):
+    geradores = [
+        lambda: (''.join(rnd.choice('ab ') for _ in range(rnd.randint(0, 12))),
+                 ''.join(rnd.choice('ab ') for _ in range(rnd.randint(0, 12)))),
+        lambda: (''.join(rnd.choice('abc') for _ in range(rnd.randint(1, 30))),
+                 ''.join(rnd.choice('abc') for _ in range(rnd.randint(1, 30)))),
+        lambda: (titulo(rnd, rnd.randint(0, 12)), titulo(rnd, rnd.randint(0, 12))),
+        lambda: ('  ' + titulo(rnd, 5) + ' ', ' '),
+    ]
+    for _ in range(casos):
+        a, b = rnd.choice(geradores)()
+        esperado, obtido = old_lcs(a, b), _longest_common_substring(a, b)
+        if esperado != obtido:
+            print(f"DIVERGÊNCIA: a={a!r} b={b!r} antigo={esperado!r} novo={obtido!r}")
+            return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--casos', type=int, default=20000)
+    ap.add_argument('--pares', type=int, default=300)
+    ap.add_argument('--tamanho', type=int, default=400, help='caracteres aproximados por título')
+    a = ap.parse_args()
+    rnd = random.Random(42)
+
+    if not propriedade(a.casos, rnd):
+        return 1
+    print(f"propriedade: {a.casos} casos idênticos à DP antiga")
+
+    n_palavras = max(1, a.tamanho // 5)
+    pares = [(titulo(rnd, n_palavras), titulo(rnd, n_palavras)) for _ in range(a.pares)]
+    t = time.perf_counter()
+    for x, y in pares:
+        old_lcs(x, y)
+    t_old = time.perf_counter() - t
+    t = time.perf_counter()
+    for x, y in pares:
+        _longest_common_substring(x, y)
+    t_new = time.perf_counter() - t
+    print(f"{a.pares} pares (~{a.tamanho} caracteres): DP {t_old:.3f}s | autômato {t_new:.3f}s | {t_old / t_new:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+bench_offline.py — Vazão do pipeline sem tocar em lojas reais
+- Sobe benchmarks/fixture_server.py (categorias, produtos, álbuns e imagens gravados) em 127.0.0.1
+- Etapas medidas: CategoryCrawler (WordPress e Yupoo), get_metadata, WordPressDownloader, CSVGenerator
+- Relatório JSON: páginas/s, imagens/s, MB/s, latência p50/p95 por operação, pico de RSS
+- --base compara com um relatório anterior e sai com código 1 se alguma vazão cair além da tolerância
+
+Uso:
+    python benchmarks/bench_offline.py --produtos 300 --latencia-ms 20 --taxa-erro 0.02
+    python benchmarks/bench_offline.py --base benchmarks/resultados/anterior.json --tolerancia 0.15
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_server import FixtureServer  # noqa: E402
+
+# limites zerados: mede o código, não o ritmo configurado para lojas reais
+LIMITES_BENCH = {"rate_limit": {"default": {"delay": 0.0, "min_delay": 0.0, "max_delay": 1.0,
+                                            "error_delay": 0.01, "speedup": 0.9, "max_retries": 3}}}
+
+
+class _Mudo:
+    def log(self, *args, **kwargs):
+        pass
+
+
+def _crawler_fixture(logger):
+    """CategoryCrawler com a plataforma pelo caminho: o servidor de fixtures serve a Yupoo em
+    127.0.0.1/yupoo/..., que o classificador (pelo host) trataria como WordPress."""
+    from system.category_crawler import CategoryCrawler
+
+    class _CrawlerFixture(CategoryCrawler):
+        @staticmethod
+        def plataforma(url: str) -> str:
+            return "yupoo" if "/yupoo/" in url else "wordpress"
+
+        def _is_valid_product_url(self, href: str) -> bool:
+            return "/yupoo/albums/" in href or super()._is_valid_product_url(href)
+
+    return _CrawlerFixture(logger)
+
+
+def _pico_rss_mb() -> Optional[float]:
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil  # opcional (Windows)
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+def _percentil(valores: List[float], p: float) -> Optional[float]:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    k = min(len(ordenados) - 1, max(0, int(round(p / 100.0 * (len(ordenados) - 1)))))
+    return round(ordenados[k] * 1000, 2)
+
+
+def _etapa(nome: str, itens: int, segundos: float, latencias: List[float], unidade: str, **extra) -> Dict:
+    r = {
+        "etapa": nome,
+        unidade: itens,
+        "segundos": round(segundos, 3),
+        f"{unidade}_por_s": round(itens / segundos, 2) if segundos > 0 else None,
+        "latencia_p50_ms": _percentil(latencias, 50),
+        "latencia_p95_ms": _percentil(latencias, 95),
+    }
+    r.update(extra)
+    return r
+
+
+def _cronometrar(fn: Callable, args_list: List[tuple], workers: int):
+    latencias: List[float] = []
+
+    def um(args):
+        t = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            latencias.append(time.perf_counter() - t)
+
+    t0 = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(um, args_list))
+    else:
+        resultados = [um(a) for a in args_list]
+    return resultados, time.perf_counter() - t0, latencias
+
+
+def executar(a) -> Dict:
+    from system.csv_generator import CSVGenerator
+    from system.imgdownloader.wordpress import WordPressDownloader
+    from system.rate_limiter import get_limiter, reset_limiter
+    from system.scraper_engine import get_metadata
+
+    reset_limiter()
+    limiter = get_limiter(None if a.com_rate_limit else LIMITES_BENCH)
+    log = _Mudo()
+    etapas: List[Dict] = []
+
+    with FixtureServer(produtos=a.produtos, imagens_por_produto=a.imagens_por_produto, kb_imagem=a.kb_imagem,
+                       latencia_ms=a.latencia_ms, banda_kbps=a.banda_kbps, taxa_erro=a.taxa_erro,
+                       seed=a.seed) as srv:
+        crawler = _crawler_fixture(log)
+
+        # 1) categorias (percorrer → ler_pagina, página a página, como na expansão do pipeline)
+        def categoria(url: str) -> List[str]:
+            encontrados: Dict[str, int] = {}
+            crawler.percorrer(url, lambda href, pagina: encontrados.setdefault(href, pagina))
+            return list(encontrados)
+
+        t = time.perf_counter()
+        wp_urls = categoria(srv.url("/product-category/camisas/page/1/"))
+        dt = time.perf_counter() - t
+        etapas.append(_etapa("categoria_wordpress", srv.paginas, dt, [dt / srv.paginas] * srv.paginas, "paginas",
+                             produtos_encontrados=len(wp_urls)))
+        t = time.perf_counter()
+        yp_urls = categoria(srv.url("/yupoo/categories/1?page=1"))
+        dt = time.perf_counter() - t
+        etapas.append(_etapa("categoria_yupoo", srv.paginas, dt, [dt / srv.paginas] * srv.paginas, "paginas",
+                             albuns_encontrados=len(yp_urls)))
+
+        # 2) metadados
+        wp_urls.sort()
+        yp_urls.sort()
+        metas, dt, lat = _cronometrar(lambda u: get_metadata(u, "wordpress", refresh=True),
+                                      [(u,) for u in wp_urls], a.workers)
+        etapas.append(_etapa("metadados_wordpress", len(wp_urls), dt, lat, "paginas",
+                             com_titulo=sum(1 for m in metas if m.get("album_title"))))
+        metas_y, dt, lat = _cronometrar(lambda u: get_metadata(u, "yupoo", refresh=True),
+                                        [(u,) for u in yp_urls], a.workers)
+        etapas.append(_etapa("metadados_yupoo", len(yp_urls), dt, lat, "paginas",
+                             com_titulo=sum(1 for m in metas_y if m.get("album_title"))))
+
+        # 3) imagens (WordPress/HTTP; Yupoo usa Selenium e fica de fora)
+        salvas: List[Path] = []
+        wp = WordPressDownloader(logger=log, user_agent=None, timeout=10, delay=0, referer_all=False,
+                                 min_kb=1, out_root=Path("imagens"), limiter=limiter, on_saved=salvas.append)
+        alvo = wp_urls[: a.albuns_imagens]
+
+        def album(u, i):
+            try:
+                wp.process_page(u, album_folder_name=f"album-{i:04d}")
+                return True
+            except Exception:
+                return False
+
+        oks, dt, lat = _cronometrar(album, [(u, i) for i, u in enumerate(alvo)], a.workers)
+        total_bytes = sum(p.stat().st_size for p in salvas if p.exists())
+        etapas.append(_etapa("imagens_wordpress", len(salvas), dt, lat, "imagens", albuns=len(alvo),
+                             albuns_com_falha=oks.count(False),
+                             mb=round(total_bytes / 1048576, 2),
+                             mb_por_s=round(total_bytes / 1048576 / dt, 2) if dt > 0 else None))
+
+        # 4) CSV
+        produtos = [{
+            "album_url": u,
+            "album_title": m.get("album_title"),
+            "page_title": m.get("page_title"),
+            "album_folder_name": m.get("album_title"),
+            "sizes": "S, M, L, XL, XXL",
+        } for u, m in zip(wp_urls + yp_urls, metas + metas_y)]
+        produtos = produtos * max(1, a.multiplicar_csv)
+        gen = CSVGenerator(log)
+        t = time.perf_counter()
+        ok = gen.gerar_csv_ecommerce(iter(produtos))
+        dt = time.perf_counter() - t
+        etapas.append(_etapa("csv", len(produtos), dt, [], "produtos", ok=ok, arquivos=len(gen.ultimos_arquivos)))
+
+        servidor = dict(srv.stats)
+
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {k: v for k, v in vars(a).items() if k not in ("saida", "base")},
+        "etapas": etapas,
+        "servidor": servidor,
+        "pico_rss_mb": _pico_rss_mb(),
+    }
+
+
+def comparar(atual: Dict, base: Dict, tolerancia: float) -> List[str]:
+    """Etapas cuja vazão caiu mais que a tolerância em relação ao relatório base."""
+    regressoes = []
+    anteriores = {e["etapa"]: e for e in base.get("etapas", [])}
+    for e in atual["etapas"]:
+        b = anteriores.get(e["etapa"])
+        if not b:
+            continue
+        for chave, valor in e.items():
+            if chave.endswith("_por_s") and valor and b.get(chave):
+                queda = 1 - valor / b[chave]
+                if queda > tolerancia:
+                    regressoes.append(f"{e['etapa']}.{chave}: {b[chave]} → {valor} (-{queda:.0%})")
+    return regressoes
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark offline do pipeline (servidor local de fixtures)")
+    ap.add_argument("--produtos", type=int, default=200)
+    ap.add_argument("--imagens-por-produto", type=int, default=6)
+    ap.add_argument("--kb-imagem", type=int, default=80)
+    ap.add_argument("--albuns-imagens", type=int, default=40, help="álbuns WordPress com download de imagens")
+    ap.add_argument("--multiplicar-csv", type=int, default=20, help="replica os produtos na etapa de CSV")
+    ap.add_argument("--latencia-ms", type=float, default=0.0)
+    ap.add_argument("--banda-kbps", type=float, default=0.0, help="0 = sem limite")
+    ap.add_argument("--taxa-erro", type=float, default=0.0, help="fração de respostas 503/429")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--com-rate-limit", action="store_true", help="usa rate_limit do config.json em vez de zero")
+    ap.add_argument("--saida", help="arquivo JSON (padrão benchmarks/resultados/offline_<ts>.json)")
+    ap.add_argument("--base", help="relatório anterior para detectar regressões")
+    ap.add_argument("--tolerancia", type=float, default=0.15)
+    a = ap.parse_args()
+
+    saida = Path(a.saida) if a.saida else \
+        ROOT / "benchmarks" / "resultados" / f"offline_{datetime.now():%Y%m%d_%H%M%S}.json"
+    saida = saida.resolve()
+    base = json.loads(Path(a.base).read_text(encoding="utf-8")) if a.base else None
+
+    # cache de álbuns, imagens e CSVs vão para uma pasta temporária
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp(prefix="bora-bench-")
+    try:
+        os.chdir(tmp)
+        relatorio = executar(a)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    for e in relatorio["etapas"]:
+        vazao = next((f"{v} {k}" for k, v in e.items() if k.endswith("_por_s")), "")
+        print(f"{e['etapa']:<22} {vazao:<26} p50={e['latencia_p50_ms']} ms  p95={e['latencia_p95_ms']} ms")
+    print(f"servidor: {relatorio['servidor']} | pico RSS: {relatorio['pico_rss_mb']} MB")
+    print(f"relatório: {saida}")
+
+    if base:
+        regressoes = comparar(relatorio, base, a.tolerancia)
+        for r in regressoes:
+            print(f"REGRESSÃO {r}")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+bench_startup.py — Tempo de inicialização do bora.py
+- import do bora.py em processo novo (o que roda antes da janela aparecer) e quais
+  módulos pesados já vieram junto (bs4, requests, lxml, selenium)
+- comparação com o import antecipado antigo (interface_manager + data_processor_main + csv_generator)
+- verificação de requisitos: import de cada pacote (antigo) × importlib.metadata (novo) × cache por hash
+  (nada é instalado: o benchmark só consulta)
+
+Uso:
+    python benchmarks/bench_startup.py [--repeticoes 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PESADOS = ("bs4", "requests", "lxml", "selenium", "streamlit")
+
+_SONDA = """
+import sys, time
+sys.path.insert(0, {root!r})
+t = time.perf_counter()
+{codigo}
+dt = time.perf_counter() - t
+print(dt, ",".join(m for m in {pesados!r} if m in sys.modules))
+"""
+
+
+def _medir(codigo: str, repeticoes: int):
+    tempos, carregados = [], ""
+    for _ in range(repeticoes):
+        out = subprocess.run([sys.executable, "-c", _SONDA.format(root=str(ROOT), codigo=codigo, pesados=PESADOS)],
+                             capture_output=True, text=True, cwd=str(ROOT))
+        if out.returncode != 0:
+            return None, out.stderr.strip().splitlines()[-1:]
+        dt, _, carregados = out.stdout.strip().rpartition("\n")[2].partition(" ")
+        tempos.append(float(dt))
+    return statistics.median(tempos), carregados or "-"
+
+
+def _requisitos(repeticoes: int):
+    sys.path.insert(0, str(ROOT))
+    import importlib
+    import os
+    os.chdir(ROOT)
+    from bora import RequirementChecker
+
+    class _Mudo:
+        def log(self, *a, **k):
+            pass
+
+    rc = RequirementChecker(_Mudo())
+    raw = rc.requirements_file.read_bytes()
+    pacotes = json.loads(raw.decode("utf-8")).get("required_packages", [])
+
+    def antigo():
+        ok = 0
+        for p in pacotes:
+            try:
+                importlib.import_module(p.split(">=")[0].split("==")[0].replace("-", "_"))
+                ok += 1
+            except ImportError:
+                pass
+        return ok
+
+    def novo():
+        return sum(1 for p in pacotes if rc._check_package(p))
+
+    def cache():
+        return rc._cached_signature() == rc._signature(raw)
+
+    res = {}
+    for nome, fn in (("novo (importlib.metadata)", novo), ("cache por hash", cache), ("antigo (import)", antigo)):
+        t = time.perf_counter()
+        for _ in range(repeticoes):
+            r = fn()
+        res[nome] = ((time.perf_counter() - t) / repeticoes, r)
+    return len(pacotes), res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeticoes", type=int, default=5)
+    a = ap.parse_args()
+
+    print("import antes da janela (mediana, processo novo):")
+    casos = [
+        ("bora.py (atual)", "import bora"),
+        ("import antecipado antigo", "import tkinter\nimport system.interface_manager, system.data_processor_main, system.csv_generator"),
+    ]
+    for nome, codigo in casos:
+        t, carregados = _medir(codigo, a.repeticoes)
+        if t is None:
+            print(f"  {nome:<28} erro: {carregados}")
+        else:
+            print(f"  {nome:<28} {t * 1000:8.1f} ms   pesados carregados: {carregados}")
+
+    n, res = _requisitos(a.repeticoes)
+    print(f"verificação de {n} requisitos (média por execução):")
+    for nome, (t, r) in res.items():
+        print(f"  {nome:<28} {t * 1000:8.2f} ms   resultado: {r}")
+    # o antigo importa pandas/selenium/... e, para nomes de distribuição ≠ módulo
+    # (beautifulsoup4, Pillow, python-dateutil), acusa falta e roda pip a cada abertura
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+bench_text_norm.py — Micro-benchmark da normalização compartilhada (system/text_norm.py)
+- Corpus realista: títulos Yupoo/WordPress montados com os nomes de equipes.json
+  (acentos, '25/26', 'S-XXL9', sufixos '| Yupoo'), cada título repetido como acontece
+  entre CSV, metadados e app
+- Compara as implementações antigas (copiadas abaixo) com as novas: mesmo resultado + tempo
+
+Uso:
+    python benchmarks/bench_text_norm.py [--titulos 5000] [--repeticoes 6]
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from system import text_norm  # noqa: E402
+
+
+# ------------------------- implementações antigas -------------------------
+def old_strip_accents(text):
+    if not text: return ''
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+def old_slug(name):
+    s = old_strip_accents((name or '').lower())
+    s = s.replace('/', '-').replace('\\', '-')
+    s = re.sub(r'\s+', '-', s)
+    s = re.sub(r'[^a-z0-9_-]+', '', s)
+    s = re.sub(r'-{2,}', '-', s).strip('-')
+    if len(s) > 120: s = s[:120].rstrip('-')
+    return s
+
+def old_tokenize(s):
+    return re.findall(r'[a-z0-9]+', old_strip_accents((s or '').lower()))
+
+_FORBIDDEN = set('<>:"\\|?*')
+
+def old_sanitize_win(name):
+    name = name.replace('/', '-')
+    cleaned = ''.join(ch for ch in name if ch not in _FORBIDDEN).strip()
+    while cleaned.endswith((' ', '.')):
+        cleaned = cleaned[:-1]
+    return cleaned[:120] if len(cleaned) > 120 else cleaned
+
+def old_intersecao(a, b):
+    a, b = (a or '').strip(), (b or '').strip()
+    if not a: return b
+    if not b: return a
+    if a.lower() in b.lower(): base = a
+    elif b.lower() in a.lower(): base = b
+    else:
+        aw, bw = a.split(), b.split()
+        common = []
+        for i in range(min(len(aw), len(bw))):
+            if aw[i].lower() == bw[i].lower(): common.append(aw[i])
+            else: break
+        base = ' '.join(common) if common else a
+    base = base.replace('25/26', '25-26')
+    base = re.sub(r'(S-\s*X{1,4}L)\d+', r'\1', base, flags=re.I)
+    base = re.sub(r'(S-\s*\dXL)\d*', r'\1', base, flags=re.I)
+    return base.strip()
+
+_WIN = set('<>:"/\\|?*')
+
+def old_sanitize_folder(name):
+    name = name.replace('25/26', '25-26').replace('24/25', '24-25').replace('23/24', '23-24')
+    for suf in (' | Yupoo', ' | 又拍图片管家', '| Yupoo', '| 又拍图片管家'):
+        name = name.replace(suf, '').strip()
+    name = re.sub(r'(S-X{0,4}XL|S-\dXL)\d+\b', r'\1', name, flags=re.IGNORECASE)
+    name = ''.join('_' if ch in _WIN else ch for ch in name)
+    return name.rstrip(' .')
+
+
+# --------------------------------- corpus ---------------------------------
+def corpus(n, seed=7):
+    rnd = random.Random(seed)
+    equipes = json.loads((ROOT / 'system' / 'equipes.json').read_text(encoding='utf-8'))
+    times = [k for bucket in equipes.values() for k in bucket]
+    temporadas = ['25/26', '24/25', '2025', '23/24 Retro', '1998']
+    tipos = ['Home', 'Away', 'Third', 'Goalkeeper', 'Player Version', 'Women', 'Kids Kit', 'Long Sleeve']
+    tamanhos = ['S-XXL', 'S-XXL9', 'S-4XL12', '16-28', 'S-3XL']
+    sufixos = [' | Yupoo', ' | 又拍图片管家', '', ' - Camisa Oficial', '.']
+    out = []
+    for _ in range(n):
+        t = rnd.choice(times).title()
+        out.append(f"{t} {rnd.choice(temporadas)} {rnd.choice(tipos)} {rnd.choice(tamanhos)}{rnd.choice(sufixos)}")
+    return out
+
+
+def bench(fn, args_list, repeticoes):
+    t = time.perf_counter()
+    for _ in range(repeticoes):
+        for args in args_list:
+            fn(*args)
+    return time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--titulos', type=int, default=5000)
+    ap.add_argument('--repeticoes', type=int, default=6, help='passagens sobre o corpus (estágios do pipeline)')
+    a = ap.parse_args()
+
+    titulos = corpus(a.titulos)
+    pares = list(zip(titulos, titulos[1:] + titulos[:1]))
+    casos = [
+        ('strip_accents', old_strip_accents, text_norm.strip_accents, [(t,) for t in titulos]),
+        ('slug_from_name', old_slug, text_norm.slug_from_name, [(t,) for t in titulos]),
+        ('tokenize_words', old_tokenize, lambda s: list(text_norm.tokenize_words(s)), [(t,) for t in titulos]),
+        ('sanitize_win', old_sanitize_win, text_norm.sanitize_win, [(t,) for t in titulos]),
+        ('intersecao_textual', old_intersecao, text_norm.intersecao_textual, pares),
+        ('sanitize_folder_name', old_sanitize_folder, text_norm.sanitize_folder_name, [(t,) for t in titulos]),
+    ]
+
+    print(f"{a.titulos} títulos × {a.repeticoes} passagens")
+    print(f"{'função':<22}{'antigo (s)':>12}{'novo (s)':>12}{'ganho':>8}")
+    total_old = total_new = 0.0
+    for nome, old, new, args_list in casos:
+        divergentes = [args for args in args_list if old(*args) != new(*args)]
+        if divergentes:
+            print(f"DIVERGÊNCIA em {nome}: {divergentes[0]!r}")
+            return 1
+        text_norm.cache_clear()
+        t_old = bench(old, args_list, a.repeticoes)
+        t_new = bench(new, args_list, a.repeticoes)
+        total_old += t_old
+        total_new += t_new
+        print(f"{nome:<22}{t_old:>12.4f}{t_new:>12.4f}{t_old / t_new:>7.1f}x")
+    print(f"{'total':<22}{total_old:>12.4f}{total_new:>12.4f}{total_old / total_new:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+bench_url_classifier.py — Micro-benchmark do classificador de URLs (system/classificador_url.py)
+- Corpus realista: álbuns Yupoo (com e sem ?uid=1), categorias/buscas Yupoo, produtos, categorias,
+  buscas e paginação WordPress, links de carrinho/imagem; cada URL vista várias vezes, como na
+  expansão → fronteira → extração → download
+- Compara as regras antigas (copiadas abaixo) com o classificador: vazão e divergências
+  (as divergências esperadas são as inconsistências que o classificador unificou)
+
+Uso:
+    python benchmarks/bench_url_classifier.py [--urls 200000] [--repeticoes 4]
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from system import classificador_url  # noqa: E402
+
+
+# ------------------------- implementações antigas -------------------------
+def old_analyze(url):
+    host = urlparse(url).netloc.lower()
+    path = urlparse(url).path.lower()
+    qs = parse_qs(urlparse(url).query)
+    if host.endswith(("soccer-jersey-yupoo.com",)):
+        if "/product/" in path:
+            return "wordpress", "produto"
+        if path.endswith(("/search/", "/search")) or "s" in qs or "post_type" in qs or "/category/" in path \
+                or "/categories" in path or "/collection" in path:
+            return "wordpress", "categoria"
+        return "wordpress", "desconhecido"
+    if ".yupoo.com" in host:
+        return ("yupoo", "produto") if "/albums/" in path else ("yupoo", "categoria")
+    return "desconhecido", "desconhecido"
+
+
+def old_is_category(url):
+    url_lower = url.lower()
+    for pattern in ['/category/', '/product-category/', '/collection/', '/collections/', '/shop/', '/store/',
+                    '/catalogo/', '/produtos/', '/search/', '/products/', '/search/', '/categories/', 'search?',
+                    'category?']:
+        if pattern in url_lower:
+            return True
+    if "?s=" in url_lower:
+        return True
+    for param in ['search=', 'q=', 'category=', 'cat=', 'tag=']:
+        if param in url_lower:
+            return True
+    return False
+
+
+def old_is_product(href):
+    if not href:
+        return False
+    href_lower = href.lower()
+    has_product = any(i in href_lower for i in ['/product/', '/produtos/', '/item/'])
+    has_ignore = any(i in href_lower for i in ['/category/', '/tag/', '/author/', '/page/', '/cart/', '/checkout/',
+                                               '/account/', '/login/', '.jpg', '.png', '.gif', '.pdf', '.zip',
+                                               'javascript:', 'mailto:', 'tel:', '#'])
+    return has_product and not has_ignore
+
+
+def old_classify(url):
+    return "yupoo" if ".yupoo.com" in url else "wordpress"
+
+
+# --------------------------------- corpus ---------------------------------
+def corpus(n, seed=11):
+    rnd = random.Random(seed)
+    lojas_y = [f"https://loja{i}.x.yupoo.com" for i in range(40)]
+    lojas_w = ["https://soccer-jersey-yupoo.com", "https://camisas.com.br", "https://kits-store.net"]
+    modelos = [
+        lambda: f"{rnd.choice(lojas_y)}/albums/{rnd.randint(10**8, 10**9)}?uid=1",
+        lambda: f"{rnd.choice(lojas_y)}/albums/{rnd.randint(10**8, 10**9)}",
+        lambda: f"{rnd.choice(lojas_y)}/categories/{rnd.randint(1, 9999)}?page={rnd.randint(1, 30)}",
+        lambda: f"{rnd.choice(lojas_y)}/search/album?q=flamengo&uid=1",
+        lambda: f"{rnd.choice(lojas_w)}/product/camisa-{rnd.randint(1, 99999)}-25-26/",
+        lambda: f"{rnd.choice(lojas_w)}/product-category/brasileirao/page/{rnd.randint(1, 20)}/",
+        lambda: f"{rnd.choice(lojas_w)}/?s=real+madrid&post_type=product",
+        lambda: f"{rnd.choice(lojas_w)}/cart/",
+        lambda: f"{rnd.choice(lojas_w)}/wp-content/uploads/2025/0{rnd.randint(1, 9)}/foto.jpg",
+    ]
+    unicas = [rnd.choice(modelos)() for _ in range(n // 4)]
+    return [rnd.choice(unicas) for _ in range(n)]  # cada URL reaparece ~4x
+
+
+def bench(fn, urls, repeticoes):
+    t = time.perf_counter()
+    for _ in range(repeticoes):
+        for u in urls:
+            fn(u)
+    return time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--urls', type=int, default=200000)
+    ap.add_argument('--repeticoes', type=int, default=4, help='consultas por URL (módulos do pipeline)')
+    a = ap.parse_args()
+
+    urls = corpus(a.urls)
+    classificador_url.configurar(["search", "collection", "categories"])
+
+    def old_todas(u):
+        return old_analyze(u), old_is_category(u), old_is_product(u), old_classify(u)
+
+    def new_todas(u):
+        c = classificador_url.classificar(u)
+        return c.entidade == "categoria", c.entidade == "produto", c.plataforma
+
+    t_old = bench(old_todas, urls, a.repeticoes)
+    classificador_url.cache_clear()
+    t_new = bench(new_todas, urls, a.repeticoes)
+    n = len(urls) * a.repeticoes
+    print(f"{len(urls)} URLs × {a.repeticoes} consultas (4 regras antigas vs 1 classificação)")
+    print(f"antigo: {t_old:8.3f}s  {n / t_old * 60 / 1e6:6.1f} mi URLs/min")
+    print(f"novo:   {t_new:8.3f}s  {n / t_new * 60 / 1e6:6.1f} mi URLs/min   ({t_old / t_new:.1f}x)")
+
+    divergencias = Counter()
+    for u in set(urls):
+        c = classificador_url.classificar(u)
+        if old_is_category(u) != c.categoria:
+            divergencias["_is_category_url", c.entidade] += 1
+        if old_analyze(u) != (c.plataforma, c.entidade):
+            divergencias["URLAnalyzer", old_analyze(u), (c.plataforma, c.entidade)] += 1
+    print("\ndivergências com as regras antigas (URLs únicas):")
+    for chave, qtd in divergencias.most_common(10):
+        print(f"  {qtd:7d}  {chave}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
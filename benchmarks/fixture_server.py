@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+fixture_server.py — Servidor HTTP local com páginas gravadas de Yupoo e WordPress (benchmarks offline)
+- Modelos em benchmarks/fixtures/*.html (string.Template) preenchidos com títulos reais de equipes.json
+- Rotas:
+    /product-category/camisas/page/<n>/     categoria WordPress (paginada, link a.next)
+    /product/<slug>/                        produto WordPress (galeria WooCommerce)
+    /wp-content/uploads/2025/01/<arq>.jpg   imagem (bytes determinísticos, Content-Length)
+    /yupoo/categories/1?page=<n>            categoria Yupoo
+    /yupoo/albums/<id>                      álbum Yupoo (og:image)
+- Condições de rede simuladas: latência fixa, banda limitada e injeção de erros (503/429 com Retry-After: 0)
+
+Uso:
+    with FixtureServer(produtos=200, latencia_ms=20, banda_kbps=0, taxa_erro=0.02) as srv:
+        srv.url("/product-category/camisas/page/1/")
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+ROOT = FIXTURES.parent.parent
+
+POR_PAGINA = 24
+_JPEG_HEAD = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+
+
+def _titulos(n: int, seed: int) -> List[str]:
+    rnd = random.Random(seed)
+    try:
+        equipes = json.loads((ROOT / "system" / "equipes.json").read_text(encoding="utf-8"))
+        times = [k.title() for bucket in equipes.values() for k in bucket] or ["Time"]
+    except Exception:
+        times = ["Flamengo", "Real Madrid", "Brasil", "Palmeiras", "Barcelona"]
+    tipos = ["Home", "Away", "Third", "Retro", "Player Version", "Kids Kit", "Women", "Long Sleeve"]
+    temporadas = ["25/26", "24/25", "2025", "1998"]
+    return [f"{rnd.choice(times)} {rnd.choice(temporadas)} {rnd.choice(tipos)} S-XXL" for _ in range(n)]
+
+
+class FixtureServer:
+    def __init__(self, produtos: int = 200, imagens_por_produto: int = 6, kb_imagem: int = 80,
+                 latencia_ms: float = 0.0, banda_kbps: float = 0.0, taxa_erro: float = 0.0, seed: int = 1):
+        self.produtos = produtos
+        self.imagens_por_produto = imagens_por_produto
+        self.kb_imagem = kb_imagem
+        self.latencia = latencia_ms / 1000.0
+        self.banda = banda_kbps * 1024.0  # bytes/s (0 = ilimitada)
+        self.taxa_erro = taxa_erro
+        self.titulos = _titulos(produtos, seed)
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._modelos = {p.stem: Template(p.read_text(encoding="utf-8")) for p in FIXTURES.glob("*.html")}
+        self._imagem = (_JPEG_HEAD + bytes(random.Random(seed).getrandbits(8) for _ in range(4096))) \
+            * (kb_imagem * 1024 // 4096 + 1)
+        self._imagem = self._imagem[: kb_imagem * 1024]
+        self.stats: Dict[str, int] = {"requisicoes": 0, "erros_injetados": 0, "bytes": 0}
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------ páginas ------------------------------
+    @property
+    def paginas(self) -> int:
+        return max(1, -(-self.produtos // POR_PAGINA))
+
+    def _faixa(self, pagina: int) -> range:
+        ini = (pagina - 1) * POR_PAGINA
+        return range(ini, min(ini + POR_PAGINA, self.produtos))
+
+    def _proxima(self, pagina: int, href: str) -> str:
+        return f'<a class="next page-numbers" href="{href}">Próxima →</a>' if pagina < self.paginas else ""
+
+    def _wp_categoria(self, pagina: int) -> str:
+        itens = "\n".join(
+            f'<li class="product"><a class="woocommerce-LoopProduct-link" href="/product/item-{i}/">'
+            f'<img src="/wp-content/uploads/2025/01/item-{i}-1-300x300.jpg"><h2>{self.titulos[i]}</h2></a></li>'
+            for i in self._faixa(pagina)
+        )
+        return self._modelos["wp_categoria"].substitute(
+            pagina=pagina, produtos=itens,
+            paginacao=self._proxima(pagina, f"/product-category/camisas/page/{pagina + 1}/"))
+
+    def _wp_produto(self, i: int) -> str:
+        up = f"{self.base}/wp-content/uploads/2025/01"
+        galeria = "\n".join(
+            f'      <div class="woocommerce-product-gallery__image">'
+            f'<a href="{up}/item-{i}-{k}.jpg">'
+            f'<img src="{up}/item-{i}-{k}-600x600.jpg" '
+            f'data-large_image="{up}/item-{i}-{k}.jpg"></a></div>'
+            for k in range(1, self.imagens_por_produto + 1)
+        )
+        return self._modelos["wp_produto"].substitute(
+            id=i, titulo=self.titulos[i], galeria=galeria, og_image=f"{up}/item-{i}-1.jpg")
+
+    def _yupoo_categoria(self, pagina: int) -> str:
+        albuns = "\n".join(
+            f'<a class="album__main" href="/yupoo/albums/{1000 + i}?uid=1" title="{self.titulos[i]}">'
+            f'<div class="album__title">{self.titulos[i]}</div></a>'
+            for i in self._faixa(pagina)
+        )
+        return self._modelos["yupoo_categoria"].substitute(
+            albuns=albuns, paginacao=self._proxima(pagina, f"/yupoo/categories/1?page={pagina + 1}"))
+
+    def _yupoo_album(self, i: int) -> str:
+        imgs = [f"{self.base}/wp-content/uploads/2025/01/yupoo-{i}-{k}.jpg"
+                for k in range(1, self.imagens_por_produto + 1)]
+        return self._modelos["yupoo_album"].substitute(
+            titulo=self.titulos[i],
+            og_images="\n".join(f'<meta property="og:image" content="{u}">' for u in imgs),
+            imagens="\n".join(f'    <div class="showalbum__children image__main"><img data-src="{u}"></div>'
+                              for u in imgs))
+
+    def render(self, path: str, query: Dict[str, List[str]]):
+        """(status, content-type, corpo) para a rota; None se não existir."""
+        partes = [p for p in path.split("/") if p]
+        try:
+            if path.startswith("/product-category/"):
+                pagina = int(partes[-1]) if "page" in partes else 1
+                return 200, "text/html; charset=utf-8", self._wp_categoria(pagina).encode("utf-8")
+            if path.startswith("/product/"):
+                i = int(partes[1].rsplit("-", 1)[1])
+                if 0 <= i < self.produtos:
+                    return 200, "text/html; charset=utf-8", self._wp_produto(i).encode("utf-8")
+            if path.startswith("/wp-content/uploads/"):
+                return 200, "image/jpeg", self._imagem
+            if path.startswith("/yupoo/categories/"):
+                pagina = int((query.get("page") or ["1"])[0])
+                return 200, "text/html; charset=utf-8", self._yupoo_categoria(pagina).encode("utf-8")
+            if path.startswith("/yupoo/albums/"):
+                i = int(partes[2]) - 1000
+                if 0 <= i < self.produtos:
+                    return 200, "text/html; charset=utf-8", self._yupoo_album(i).encode("utf-8")
+        except (ValueError, IndexError):
+            pass
+        return None
+
+    def _sortear_erro(self) -> bool:
+        if self.taxa_erro <= 0:
+            return False
+        with self._lock:
+            return self._rnd.random() < self.taxa_erro
+
+    # ------------------------------ servidor -----------------------------
+    def _handler(self):
+        srv = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # silencioso
+                pass
+
+            def do_GET(self):
+                u = urlparse(self.path)
+                with srv._lock:
+                    srv.stats["requisicoes"] += 1
+                if srv.latencia:
+                    time.sleep(srv.latencia)
+                if srv._sortear_erro():
+                    with srv._lock:
+                        srv.stats["erros_injetados"] += 1
+                    self.send_response(503 if srv._rnd.random() < 0.5 else 429)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                res = srv.render(u.path, parse_qs(u.query))
+                if res is None:
+                    self.send_error(404)
+                    return
+                status, ctype, corpo = res
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self._enviar(corpo)
+                with srv._lock:
+                    srv.stats["bytes"] += len(corpo)
+
+            def _enviar(self, corpo: bytes):
+                if not srv.banda:
+                    self.wfile.write(corpo)
+                    return
+                bloco = 16 * 1024
+                for i in range(0, len(corpo), bloco):
+                    pedaco = corpo[i:i + bloco]
+                    self.wfile.write(pedaco)
+                    time.sleep(len(pedaco) / srv.banda)
+
+        return Handler
+
+    @property
+    def base(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base + path
+
+    def start(self) -> "FixtureServer":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name="fixture-server")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
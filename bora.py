@@ -23,21 +23,30 @@ import sys
 import subprocess
 import threading
 import tkinter as tk
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
 from tkinter import ttk, scrolledtext, messagebox
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-# Importa classes auxiliares do sistema
-from system.interface_manager import InterfaceManager
-from system.data_processor_main import DataProcessor
-from system.csv_generator import CSVGenerator
+# Módulos do sistema são importados sob demanda (a janela abre antes de bs4/requests/lxml)
+if TYPE_CHECKING:
+    from system.interface_manager import InterfaceManager
+    from system.data_processor_main import DataProcessor
+    from system.csv_generator import CSVGenerator
 
 class BoraLogger:
-    """Sistema de Log em Tempo Real com fonte e cores configuráveis"""
+    """Sistema de Log em Tempo Real com fonte e cores configuráveis
+
+    As mensagens entram numa fila (thread-safe) e são desenhadas em lotes por um
+    timer do Tk, com o widget limitado às últimas N linhas e o histórico num
+    buffer circular. Sob carga, linhas DEBUG deixam de ir para o widget e são
+    resumidas numa única linha (continuam no histórico e no arquivo rotativo).
+    """
     
     def __init__(self, log_widget: scrolledtext.ScrolledText, config_manager=None):
         self.log_widget = log_widget
-        self.log_history = []
         self.config_manager = config_manager
         
         # Configurações padrão (fallback)
@@ -56,12 +65,35 @@ class BoraLogger:
             "weight": "normal"
         }
         
+        self.default_buffer = {
+            "flush_ms": 100,             # intervalo entre lotes no widget
+            "max_lote": 500,             # mensagens por lote
+            "max_linhas_widget": 5000,   # linhas mantidas no widget
+            "max_historico": 20000,      # linhas mantidas em log_history
+            "limite_debug_fila": 1000,   # fila acima disso → DEBUG não vai ao widget
+            "limite_fila": 10000,        # teto da fila (Tk travado): as mais antigas saem, contadas
+            "arquivo_rotativo": False,   # espelha o log em Logs/bora.log
+            "arquivo_max_mb": 5,
+            "arquivo_backups": 3
+        }
+        
         # Inicializa configurações
         self.color_map = {}
         self.font_config = {}
+        self.buffer_config = {}
+        self._queue = deque()
+        self._fila_lock = threading.Lock()  # log() vem de várias threads; _drain da thread do Tk
+        self._debug_omitidas = 0
+        self._descartadas = 0
+        self._file_logger = None
+        self.log_history = deque(maxlen=self.default_buffer["max_historico"])
         self._load_logger_config()
         self._setup_colors()
         self._update_font()
+        self._setup_buffer()
+        
+        # Timer de entrega em lotes (roda na thread do Tk)
+        self.log_widget.after(self.buffer_config["flush_ms"], self._drain)
         
     def _load_logger_config(self):
         """Carrega configurações do logger do config.json"""
@@ -73,10 +105,15 @@ class BoraLogger:
             # Carrega configurações de fonte
             logger_font = self.config_manager.get("logger_font", {})
             self.font_config = {**self.default_font, **logger_font}
+            
+            # Carrega configurações de buffer/entrega
+            logger_buffer = self.config_manager.get("logger_buffer", {})
+            self.buffer_config = {**self.default_buffer, **logger_buffer}
         else:
             # Usa padrões se não há config_manager
             self.color_map = self.default_colors.copy()
             self.font_config = self.default_font.copy()
+            self.buffer_config = self.default_buffer.copy()
         
     def _setup_colors(self):
         """Configura as cores para diferentes níveis de log"""
@@ -95,89 +132,143 @@ class BoraLogger:
         except:
             pass  # Widget pode nao estar pronto ainda
     
+    def _setup_buffer(self):
+        """Aplica limites de histórico e o arquivo rotativo opcional"""
+        max_hist = int(self.buffer_config["max_historico"])
+        if self.log_history.maxlen != max_hist:
+            self.log_history = deque(self.log_history, maxlen=max_hist)
+        
+        if self.buffer_config.get("arquivo_rotativo") and self._file_logger is None:
+            Path("Logs").mkdir(exist_ok=True)
+            handler = RotatingFileHandler(
+                Path("Logs") / "bora.log",
+                maxBytes=int(float(self.buffer_config["arquivo_max_mb"]) * 1024 * 1024),
+                backupCount=int(self.buffer_config["arquivo_backups"]),
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s"))
+            self._file_logger = logging.getLogger("bora.stream")
+            self._file_logger.setLevel(logging.DEBUG)
+            self._file_logger.propagate = False
+            self._file_logger.addHandler(handler)
+        elif not self.buffer_config.get("arquivo_rotativo") and self._file_logger is not None:
+            for handler in list(self._file_logger.handlers):
+                self._file_logger.removeHandler(handler)
+                handler.close()
+            self._file_logger = None
+    
     def update_config(self):
         """Atualiza configurações do logger (chamado após salvar configurações)"""
         self._load_logger_config()
         self._setup_colors()
         self._update_font()
+        self._setup_buffer()
     
     def update_font_size(self):
         """Atualiza o tamanho da fonte (mantido para compatibilidade)"""
         self._update_font()
         
     def log(self, message: str, level: str = "INFO", emoji: str = "ℹ️"):
-        """Adiciona mensagem ao log com timestamp e cores"""
-        formatted_msg = f"{emoji} {message}"
-        
-        self.log_history.append(f"[{level}] {formatted_msg}")
-        self.log_widget.after(0, self._add_to_widget, formatted_msg, level)
+        """Adiciona mensagem ao log com timestamp e cores (pode ser chamado de qualquer thread)"""
+        self._enqueue(f"{emoji} {message}", level, None)
     
-    def _add_to_widget(self, message: str, level: str = "INFO"):
-        """Adiciona mensagem ao widget de forma thread-safe com cores"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Divide a mensagem em partes para aplicar cores diferentes
-        timestamp_part = f"[{timestamp}]"
-        message_part = message
-        
-        # Posição inicial
-        start_pos = self.log_widget.index(tk.END)
+    def _enqueue(self, formatted_msg: str, level: str, bg_color: Optional[str]):
+        """Registra no histórico/arquivo e enfileira para o próximo lote do widget"""
+        self.log_history.append(f"[{level}] {formatted_msg}")
+        if self._file_logger is not None:
+            self._file_logger.info(f"[{level}] {formatted_msg}")
         
-        # Adiciona timestamp com cor específica
-        self.log_widget.insert(tk.END, timestamp_part, "timestamp")
-        self.log_widget.insert(tk.END, " ")
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        with self._fila_lock:
+            # Sob carga, DEBUG fica só no histórico; o widget recebe um resumo
+            if level == "DEBUG" and len(self._queue) > self.buffer_config["limite_debug_fila"]:
+                self._debug_omitidas += 1
+                return
+            # Fila cheia (widget sem drenar): descarta as mais antigas, que o widget cortaria de todo modo
+            while len(self._queue) >= int(self.buffer_config["limite_fila"]):
+                self._queue.popleft()
+                self._descartadas += 1
+            self._queue.append((timestamp, formatted_msg, level, bg_color))
+    
+    def _drain(self):
+        """Desenha um lote de mensagens pendentes e reagenda o timer"""
+        try:
+            batch = []
+            max_lote = int(self.buffer_config["max_lote"])
+            with self._fila_lock:
+                while self._queue and len(batch) < max_lote:
+                    batch.append(self._queue.popleft())
+                omitidas, self._debug_omitidas = self._debug_omitidas, 0
+                descartadas, self._descartadas = self._descartadas, 0
+            
+            agora = datetime.now().strftime("%H:%M:%S")
+            if descartadas:
+                batch.insert(0, (agora, f"… {descartadas} mensagem(ns) antiga(s) descartada(s) da fila do painel "
+                                        f"(ver histórico)", "WARNING", None))
+            if omitidas:
+                batch.append((agora, f"… {omitidas} mensagem(ns) DEBUG omitida(s) no painel (ver histórico)",
+                              "DEBUG", None))
+            
+            if batch:
+                self._flush_batch(batch)
+        except tk.TclError:
+            return  # widget destruído: encerra o timer
+        except Exception:
+            pass
+        self.log_widget.after(self.buffer_config["flush_ms"], self._drain)
+    
+    def _flush_batch(self, batch):
+        """Um único insert para o lote inteiro, corte do excesso e um único see()"""
+        args = []
+        for timestamp, message, level, bg_color in batch:
+            if bg_color:
+                tag_name = self._bg_tag(level, bg_color)
+            else:
+                tag_name = level.lower() if level in self.color_map else "info"
+            args.extend((f"[{timestamp}]", "timestamp", " ", (), message, tag_name, "\n", ()))
+        self.log_widget.insert(tk.END, *args)
         
-        # Adiciona mensagem com cor baseada no nível
-        color_tag = level.lower() if level in self.color_map else "info"
-        self.log_widget.insert(tk.END, message_part, color_tag)
-        self.log_widget.insert(tk.END, "\n")
+        # Mantém apenas as últimas N linhas no widget
+        max_linhas = int(self.buffer_config["max_linhas_widget"])
+        # "end-1c" fica na linha vazia após o último "\n"
+        linhas = int(self.log_widget.index("end-1c").split(".")[0]) - 1
+        if linhas > max_linhas:
+            self.log_widget.delete("1.0", f"{linhas - max_linhas + 1}.0")
         
         # Rola para o final
         self.log_widget.see(tk.END)
-
-
-    def _log_with_background(self, message: str, level: str = "INFO", emoji: str = "ℹ️", bg_color: str = "#FFFFE0"):
-        """Adiciona mensagem ao log com fundo colorido"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_msg = f"{emoji} {message}"
-        
-        self.log_history.append(f"[{level}] {formatted_msg}")
-        
-        # Adiciona ao widget com fundo colorido
-        self.log_widget.after(0, self._add_to_widget_with_bg, formatted_msg, level, bg_color)
     
-    def _add_to_widget_with_bg(self, message: str, level: str = "INFO", bg_color: str = "#FFFFE0"):
-        """Adiciona mensagem ao widget com fundo colorido"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Cria tag com fundo colorido
+    def _bg_tag(self, level: str, bg_color: str) -> str:
+        """Cria (uma vez) a tag com fundo colorido"""
         tag_name = f"{level.lower()}_bg"
         color = self.color_map.get(level, "#000000")
-        
         self.log_widget.tag_config(tag_name, 
                                   foreground=color, 
                                   background=bg_color,
                                   relief="solid",
                                   borderwidth=1)
+        return tag_name
     
-        # Adiciona timestamp
-        self.log_widget.insert(tk.END, f"[{timestamp}] ", "timestamp")
-    
-        # Adiciona mensagem com fundo
-        self.log_widget.insert(tk.END, message, tag_name)
-        self.log_widget.insert(tk.END, "\n")
-        
-        # Rola para o final
-        self.log_widget.see(tk.END)
+    def _add_to_widget(self, message: str, level: str = "INFO"):
+        """Adiciona mensagem ao widget imediatamente (chamar só da thread do Tk)"""
+        self._flush_batch([(datetime.now().strftime("%H:%M:%S"), message, level, None)])
+
 
+    def _log_with_background(self, message: str, level: str = "INFO", emoji: str = "ℹ️", bg_color: str = "#FFFFE0"):
+        """Adiciona mensagem ao log com fundo colorido"""
+        formatted_msg = f"{emoji} {message}"
+        self._enqueue(formatted_msg, level, bg_color)
+    
+    def _add_to_widget_with_bg(self, message: str, level: str = "INFO", bg_color: str = "#FFFFE0"):
+        """Adiciona mensagem ao widget com fundo colorido (chamar só da thread do Tk)"""
+        self._flush_batch([(datetime.now().strftime("%H:%M:%S"), message, level, bg_color)])
 
 
     
     def clear(self):
         """Limpa o log"""
+        with self._fila_lock:
+            self._queue.clear()
         self.log_history.clear()
         self.log_widget.delete(1.0, tk.END)
     
@@ -186,7 +277,6 @@ class BoraLogger:
         if not self.log_history:
             return ""
             
-        from datetime import datetime
         timestamp = datetime.now().strftime("%Y_%m_%d-%H_%M_%S")
         filename = f"log-{timestamp}.txt"
         filepath = Path("Logs") / filename
@@ -194,11 +284,11 @@ class BoraLogger:
         filepath.parent.mkdir(exist_ok=True)
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Sistema BORA Webscraping\n")
+            f.write("Sistema BORA Webscraping\n")
             f.write(f"Log gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}\n")
             f.write("="*60 + "\n\n")
             
-            for line in self.log_history:
+            for line in list(self.log_history):
                 f.write(line + "\n")
         
         return str(filepath)
@@ -209,9 +299,12 @@ class RequirementChecker:
     def __init__(self, logger: BoraLogger):
         self.logger = logger
         self.requirements_file = Path("system") / "requisitos.json"
+        self.cache_file = Path("cache") / "requisitos_ok.json"
     
     def check_and_install(self) -> bool:
-        """Verifica e instala requisitos necessários"""
+        """Verifica e instala requisitos necessários.
+        Consulta só os metadados dos pacotes instalados (importlib.metadata, sem importar nada) e
+        pula a verificação inteira se requisitos.json e o interpretador não mudaram desde a última OK."""
         self.logger.log("Iniciando verificação de requisitos...", "INFO", "🔍")
         
         if not self.requirements_file.exists():
@@ -220,10 +313,15 @@ class RequirementChecker:
         
         try:
             import json
-            with open(self.requirements_file, 'r', encoding='utf-8') as f:
-                requirements = json.load(f)
+            raw = self.requirements_file.read_bytes()
+            requirements = json.loads(raw.decode('utf-8'))
             
             packages = requirements.get("required_packages", [])
+            assinatura = self._signature(raw)
+            if self._cached_signature() == assinatura:
+                self.logger.log(f"{len(packages)} pacotes já verificados (requisitos.json sem mudanças)", "INFO", "📦")
+                return True
+            
             self.logger.log(f"Verificando {len(packages)} pacotes...", "INFO", "📦")
             
             failed_installs = []
@@ -238,6 +336,7 @@ class RequirementChecker:
                 self.logger.log(f"Falha ao instalar: {', '.join(failed_installs)}", "ERROR", "❌")
                 return False
             
+            self._save_signature(assinatura)
             self.logger.log("Todos os requisitos verificados com sucesso!", "SUCCESS", "✅")
             return True
             
@@ -245,6 +344,32 @@ class RequirementChecker:
             self.logger.log(f"Erro ao verificar requisitos: {str(e)}", "ERROR", "❌")
             return False
     
+    def _signature(self, raw: bytes) -> str:
+        """Hash de requisitos.json + interpretador (outro venv/versão → verifica de novo)"""
+        import hashlib
+        h = hashlib.sha1(raw)
+        h.update(sys.executable.encode('utf-8'))
+        h.update(sys.version.encode('utf-8'))
+        return h.hexdigest()
+    
+    def _cached_signature(self) -> Optional[str]:
+        import json
+        try:
+            return json.loads(self.cache_file.read_text(encoding='utf-8')).get("hash")
+        except Exception:
+            return None
+    
+    def _save_signature(self, assinatura: str) -> None:
+        import json
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_file.write_text(json.dumps({
+                "hash": assinatura,
+                "verificado_em": datetime.now().isoformat(timespec='seconds')
+            }), encoding='utf-8')
+        except Exception:
+            pass
+    
     def _create_default_requirements(self):
         """Cria arquivo de requisitos padrão"""
         import json
@@ -276,14 +401,26 @@ class RequirementChecker:
             json.dump(default_requirements, f, indent=2, ensure_ascii=False)
     
     def _check_package(self, package: str) -> bool:
-        """Verifica se um pacote está instalado"""
-        import importlib
-        package_name = package.split('>=')[0].split('==')[0]
+        """Verifica se um pacote está instalado (e na versão mínima) sem importá-lo"""
+        import re
+        from importlib import metadata
+        m = re.match(r'^\s*([A-Za-z0-9_.\-]+)\s*(>=|==)?\s*([\w.]+)?', package)
+        if not m:
+            return False
+        nome, op, versao = m.groups()
         try:
-            importlib.import_module(package_name.replace('-', '_'))
-            return True
-        except ImportError:
+            instalada = metadata.version(nome)
+        except metadata.PackageNotFoundError:
             return False
+        if not op or not versao:
+            return True
+        atual, minima = self._version_tuple(instalada), self._version_tuple(versao)
+        return atual == minima if op == '==' else atual >= minima
+    
+    @staticmethod
+    def _version_tuple(v: str):
+        import re
+        return tuple(int(x) for x in re.findall(r'\d+', v.split('+')[0])[:4])
     
     def _install_package(self, package: str) -> bool:
         """Instala um pacote via pip"""
@@ -306,19 +443,24 @@ class ConfigManager:
     
     def __init__(self, logger: BoraLogger):
         self.logger = logger
-        self.config_file = Path("system") / "config.json"
-        self.config = {}
+        from system.config_service import get_config_service
+        self.service = get_config_service()
+        self.config_file = self.service.path
+    
+    @property
+    def config(self) -> dict:
+        """Retrato atual do config (somente leitura: alterações via set())"""
+        return self.service.dados()
         
     def load_config(self) -> bool:
-        """Carrega configurações do arquivo"""
+        """Carrega configurações do arquivo (via serviço compartilhado)"""
         if not self.config_file.exists():
             self.logger.log("Arquivo config.json não encontrado. Criando...", "WARNING", "⚠️")
             self._create_default_config()
         
         try:
-            import json
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+            # Mesmo retrato que os demais módulos leem; relido quando o arquivo muda
+            self.service.recarregar()
             self.logger.log("Configurações carregadas com sucesso", "SUCCESS", "⚙️")
             return True
         except Exception as e:
@@ -327,20 +469,18 @@ class ConfigManager:
     
     def get(self, key: str, default=None):
         """Obtém valor de configuração com fallback"""
-        keys = key.split('.')
-        value = self.config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        
-        return value
+        return self.service.get(key, default)
+    
+    def set(self, key: str, value, atraso=None):
+        """Altera um valor e agenda a gravação (debounce; atraso=0 grava na hora)"""
+        self.service.set(key, value, atraso)
+    
+    def save(self, atraso=0.0):
+        """Grava self.config em disco de forma atômica"""
+        self.service.salvar(atraso)
     
     def _create_default_config(self):
         """Cria arquivo de configurações padrão"""
-        import json
         default_config = {
             "tamanhos_adulto": ["P", "M", "G", "XG", "XXG", "XXXG"],
             "tamanhos_infantil": {
@@ -352,8 +492,11 @@ class ConfigManager:
                 "26": "10 a 11 anos",
                 "28": "12 a 13 anos"
             },
-            "delay_padrao": 2.0,
-            "delay_apos_erro": 5.0,
+            "rate_limit": {
+                "default": {"delay": 0.5, "min_delay": 0.1, "max_delay": 60.0,
+                            "error_delay": 5.0, "speedup": 0.9, "max_retries": 3},
+                "hosts": {}
+            },
             "tamanho_minimo_imagem": 1024,
             "identificadores_categoria": ["search", "collection", "categories"],
             "caracteres_proibidos": ["<", ">", ":", "\"", "|", "?", "*", "\\", "/"],
@@ -368,17 +511,40 @@ class ConfigManager:
             },
             "image_downloader": {
                 "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-                "timeout": 10.0,
-                "delay_between_images": 1.0
+                "timeout": 10.0
+            },
+            "desempenho": {
+                "relatorio": True   # Logs/desempenho-<etapa>-<ts>.json ao fim de cada execução
+            },
+            "profiling": {
+                "ativo": False,           # perfil de toda execução (ou caixa "Perfilar próxima execução")
+                "perfilador": "cprofile", # "amostragem" usa pyinstrument, se instalado
+                "tracemalloc": False,     # retratos de memória nas fronteiras de etapa
+                "top": 30
+            },
+            "metricas": {
+                "ativo": False,     # contadores Prometheus (system/metrics.py)
+                "porta": 0,         # > 0: http://127.0.0.1:<porta>/metrics
+                "arquivo": "",      # textfile reescrito a cada intervalo_s
+                "intervalo_s": 15
+            },
+            "fronteira": {
+                "limite_memoria": 5000,   # URLs pendentes em memória; o excedente vai para cache/*.sqlite3
+                "limite_vistos": 100000   # deduplicação em memória até aqui, depois no SQLite
+            },
+            "agendador": {
+                "lojas_simultaneas": 4,   # páginas de categoria em paralelo (todas as lojas)
+                "dominio_padrao": {"simultaneas": 2, "intervalo_s": 0.0, "max_paginas": 0},
+                "dominios": {"yupoo.com": {"simultaneas": 3}},
+                "retomar": True           # continua categorias de uma execução interrompida
+            },
+            "indice_vistos": {
+                "ativo": True,            # pula álbuns já coletados/baixados em execuções anteriores
+                "ttl_horas": 168          # álbum volta a ser coletado após 1 semana (0 = não expira)
             }
         }
         
-        self.config_file.parent.mkdir(exist_ok=True)
-        
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(default_config, f, indent=2, ensure_ascii=False)
-        
-        self.config = default_config
+        self.service.substituir(default_config)
 
 class SistemaBORA:
     """Interface Principal do Sistema BORA - Versão Tkinter"""
@@ -397,14 +563,17 @@ class SistemaBORA:
         
         # Variáveis de controle
         self.debug_mode = tk.BooleanVar()
+        self.perfilar_proxima = tk.BooleanVar()  # perfil de CPU/memória só da próxima execução
+        self.forcar = tk.BooleanVar()  # refaz álbuns já coletados/baixados e ignora o cache de álbuns
         self.processing = False
+        self.cancelamento = None  # TokenCancelamento da tarefa em andamento
         
         # Componentes do sistema
         self.logger: Optional[BoraLogger] = None
         self.config_manager: Optional[ConfigManager] = None
-        self.interface_manager: Optional[InterfaceManager] = None
-        self.data_processor: Optional[DataProcessor] = None
-        self.csv_generator: Optional[CSVGenerator] = None
+        self.interface_manager: Optional["InterfaceManager"] = None
+        self._data_processor: Optional["DataProcessor"] = None
+        self._csv_generator: Optional["CSVGenerator"] = None
         
         # Interface
         self._setup_ui()
@@ -476,6 +645,18 @@ class SistemaBORA:
             btn = ttk.Button(self.left_frame, text=text, command=command, width=25)
             btn.pack(pady=5, fill=tk.X)
             self.buttons[text] = btn
+            if text == "📦 PROCESSAR PRODUTOS":
+                # interrompe a tarefa em andamento (habilitado só durante o processamento)
+                self.cancelar_btn = ttk.Button(self.left_frame, text="⏹️ CANCELAR", command=self._cancelar_tarefa,
+                                               width=25, state="disabled")
+                self.cancelar_btn.pack(pady=5, fill=tk.X)
+            if text == "📄 GERAR LOG":
+                # perfil (cProfile + tracemalloc) da próxima execução → Logs/perfil-*.txt
+                ttk.Checkbutton(self.left_frame, text="🔬 Perfilar próxima execução",
+                                variable=self.perfilar_proxima).pack(pady=(0, 5), anchor="w")
+                # ignora o índice de vistos e o cache de álbuns (refaz tudo)
+                ttk.Checkbutton(self.left_frame, text="🔄 Forçar (refazer álbuns já vistos)",
+                                variable=self.forcar).pack(pady=(0, 5), anchor="w")
 
 #        ttk.Checkbutton(self.left_frame, text="🛠 Modo DEBUG", variable=self.debug_mode).pack(pady=20)
 
@@ -525,24 +706,19 @@ class SistemaBORA:
         self.paned_window.add(self.work_frame, weight=3)
         self.paned_window.add(self.log_frame, weight=1)
 
-        # Posição inicial do divisor na posição do config.json
-        # ===== SALVAR/CARREGAR POSIÇÃO DO DIVISOR =====
-        import json
-        
-        # Carrega posição salva do config.json
-        # Carrega posição salva do config.json
+        # Posição inicial do divisor (config.json via serviço compartilhado)
+        from system.config_service import get_config_service
+        config_service = get_config_service()
         try:
-            with open('system/config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-        except Exception:
-            config = {}
-        
-        initial_pos = int(config.get('paned_divider_position', 400))
+            initial_pos = int(config_service.get('paned_divider_position', 400))
+        except (TypeError, ValueError):
+            initial_pos = 400
         
         # CORRETO: usar sashpos com 2 argumentos
         self.root.after(100, lambda: self.paned_window.sashpos(0, initial_pos))
         
-        # Função para salvar posição quando soltar o mouse
+        # Salva a posição ao soltar o mouse: só altera a chave em memória e agenda
+        # uma gravação atômica (vários arrastos seguidos viram uma escrita só)
         def on_drag_end(event):
             try:
                 # ✅ USAR sashpos ao invés de sash_coord
@@ -556,9 +732,9 @@ class SistemaBORA:
                     except (ValueError, TypeError):
                         return
                 
-                config['paned_divider_position'] = y_pos
-                with open('system/config.json', 'w', encoding='utf-8') as f:
-                    json.dump(config, f, indent=2, ensure_ascii=False)
+                if config_service.get('paned_divider_position') == y_pos:
+                    return
+                config_service.set('paned_divider_position', y_pos)
                 self.logger.log(f"Posição do divisor salva: {y_pos}", "INFO", "💾")
                 
             except Exception as e:
@@ -597,6 +773,21 @@ class SistemaBORA:
         )
         self.work_status.pack(expand=True)
     
+    @property
+    def data_processor(self) -> Optional["DataProcessor"]:
+        """Criado no primeiro uso: importa scraper_engine/category_crawler (requests, bs4, lxml)"""
+        if self._data_processor is None and self.config_manager:
+            from system.data_processor_main import DataProcessor
+            self._data_processor = DataProcessor(self.logger, self.config_manager)
+        return self._data_processor
+    
+    @property
+    def csv_generator(self) -> Optional["CSVGenerator"]:
+        if self._csv_generator is None and self.config_manager:
+            from system.csv_generator import CSVGenerator
+            self._csv_generator = CSVGenerator(self.logger, self.config_manager)
+        return self._csv_generator
+    
     def _initialize_system(self):
         """Inicializa o sistema em thread separada"""
         def init_thread():
@@ -614,14 +805,17 @@ class SistemaBORA:
                 self.logger.log("❌ Falha ao carregar configurações", "ERROR", "❌")
                 return
             
+            # Métricas ao vivo (porta/textfile) só se "metricas.ativo" estiver ligado
+            from system import metrics
+            metrics.configurar(self.config_manager.config, self.logger)
+
             # Atualiza logger com config_manager e recarrega cores/fontes
             self.logger.config_manager = self.config_manager
             self.logger.update_config()  # ESTA É A LINHA CHAVE
             
-            # Inicializa módulos
+            # Inicializa módulos (DataProcessor/CSVGenerator só no primeiro uso)
+            from system.interface_manager import InterfaceManager
             self.interface_manager = InterfaceManager(self.root, self.logger)
-            self.data_processor = DataProcessor(self.logger, self.config_manager)
-            self.csv_generator = CSVGenerator(self.logger, self.config_manager)
             
             self.logger.log("✅ Sistema BORA pronto para uso!", "SUCCESS", "✅")
 
@@ -638,6 +832,7 @@ class SistemaBORA:
         """Ativa/desativa botões durante processamento"""
         for button in self.buttons.values():
             button.configure(state=state)
+        self.cancelar_btn.configure(state="normal" if state == "disabled" else "disabled")
     
     def _coletar_metadados(self):
         """Abre tela para coletar metadados"""
@@ -671,9 +866,13 @@ class SistemaBORA:
         
         def processar_thread():
             try:
-                resultado = self.data_processor.processar_metadados(urls)
+                resultado = self.data_processor.processar_metadados(urls, forcar=self.forcar.get())
                 
-                if "erro" in resultado:
+                if resultado.get("cancelado"):
+                    return
+                if resultado.get("pulados") and not resultado.get("ok"):
+                    self.logger.log(f"ℹ️ {resultado['erro']}", "INFO", "ℹ️")
+                elif "erro" in resultado:
                     self.logger.log(f"❌ {resultado['erro']}", "ERROR", "❌")
                 else:
                     self.logger.log("✅ Processamento concluído com sucesso!", "SUCCESS", "✅")
@@ -682,7 +881,7 @@ class SistemaBORA:
             finally:
                 self._set_buttons_state("normal")
         
-        threading.Thread(target=processar_thread, daemon=True).start()
+        threading.Thread(target=self._tarefa("metadados", processar_thread), daemon=True).start()
     
     def _gerar_csv(self):
         """Abre interface de seleção de arquivos de metadados"""
@@ -755,7 +954,7 @@ class SistemaBORA:
             finally:
                 self._set_buttons_state("normal")
         
-        threading.Thread(target=gerar_thread, daemon=True).start()
+        threading.Thread(target=self._tarefa("csv", gerar_thread), daemon=True).start()
 
     
     def _baixar_imagens(self):
@@ -799,10 +998,13 @@ class SistemaBORA:
                 # Chama função integrada do image_downloader
                 resultado = image_downloader.main_integrated(
                     system_logger=self.logger,
-                    selected_files=selected_files
+                    selected_files=selected_files,
+                    forcar=self.forcar.get()
                 )
                 
-                if resultado.get("success"):
+                if resultado.get("cancelled"):
+                    self.logger.log(f"⏹️ Download cancelado após {resultado.get('total_albums', 0)} álbum(ns)", "WARNING", "⏹️")
+                elif resultado.get("success"):
                     total_albums = resultado.get("total_albums", 0)
                     self.logger.log(f"✅ Download concluído com sucesso! {total_albums} álbuns processados", "SUCCESS", "✅")
                     self._clear_work_area()
@@ -819,7 +1021,7 @@ class SistemaBORA:
             finally:
                 self._set_buttons_state("normal")
         
-        threading.Thread(target=download_thread, daemon=True).start()    
+        threading.Thread(target=self._tarefa("imagens", download_thread), daemon=True).start()
     def _processar_categorias(self):
         self.logger.log("🔧 Função 'Processar Categorias' será implementada", "INFO", "🔧")
     
@@ -847,7 +1049,14 @@ class SistemaBORA:
         def run_pipeline():
             try:
                 self.logger.log("🧩 Coletando metadados…", "INFO", "🧩")
-                resultado = self.data_processor.processar_metadados(urls)
+                forcar = self.forcar.get()
+                resultado = self.data_processor.processar_metadados(urls, forcar=forcar)
+                from system import cancelamento
+                cancelamento.verificar()  # cancelado na coleta: não segue para CSV/imagens
+                if resultado.get("pulados") and not resultado.get("ok"):
+                    # sincronização sem novidades: nada a gerar nem baixar
+                    self.logger.log(f"ℹ️ {resultado['erro']}", "INFO", "ℹ️")
+                    return
     
                 from pathlib import Path
                 json_path = None
@@ -861,6 +1070,8 @@ class SistemaBORA:
                     return
     
                 self.logger.log(f"🗂️ Metadados: {json_path.name}", "INFO", "🗂️")
+                from system import profiling
+                profiling.marco("metadados")
     
                 produtos = self._load_products_from_json(json_path)
                 if not produtos:
@@ -868,18 +1079,24 @@ class SistemaBORA:
                     return
     
                 self.logger.log(f"📊 Gerando CSV para {len(produtos)} produtos…", "INFO", "📊")
-                if not self.csv_generator.gerar_csv_ecommerce(produtos):
+                # álbuns pulados não entram no lote: sem linhas de remoção para eles
+                if not self.csv_generator.gerar_csv_ecommerce(
+                        produtos, catalogo_completo=False if resultado.get("pulados") else None):
                     self.logger.log("❌ Falha na geração do CSV", "ERROR", "❌")
                     return
                 self.logger.log("✅ CSV gerado com sucesso", "SUCCESS", "✅")
+                profiling.marco("csv")
     
                 import sys
                 sys.path.append(str(Path("system")))
                 import image_downloader
                 image_downloader.set_system_logger(self.logger)
                 self.logger.log("🖼️ Baixando imagens (modo autônomo)…", "INFO", "🖼️")
-                res = image_downloader.main_integrated(system_logger=self.logger, selected_files=[json_path])
-                if res.get("success"):
+                res = image_downloader.main_integrated(system_logger=self.logger, selected_files=[json_path],
+                                                       forcar=forcar)
+                if res.get("cancelled"):
+                    self.logger.log("⏹️ Download de imagens cancelado", "WARNING", "⏹️")
+                elif res.get("success"):
                     self.logger.log("✅ Download de imagens concluído", "SUCCESS", "✅")
                     self._clear_work_area()
                 else:
@@ -888,7 +1105,7 @@ class SistemaBORA:
                 self._set_buttons_state("normal")
     
         import threading
-        threading.Thread(target=run_pipeline, daemon=True).start()
+        threading.Thread(target=self._tarefa("produtos", run_pipeline), daemon=True).start()
     
     def _find_latest_metadata_file(self):
         """Retorna o JSON mais recente em ./Metadados/."""
@@ -958,6 +1175,36 @@ class SistemaBORA:
         except Exception as e:
             self.logger.log(f"Erro ao abrir configurações: {str(e)}", "ERROR", "❌")
     
+    def _tarefa(self, nome: str, alvo):
+        """Alvo de thread com token de cancelamento próprio (botão ⏹️ CANCELAR) dentro de uma
+        sessão de perfil (config "profiling" ou caixa "Perfilar próxima execução")"""
+        from system import cancelamento
+        forcar = self.perfilar_proxima.get()
+        if forcar:
+            self.perfilar_proxima.set(False)
+        config = self.config_manager.config if self.config_manager else {}
+        token = cancelamento.TokenCancelamento(nome)
+        self.cancelamento = token
+
+        def rodar():
+            from system import profiling
+            try:
+                with cancelamento.escopo(token), \
+                        profiling.sessao(nome, config, forcar=forcar, memoria=True if forcar else None,
+                                         logger=self.logger):
+                    alvo()
+            except cancelamento.Cancelado as c:
+                self.logger.log(f"⏹️ Tarefa '{nome}' interrompida: {c}", "WARNING", "⏹️")
+        return rodar
+
+    def _cancelar_tarefa(self):
+        """Cancela a tarefa em andamento; esperas, downloads e o navegador param em ~1 s"""
+        token = self.cancelamento
+        if token is None or token.cancelado:
+            return
+        token.cancelar("cancelado pelo usuário")
+        self.logger.log("⏹️ Cancelamento solicitado, aguardando as etapas pararem...", "WARNING", "⏹️")
+
     def _gerar_log(self):
         """Gera arquivo de log"""
         if not self.logger.log_history:
@@ -984,6 +1231,11 @@ class SistemaBORA:
         result = messagebox.askyesno("Sair", "Deseja realmente sair do Sistema BORA?")
         if result:
             self.logger.log("👋 Encerrando Sistema BORA...", "INFO", "👋")
+            from system.config_service import get_config_service
+            try:
+                get_config_service().flush()  # grava alterações ainda no debounce
+            except OSError as e:
+                self.logger.log(f"Erro ao salvar config: {str(e)}", "ERROR", "❌")
             self.root.after(1000, self.root.destroy)
     
     def run(self):
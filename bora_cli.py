@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema BORA - Execução em linha de comando (sem interface gráfica)
+Pipeline: expandir categorias → metadados → CSV → imagens
+
+Para sincronizações agendadas/servidor sem display: não importa tkinter nem streamlit.
+Eventos de progresso saem em stdout, um JSON por linha:
+    {"evento": "etapa", "etapa": "metadados", "status": "inicio", ...}
+    {"evento": "log", "nivel": "INFO", "mensagem": "...", ...}
+    {"evento": "resumo", "ok": true, ...}
+    {"evento": "desempenho", "arquivo": "Logs/desempenho-pipeline-<ts>.json", "etapas": [...]}
+    {"evento": "perfil", "arquivos": ["Logs/perfil-pipeline-<ts>.txt", ...]}   (--perfil ou profiling.ativo)
+
+Códigos de saída:
+    0  tudo certo
+    1  concluído com falhas parciais (URLs sem metadados, álbuns com erro)
+    2  entrada inválida (nenhuma URL / arquivo inexistente)
+    3  etapa falhou (nenhum metadado, CSV não gerado)
+    130 interrompido (Ctrl+C: o 1º cancela as etapas em ~1 s e grava os relatórios; o 2º sai na hora)
+
+Exemplos:
+    python bora_cli.py https://x.x.yupoo.com/albums/123 -f urls.txt --workers 4
+    python bora_cli.py --metadados Metadados/metadados-20250101-120000.json --sem-imagens
+    python bora_cli.py -f urls.txt --dry-run
+    python bora_cli.py -f urls.txt --metricas-arquivo /var/lib/node_exporter/bora.prom
+    python bora_cli.py -f urls.txt --forcar      # refaz álbuns já coletados/baixados em execuções anteriores
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+EXIT_OK = 0
+EXIT_PARCIAL = 1
+EXIT_ENTRADA = 2
+EXIT_ETAPA = 3
+EXIT_INTERROMPIDO = 130
+
+NIVEIS = ("DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR")
+
+
+class JsonEventLogger:
+    """Logger compatível com BoraLogger.log(msg, level, emoji) que emite eventos JSON em stdout."""
+
+    def __init__(self, nivel_minimo: str = "INFO", stream=None):
+        self.stream = stream or sys.stdout
+        self.minimo = NIVEIS.index(nivel_minimo) if nivel_minimo in NIVEIS else 1
+
+    def emit(self, evento: str, **dados) -> None:
+        linha = {"evento": evento, "ts": datetime.now().isoformat(timespec="seconds"), **dados}
+        self.stream.write(json.dumps(linha, ensure_ascii=False, default=str) + "\n")
+        self.stream.flush()
+
+    def log(self, message: str, level: str = "INFO", emoji: str = "") -> None:
+        if level in NIVEIS and NIVEIS.index(level) < self.minimo:
+            return
+        self.emit("log", nivel=level, mensagem=str(message))
+
+    # alguns módulos (metadata_generator) usam a interface do logging
+    def info(self, message: str) -> None:
+        self.log(message, "INFO")
+
+
+class CLIConfig:
+    """Leitura de system/config.json com get('a.b.c') como o ConfigManager do bora.py."""
+
+    def __init__(self, path: Path = Path("system") / "config.json", overrides: Optional[Dict[str, Any]] = None):
+        from system.config_service import ConfigService, get_config_service
+        servico = get_config_service()
+        if Path(path).resolve() != servico.path.resolve():
+            servico = ConfigService(path)
+        # cópia: as sobreposições da linha de comando nunca chegam ao arquivo
+        self.config = copy.deepcopy(servico.dados())
+        for chave, valor in (overrides or {}).items():
+            alvo = self.config
+            partes = chave.split(".")
+            for k in partes[:-1]:
+                alvo = alvo.setdefault(k, {})
+            alvo[partes[-1]] = valor
+
+    def get(self, key: str, default=None):
+        value = self.config
+        for k in key.split("."):
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                return default
+        return value
+
+
+def _ler_urls(args) -> List[str]:
+    urls = list(args.urls or [])
+    for arq in args.arquivo or []:
+        for linha in Path(arq).read_text(encoding="utf-8").splitlines():
+            linha = linha.strip()
+            if linha and not linha.startswith("#"):
+                urls.append(linha)
+    from system.classificador_url import chave_url
+    vistos, unicas = set(), []
+    for u in urls:
+        chave = chave_url(u)  # ?uid=1, http/https e barra final não repetem o álbum
+        if chave not in vistos:
+            vistos.add(chave)
+            unicas.append(u)
+    return unicas
+
+
+def _ler_produtos(path: Path) -> List[Dict[str, Any]]:
+    from system.metadata_index import extrair_itens
+    return extrair_itens(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _dry_run(ev: JsonEventLogger, processor, urls: List[str], metadados: List[Path]) -> int:
+    """Só contagens: nenhuma requisição de rede e nenhum arquivo gravado."""
+    categorias = [u for u in urls if processor._is_category_url(u)]
+    resumo: Dict[str, Any] = {
+        "urls": len(urls),
+        "categorias": len(categorias),
+        "produtos_diretos": len(urls) - len(categorias),
+    }
+    from system.csv_generator import CSVGenerator
+    gen = CSVGenerator()
+    produtos = linhas_csv = imagens = 0
+    for p in metadados:
+        for item in _ler_produtos(p):
+            produtos += 1
+            linhas_csv += max(1, len(gen._sizes_from_json(item)))
+            imagens += len(item.get("image_urls") or [])
+    if metadados:
+        resumo.update({"arquivos_metadados": len(metadados), "produtos": produtos,
+                       "linhas_csv_estimadas": linhas_csv, "imagens": imagens})
+    ev.emit("resumo", ok=True, dry_run=True, **resumo)
+    return EXIT_OK
+
+
+def _etapa(ev: JsonEventLogger, nome: str, status: str, **dados) -> None:
+    ev.emit("etapa", etapa=nome, status=status, **dados)
+
+
+def _ctrl_c(token):
+    """1º Ctrl+C cancela o token do pipeline; o 2º levanta KeyboardInterrupt. Devolve o tratador anterior."""
+    import signal
+
+    def tratar(signum, frame):
+        if token.cancelado:
+            raise KeyboardInterrupt
+        token.cancelar("interrompido (Ctrl+C)")  # sem emit aqui: escrita reentrante em stdout
+
+    try:
+        return signal.signal(signal.SIGINT, tratar)
+    except ValueError:  # run() fora da thread principal
+        return None
+
+
+def run(args) -> int:
+    ev = JsonEventLogger("DEBUG" if args.verbose else ("WARNING" if args.quiet else "INFO"))
+
+    overrides: Dict[str, Any] = {}
+    if args.csv_processos is not None:
+        overrides["csv.processos"] = args.csv_processos
+    if args.metricas_porta or args.metricas_arquivo:
+        overrides["metricas.ativo"] = True
+        if args.metricas_porta:
+            overrides["metricas.porta"] = args.metricas_porta
+        if args.metricas_arquivo:
+            overrides["metricas.arquivo"] = args.metricas_arquivo
+    config = CLIConfig(Path(args.config), overrides)
+
+    from system.data_processor_main import DataProcessor
+    processor = DataProcessor(ev, config)
+
+    try:
+        urls = _ler_urls(args)
+    except OSError as e:
+        ev.emit("erro", mensagem=f"Arquivo de URLs ilegível: {e}")
+        return EXIT_ENTRADA
+    metadados = [Path(p) for p in args.metadados or []]
+    faltando = [str(p) for p in metadados if not p.exists()]
+    if faltando:
+        ev.emit("erro", mensagem=f"Arquivo de metadados não encontrado: {', '.join(faltando)}")
+        return EXIT_ENTRADA
+    if not urls and not metadados:
+        ev.emit("erro", mensagem="Nenhuma URL ou arquivo de metadados informado")
+        return EXIT_ENTRADA
+
+    if args.dry_run:
+        return _dry_run(ev, processor, urls, metadados)
+
+    from system import cancelamento, metrics, profiling, tracing
+    metrics.configurar(config.config, ev)
+    gravar = bool(config.get("desempenho.relatorio", True))
+    token = cancelamento.TokenCancelamento("pipeline")
+    anterior = _ctrl_c(token)
+    try:
+        with cancelamento.escopo(token), \
+                profiling.sessao("pipeline", config.config, forcar=args.perfil or args.perfil_memoria,
+                                 memoria=True if args.perfil_memoria else None, logger=ev) as perfil, \
+                tracing.execucao("pipeline", gravar=gravar, urls=len(urls)) as run:
+            try:
+                codigo = _pipeline(ev, args, config, processor, urls, metadados)
+            except cancelamento.Cancelado as c:
+                ev.emit("resumo", ok=False, interrompido=True, motivo=str(c))
+                codigo = EXIT_INTERROMPIDO
+    finally:
+        if anterior is not None:
+            import signal
+            signal.signal(signal.SIGINT, anterior)
+        metrics.encerrar()  # textfile recebe o retrato final
+    if perfil.arquivos:
+        ev.emit("perfil", arquivos=[str(p) for p in perfil.arquivos])
+    if run.arquivo:
+        ev.emit("desempenho", arquivo=str(run.arquivo), etapas=run.resumo(5))
+    return codigo
+
+
+def _pipeline(ev: JsonEventLogger, args, config: CLIConfig, processor, urls: List[str],
+              metadados: List[Path]) -> int:
+    from system import cancelamento, profiling
+    inicio = time.time()
+    resumo: Dict[str, Any] = {"urls": len(urls)}
+    parcial = False
+
+    # 1-2) expandir + metadados
+    if urls:
+        _etapa(ev, "metadados", "inicio", urls=len(urls), workers=args.workers)
+        res = processor.processar_metadados(urls, workers=args.workers, forcar=args.forcar)
+        cancelamento.verificar()
+        resumo["pulados"] = res.get("pulados", 0)
+        if not res.get("ok") and res.get("pulados") and not metadados:
+            # sincronização sem novidades: nada a gerar nem baixar
+            _etapa(ev, "metadados", "fim", total_urls=0, pulados=res["pulados"])
+            ev.emit("resumo", ok=True, segundos=round(time.time() - inicio, 2), **resumo)
+            return EXIT_OK
+        if not res.get("ok") and not res.get("pulados"):
+            _etapa(ev, "metadados", "falha", erro=res.get("erro"))
+            ev.emit("resumo", ok=False, segundos=round(time.time() - inicio, 2), **resumo)
+            return EXIT_ETAPA
+        if res.get("ok"):
+            metadados.append(Path(res["arquivo"]))
+            parcial = parcial or bool(res.get("falhas"))
+            resumo.update({"urls_expandidas": res.get("total_urls"), "sucessos": res.get("sucessos"),
+                           "falhas": res.get("falhas"), "metadados": res.get("arquivo")})
+        _etapa(ev, "metadados", "fim",
+               **{k: res.get(k) for k in ("arquivo", "total_urls", "sucessos", "falhas", "pulados")})
+        profiling.marco("metadados")
+
+    # 3) CSV
+    if not args.sem_csv:
+        from system.csv_generator import CSVGenerator
+        gen = CSVGenerator(ev, config)
+        produtos = (p for m in metadados for p in _ler_produtos(m))
+        _etapa(ev, "csv", "inicio", arquivos=[str(m) for m in metadados])
+        # álbuns pulados não entram no lote: sem linhas de remoção para eles
+        if not gen.gerar_csv_ecommerce(produtos, catalogo_completo=False if resumo.get("pulados") else None):
+            _etapa(ev, "csv", "falha")
+            ev.emit("resumo", ok=False, segundos=round(time.time() - inicio, 2), **resumo)
+            return EXIT_ETAPA
+        resumo["csv"] = gen.ultimos_arquivos
+        _etapa(ev, "csv", "fim", arquivos=gen.ultimos_arquivos)
+        profiling.marco("csv")
+
+    # 4) imagens
+    if not args.sem_imagens:
+        from system import image_downloader
+        albuns = {"ok": 0, "falha": 0}
+
+        def on_album(url: str, sucesso: bool) -> None:
+            albuns["ok" if sucesso else "falha"] += 1
+            ev.emit("album", url=url, ok=sucesso, concluidos=albuns["ok"] + albuns["falha"])
+
+        _etapa(ev, "imagens", "inicio", arquivos=[str(m) for m in metadados])
+        res = image_downloader.main_integrated(system_logger=ev, selected_files=metadados,
+                                               out_root=Path(args.saida_imagens) if args.saida_imagens else None,
+                                               on_album=on_album, forcar=args.forcar)
+        cancelamento.verificar()
+        parcial = parcial or not res.get("success")
+        resumo.update({"albuns_ok": albuns["ok"], "albuns_falha": albuns["falha"],
+                       "albuns_pulados": res.get("skipped", 0)})
+        _etapa(ev, "imagens", "fim", **res)
+
+    ev.emit("resumo", ok=not parcial, segundos=round(time.time() - inicio, 2), **resumo)
+    return EXIT_PARCIAL if parcial else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(
+        prog="bora_cli",
+        description="Sistema BORA sem interface: expandir → metadados → CSV → imagens (eventos JSON em stdout)",
+    )
+    ap.add_argument("urls", nargs="*", help="URLs de produtos ou categorias")
+    ap.add_argument("-f", "--arquivo", action="append", help="arquivo com uma URL por linha (# comenta); repetível")
+    ap.add_argument("-m", "--metadados", action="append",
+                    help="JSON de metadados já coletado (pula a coleta para ele); repetível")
+    ap.add_argument("--workers", type=int, default=1, help="URLs coletadas em paralelo (padrão 1)")
+    ap.add_argument("--csv-processos", type=int, default=None,
+                    help="processos para montar o CSV (sobrepõe csv.processos; 0 = todos os núcleos)")
+    ap.add_argument("--sem-csv", action="store_true", help="não gerar CSV")
+    ap.add_argument("--sem-imagens", action="store_true", help="não baixar imagens")
+    ap.add_argument("--saida-imagens", help="pasta das imagens (padrão ./imagens)")
+    ap.add_argument("--forcar", action="store_true",
+                    help="refaz álbuns que o índice de vistos já registrou (metadados e imagens) "
+                         "e recoleta as páginas sem o cache de álbuns")
+    ap.add_argument("--metricas-porta", type=int, help="expõe métricas Prometheus em 127.0.0.1:<porta>/metrics")
+    ap.add_argument("--metricas-arquivo", help="reescreve as métricas Prometheus neste textfile periodicamente")
+    ap.add_argument("--perfil", action="store_true", help="perfil de CPU da execução (Logs/perfil-pipeline-*.txt)")
+    ap.add_argument("--perfil-memoria", action="store_true",
+                    help="como --perfil, com retratos tracemalloc ao fim de cada etapa")
+    ap.add_argument("--config", default=str(Path("system") / "config.json"), help="arquivo de configuração")
+    ap.add_argument("--dry-run", action="store_true", help="só conta URLs/produtos/imagens; sem rede e sem gravar")
+    ap.add_argument("-v", "--verbose", action="store_true", help="inclui logs DEBUG")
+    ap.add_argument("-q", "--quiet", action="store_true", help="só avisos, erros e eventos de etapa")
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except KeyboardInterrupt:
+        JsonEventLogger().emit("resumo", ok=False, interrompido=True)
+        return EXIT_INTERROMPIDO
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+agendador.py — Crawl de várias lojas ao mesmo tempo, com cortesia por domínio e estado retomável
+- Recebe as URLs de categoria (sementes) de todas as lojas; cada tarefa é UMA página de uma semente
+- Rodízio entre lojas (host): a loja que acabou de ter uma página lida vai para o fim da fila,
+  então uma loja enorme não segura as outras
+- Cortesia por domínio (yupoo.com cobre todas as subdomínios-loja): máximo de páginas simultâneas,
+  intervalo mínimo entre páginas e orçamento de páginas por execução (config "agendador");
+  o ritmo por host continua no rate_limiter
+- Estado em cache/agendador.sqlite3: próxima página de cada semente e produtos descobertos ainda
+  não processados; uma execução interrompida (cancelamento, erro, orçamento) continua de onde parou
+  e finalizar() limpa o estado quando tudo terminou; produtos cuja extração falhou ficam marcados
+  e voltam na próxima execução
+
+Uso:
+    ag = Agendador.do_config(CategoryCrawler(logger), logger, config)
+    ag.executar(categorias, emitir)   # emitir(url_produto, pagina) -> bool (ex.: Fronteira.put)
+    ag.processado(url_produto, ok)    # depois de extrair os metadados (ok=False: volta na próxima)
+    ag.finalizar(); ag.fechar()
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from . import cancelamento, tracing
+
+DEFAULTS = {
+    "lojas_simultaneas": 4,     # páginas de categoria em paralelo, somando todas as lojas
+    "dominio_padrao": {"simultaneas": 2, "intervalo_s": 0.0, "max_paginas": 0},  # 0 = sem orçamento
+    "dominios": {"yupoo.com": {"simultaneas": 3}},
+    "retomar": True,
+    "estado": "cache/agendador.sqlite3",
+}
+_ESPERA_S = 0.25
+_PENDENTE, _FEITO, _FALHOU = 0, 1, 2  # descobertos.feito
+_SUFIXOS_2 = {"com", "net", "org", "gov", "edu", "co"}  # com.br, co.uk...
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sementes (
+    url       TEXT PRIMARY KEY,
+    proxima   TEXT,
+    paginas   INTEGER NOT NULL DEFAULT 0,
+    produtos  INTEGER NOT NULL DEFAULT 0,
+    status    TEXT NOT NULL,
+    atualizado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS descobertos (
+    url     TEXT PRIMARY KEY,
+    semente TEXT NOT NULL,
+    pagina  INTEGER NOT NULL,
+    feito   INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_descobertos_semente ON descobertos(semente, feito);
+"""
+
+
+def dominio_de(host: str) -> str:
+    """Domínio registrável aproximado: loja.x.yupoo.com → yupoo.com, loja.com.br → loja.com.br."""
+    host = host.split(":")[0].lower()
+    partes = host.split(".")
+    if len(partes) <= 2 or host.replace(".", "").isdigit():
+        return host
+    if partes[-2] in _SUFIXOS_2 and len(partes[-1]) == 2:
+        return ".".join(partes[-3:])
+    return ".".join(partes[-2:])
+
+
+@dataclass
+class _Semente:
+    url: str
+    loja: str
+    dominio: str
+    proxima: Optional[str]
+    paginas: int = 0
+    produtos: int = 0
+    recusados: int = 0  # links que a fronteira/índice de vistos não aceitou nesta execução
+    vistas: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class _Dominio:
+    simultaneas: int
+    intervalo_s: float
+    max_paginas: int
+    ativas: int = 0
+    paginas: int = 0
+    proximo_horario: float = 0.0
+
+
+class Agendador:
+    def __init__(self, crawler, logger, config: Optional[Dict] = None):
+        cfg = dict(DEFAULTS)
+        cfg.update(config or {})
+        self.crawler = crawler
+        self.logger = logger
+        self.simultaneas = max(1, int(cfg["lojas_simultaneas"]))
+        self.retomar = bool(cfg["retomar"])
+        self._padrao = {**DEFAULTS["dominio_padrao"], **(cfg.get("dominio_padrao") or {})}
+        self._dominios_cfg = {k.lower(): v for k, v in (cfg.get("dominios") or {}).items()}
+        self.path = Path(cfg["estado"])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._lojas: "OrderedDict[str, Deque[_Semente]]" = OrderedDict()
+        self._dominios: Dict[str, _Dominio] = {}
+        self._em_andamento = 0
+        self._parado = False
+        self._sementes: List[str] = []
+        self.stats = {"lojas": 0, "paginas": 0, "produtos": 0, "retomados": 0, "adiadas": 0, "erros": 0}
+
+    @classmethod
+    def do_config(cls, crawler, logger, config) -> "Agendador":
+        """Limites de config "agendador" (ConfigManager/CLIConfig com get() ou dict)."""
+        return cls(crawler, logger, (config.get("agendador") if config is not None else None) or {})
+
+    # ------------------------------ Estado ------------------------------
+    def _gravar(self, sql: str, params=()) -> None:
+        with self._db_lock, self._db:
+            self._db.execute(sql, params)
+
+    def _salvar(self, sem: _Semente, status: str) -> None:
+        self._gravar("INSERT OR REPLACE INTO sementes(url, proxima, paginas, produtos, status, atualizado) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", (sem.url, sem.proxima, sem.paginas, sem.produtos, status, time.time()))
+
+    def _carregar(self, url: str) -> Optional[_Semente]:
+        """Semente pronta para a fila (retomada se houver estado), ou None se já concluída."""
+        host = urlparse(url).netloc.lower()
+        sem = _Semente(url, host, dominio_de(host), url)
+        with self._db_lock:
+            linha = self._db.execute("SELECT proxima, paginas, produtos, status FROM sementes WHERE url=?",
+                                     (url,)).fetchone()
+        if linha and self.retomar:
+            sem.proxima, sem.paginas, sem.produtos, status = linha
+            if status == "concluida" or not sem.proxima:
+                self.logger.log(f"⏭️ Categoria já percorrida numa execução interrompida: {url}", "INFO", "⏭️")
+                return None
+            self.logger.log(f"↪️ Retomando {url} na página {sem.paginas + 1}", "INFO", "↪️")
+            return sem
+        with self._db_lock, self._db:  # falhas anteriores continuam até darem certo
+            self._db.execute("DELETE FROM descobertos WHERE semente=? AND feito<>?", (url, _FALHOU))
+        self._salvar(sem, "pendente")
+        return sem
+
+    def processado(self, url: str, ok: bool = True) -> None:
+        """O produto saiu da fila: extraído não volta numa retomada; com falha volta na próxima execução."""
+        self._gravar("UPDATE descobertos SET feito=? WHERE url=?", (_FEITO if ok else _FALHOU, url))
+
+    def finalizar(self) -> None:
+        """Execução completa: esquece as sementes concluídas (a próxima sincronização recomeça).
+        Descobertos não aceitos (repetidos, já vistos em outra execução) não precisam de retomada;
+        os que falharam ficam para a próxima."""
+        with self._db_lock, self._db:
+            for url in self._sementes:
+                self._db.execute("DELETE FROM descobertos WHERE semente=? AND feito<>?", (url, _FALHOU))
+                self._db.execute("DELETE FROM sementes WHERE url=? AND status='concluida'", (url,))
+
+    def parar(self) -> None:
+        """Não inicia novas páginas (as sementes mantêm o estado salvo para a retomada)."""
+        with self._cond:
+            self._parado = True
+            self._cond.notify_all()
+
+    def fechar(self) -> None:
+        with self._db_lock:
+            self._db.close()
+
+    # ------------------------------ Fila --------------------------------
+    def _dominio(self, nome: str) -> _Dominio:
+        dom = self._dominios.get(nome)
+        if dom is None:
+            lim = dict(self._padrao)
+            for chave, val in self._dominios_cfg.items():
+                if nome == chave or nome.endswith("." + chave):
+                    lim.update(val or {})
+                    break
+            dom = _Dominio(max(1, int(lim["simultaneas"])), float(lim["intervalo_s"]), int(lim["max_paginas"]))
+            self._dominios[nome] = dom
+        return dom
+
+    def _enfileirar(self, sem: _Semente) -> None:
+        self._lojas.setdefault(sem.loja, deque()).append(sem)
+        self._dominio(sem.dominio)
+
+    def _proxima(self) -> Optional[_Semente]:
+        """Próxima página a ler: primeira loja (em rodízio) cujo domínio tem vaga, intervalo e orçamento."""
+        with self._cond:
+            while True:
+                cancelamento.verificar()
+                if self._parado:
+                    return None
+                agora = time.monotonic()
+                espera = _ESPERA_S
+                for loja in list(self._lojas):
+                    fila = self._lojas[loja]
+                    dom = self._dominios[fila[0].dominio]
+                    if dom.max_paginas and dom.paginas >= dom.max_paginas:
+                        for sem in fila:  # orçamento do domínio esgotado: fica para a próxima execução
+                            self._salvar(sem, "pendente")
+                            self.stats["adiadas"] += 1
+                        del self._lojas[loja]
+                        continue
+                    if dom.ativas >= dom.simultaneas:
+                        continue
+                    if dom.proximo_horario > agora:
+                        espera = min(espera, dom.proximo_horario - agora)
+                        continue
+                    sem = fila.popleft()
+                    if fila:
+                        self._lojas.move_to_end(loja)  # rodízio entre lojas
+                    else:
+                        del self._lojas[loja]
+                    dom.ativas += 1
+                    dom.paginas += 1
+                    dom.proximo_horario = agora + dom.intervalo_s
+                    self._em_andamento += 1
+                    return sem
+                if not self._lojas and not self._em_andamento:
+                    return None
+                self._cond.wait(espera)
+
+    def _ler(self, sess, sem: _Semente, emitir: Callable[[str, int], bool]) -> Optional[str]:
+        """Lê uma página da semente; devolve o status se a semente saiu da fila."""
+        achados: List[str] = []
+        pagina = sem.paginas + 1
+        try:
+            with tracing.span("categoria", url=sem.url, loja=sem.loja, pagina=pagina):
+                prox = self.crawler.ler_pagina(sess, sem.url, sem.proxima, pagina, lambda h, p: achados.append(h))
+        except Exception as e:
+            self.logger.log(f"❌ Erro na página {pagina} de {sem.url}: {e}", "ERROR", "❌")
+            self.stats["erros"] += 1
+            self._salvar(sem, "erro")  # a retomada tenta a mesma página
+            return "erro"
+        sem.vistas.add(sem.proxima)
+        sem.paginas = pagina
+        fim = not prox or prox in sem.vistas or pagina >= self.crawler.max_paginas(sem.url)
+        sem.proxima = None if fim else prox
+        # descobertos antes de emitir: se o processo cair, a retomada os reenvia
+        with self._db_lock, self._db:
+            self._db.executemany("INSERT OR IGNORE INTO descobertos(url, semente, pagina) VALUES (?, ?, ?)",
+                                 ((h, sem.url, pagina) for h in achados))
+        unicos = list(dict.fromkeys(achados))
+        novos = sum(1 for h in unicos if emitir(h, pagina))
+        sem.produtos += novos
+        sem.recusados += len(unicos) - novos
+        self.stats["paginas"] += 1
+        self.stats["produtos"] += novos
+        self._salvar(sem, "concluida" if fim else "pendente")
+        if fim:
+            nivel, emoji = ("SUCCESS", "✅") if sem.produtos or sem.recusados else ("WARNING", "⚠️")
+            repetidos = f" (+{sem.recusados} já vistos)" if sem.recusados else ""
+            self.logger.log(f"{emoji} {sem.url}: {sem.produtos} produtos{repetidos} em {sem.paginas} página(s)",
+                            nivel, emoji)
+            return "concluida"
+        return None
+
+    def _trabalhar(self, emitir: Callable[[str, int], bool]) -> None:
+        sess = self.crawler._session()
+        while True:
+            sem = self._proxima()
+            if sem is None:
+                return
+            fim = True
+            try:
+                fim = self._ler(sess, sem, emitir) is not None
+            finally:
+                with self._cond:
+                    self._dominios[sem.dominio].ativas -= 1
+                    self._em_andamento -= 1
+                    if not fim:
+                        self._enfileirar(sem)
+                    self._cond.notify_all()
+
+    # ------------------------------ API ---------------------------------
+    def executar(self, urls: List[str], emitir: Callable[[str, int], bool]) -> Dict[str, int]:
+        """Percorre as categorias de todas as lojas; emitir(url, pagina) recebe cada produto novo."""
+        self._sementes = list(dict.fromkeys(urls))
+        for url in self._sementes:
+            cancelamento.verificar()
+            with self._db_lock:
+                pendentes = self._db.execute("SELECT url, pagina FROM descobertos WHERE semente=? AND feito IN (?, ?) "
+                                             "ORDER BY pagina", (url, _PENDENTE, _FALHOU)).fetchall() \
+                    if self.retomar else []
+            sem = self._carregar(url)
+            # produtos descobertos e não extraídos (ou que falharam) na execução anterior voltam primeiro
+            self.stats["retomados"] += sum(1 for u, p in pendentes if emitir(u, p))
+            if sem is not None:
+                self._enfileirar(sem)
+        self.stats["lojas"] = len(self._lojas)
+        if self._lojas:
+            self.logger.log(f"🗓️ Agendando {len(self._sementes)} categoria(s) de {len(self._lojas)} loja(s) "
+                            f"em {len(self._dominios)} domínio(s)", "INFO", "🗓️")
+            trabalhar = tracing.propagar(self._trabalhar)
+            with ThreadPoolExecutor(max_workers=self.simultaneas, thread_name_prefix="bora-crawl") as pool:
+                for f in [pool.submit(trabalhar, emitir) for _ in range(self.simultaneas)]:
+                    f.result()
+        return dict(self.stats)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+album_cache.py — Cache TTL+LRU de álbuns (URL → título, nome de pasta, imagens)
+- Memória: LRU limitado (OrderedDict) na frente
+- Disco: SQLite em cache/albuns.sqlite3 (sobrevive a reinícios; seguro entre threads/processos)
+- Entradas expiram após `ttl_horas` (config "album_cache"; curto: título e imagens de um álbum mudam)
+- Chave: classificador_url.chave_url — ?uid=1, http/https e rastreio caem na mesma entrada
+- Compartilhado por app.py (extrair_album_name) e scraper_engine.get_metadata (refresh=True ignora)
+
+Campos usuais de uma entrada:
+    title        título bruto da página
+    folder_name  nome de pasta já sanitizado (app.py)
+    images       lista de URLs de imagem
+    metadata     dict completo retornado por get_metadata
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULTS = {"ttl_horas": 6.0, "max_itens": 5000, "max_memoria": 1000}
+
+
+def _chave(url: str) -> str:
+    from system.classificador_url import chave_url
+    return chave_url(url)
+
+
+def _load_config() -> Dict:
+    from system.config_service import get_config_service
+    return get_config_service().dados()
+
+
+class AlbumCache:
+    def __init__(self, path: Path = Path("cache") / "albuns.sqlite3", ttl_horas: float = DEFAULTS["ttl_horas"],
+                 max_itens: int = DEFAULTS["max_itens"], max_memoria: int = DEFAULTS["max_memoria"]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = float(ttl_horas) * 3600
+        self.max_itens = int(max_itens)
+        self.max_memoria = int(max_memoria)
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()  # url -> (gravado_em, dados)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS albuns ("
+                " url TEXT PRIMARY KEY, data TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    # ------------------------------ Memória -----------------------------
+    def _remember(self, url: str, stored_at: float, data: Dict) -> None:
+        self._mem[url] = (stored_at, data)
+        self._mem.move_to_end(url)
+        while len(self._mem) > self.max_memoria:
+            self._mem.popitem(last=False)
+
+    def _fresh(self, stored_at: float) -> bool:
+        return (time.time() - stored_at) < self.ttl
+
+    # ------------------------------ API ---------------------------------
+    def get(self, url: str) -> Optional[Dict]:
+        if not url:
+            return None
+        url = _chave(url)
+        with self._lock:
+            hit = self._mem.get(url)
+            if hit and self._fresh(hit[0]):
+                self._mem.move_to_end(url)
+                return dict(hit[1])
+            self._mem.pop(url, None)
+        try:
+            with self._connect() as con:
+                row = con.execute("SELECT data, stored_at FROM albuns WHERE url=?", (url,)).fetchone()
+                if not row:
+                    return None
+                if not self._fresh(row[1]):
+                    con.execute("DELETE FROM albuns WHERE url=?", (url,))
+                    return None
+                con.execute("UPDATE albuns SET used_at=? WHERE url=?", (time.time(), url))
+        except sqlite3.Error:
+            return None
+        data = json.loads(row[0])
+        with self._lock:
+            self._remember(url, row[1], data)
+        return dict(data)
+
+    def update(self, url: str, **fields) -> Dict:
+        """Mescla campos na entrada da URL (cria se não existir) e renova o TTL."""
+        data = self.get(url) or {}
+        url = _chave(url)
+        data.update({k: v for k, v in fields.items() if v is not None})
+        now = time.time()
+        with self._lock:
+            self._remember(url, now, data)
+            self._writes += 1
+            prune = self._writes % 100 == 0
+        try:
+            with self._connect() as con:
+                con.execute(
+                    "INSERT OR REPLACE INTO albuns (url, data, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                    (url, json.dumps(data, ensure_ascii=False), now, now),
+                )
+                if prune:
+                    self._prune(con)
+        except sqlite3.Error:
+            pass
+        return dict(data)
+
+    def _prune(self, con: sqlite3.Connection) -> None:
+        con.execute("DELETE FROM albuns WHERE stored_at < ?", (time.time() - self.ttl,))
+        # LRU em disco: mantém só os max_itens usados mais recentemente
+        con.execute(
+            "DELETE FROM albuns WHERE url NOT IN (SELECT url FROM albuns ORDER BY used_at DESC LIMIT ?)",
+            (self.max_itens,),
+        )
+
+    def invalidate(self, url: str) -> None:
+        url = _chave(url)
+        with self._lock:
+            self._mem.pop(url, None)
+        with self._connect() as con:
+            con.execute("DELETE FROM albuns WHERE url=?", (url,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        with self._connect() as con:
+            con.execute("DELETE FROM albuns")
+
+
+_SHARED: Optional[AlbumCache] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_album_cache() -> AlbumCache:
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            cfg = {**DEFAULTS, **(_load_config().get("album_cache") or {})}
+            _SHARED = AlbumCache(ttl_horas=cfg["ttl_horas"], max_itens=cfg["max_itens"],
+                                 max_memoria=cfg["max_memoria"])
+        return _SHARED
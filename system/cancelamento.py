@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+cancelamento.py — Cancelamento cooperativo por job (crawl, metadados, navegador, downloads, CSV)
+- TokenCancelamento: cancelar() de qualquer thread (botão da UI, Ctrl+C da CLI, fila do app web)
+- O token vale para o contexto (contextvars), como os spans do tracing:
+    with escopo(token): ...   # rate limiter, crawler, scraper e downloaders enxergam o mesmo token
+  workers de pool herdam o token com tracing.propagar(fn)
+- verificar() levanta Cancelado; esperar(s) substitui time.sleep e acorda assim que o job é cancelado
+- token.ao_cancelar(fn): fecha o que está em andamento (stream HTTP, página do Selenium) na hora
+- Cancelado herda de BaseException (como KeyboardInterrupt): os "except Exception" espalhados
+  pelas etapas não o engolem e ele sobe até quem abriu o escopo
+
+Uso:
+    token = TokenCancelamento("imagens")
+    with escopo(token):
+        for url in urls:
+            verificar()
+            ...
+    token.cancelar("cancelado pelo usuário")   # de outra thread
+"""
+from __future__ import annotations
+
+import contextvars
+import itertools
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+MOTIVO_PADRAO = "cancelado pelo usuário"
+
+
+class Cancelado(BaseException):
+    """O job foi cancelado; o texto é o motivo."""
+
+
+class TokenCancelamento:
+    def __init__(self, nome: str = "", evento: Optional[threading.Event] = None):
+        self.nome = nome
+        self.motivo: Optional[str] = None
+        self._evento = evento or threading.Event()
+        self._lock = threading.Lock()
+        self._acoes: Dict[int, Callable[[], None]] = {}
+        self._ids = itertools.count()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set()
+
+    def is_set(self) -> bool:
+        """Compatível com threading.Event (parâmetro cancel_event dos downloaders)."""
+        return self._evento.is_set()
+
+    def cancelar(self, motivo: str = MOTIVO_PADRAO) -> None:
+        with self._lock:
+            if self._evento.is_set():
+                return
+            self.motivo = motivo
+            self._evento.set()
+            acoes = list(self._acoes.values())
+            self._acoes.clear()
+        for fn in acoes:
+            try:
+                fn()
+            except Exception:
+                pass  # a ação só acelera o fim; o verificar() seguinte encerra de qualquer forma
+
+    def verificar(self) -> None:
+        if self._evento.is_set():
+            raise Cancelado(self.motivo or MOTIVO_PADRAO)
+
+    def esperar(self, segundos: float) -> bool:
+        """Dorme até `segundos`; devolve True se o token foi cancelado nesse meio tempo."""
+        return self._evento.wait(max(0.0, segundos))
+
+    @contextmanager
+    def ao_cancelar(self, fn: Callable[[], None]) -> Iterator[None]:
+        """Enquanto o bloco roda, cancelar() chama fn (ex.: fechar o socket de um download)."""
+        with self._lock:
+            ja_cancelado = self._evento.is_set()
+            chave = next(self._ids)
+            if not ja_cancelado:
+                self._acoes[chave] = fn
+        if ja_cancelado:
+            try:
+                fn()
+            except Exception:
+                pass
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._acoes.pop(chave, None)
+
+
+_ATUAL: contextvars.ContextVar[Optional[TokenCancelamento]] = contextvars.ContextVar("bora_cancelamento",
+                                                                                      default=None)
+_ATIVOS: "weakref.WeakSet[TokenCancelamento]" = weakref.WeakSet()
+_ativos_lock = threading.Lock()
+
+
+def atual() -> Optional[TokenCancelamento]:
+    return _ATUAL.get()
+
+
+@contextmanager
+def escopo(token: Optional[TokenCancelamento] = None) -> Iterator[TokenCancelamento]:
+    """Torna o token o atual neste contexto (cria um se None)."""
+    token = token or TokenCancelamento()
+    if _ATUAL.get() is token:
+        yield token
+        return
+    with _ativos_lock:
+        _ATIVOS.add(token)
+    marca = _ATUAL.set(token)
+    try:
+        yield token
+    finally:
+        _ATUAL.reset(marca)
+        with _ativos_lock:
+            _ATIVOS.discard(token)
+
+
+def como_token(cancel_event=None) -> TokenCancelamento:
+    """Token para APIs com parâmetro cancel_event: o próprio token, um threading.Event
+    embrulhado (legado) ou o token do contexto (um novo, se não houver)."""
+    if isinstance(cancel_event, TokenCancelamento):
+        return cancel_event
+    if isinstance(cancel_event, threading.Event):
+        return TokenCancelamento(evento=cancel_event)
+    return _ATUAL.get() or TokenCancelamento()
+
+
+def cancelado() -> bool:
+    token = _ATUAL.get()
+    return token is not None and token.cancelado
+
+
+def verificar() -> None:
+    """Levanta Cancelado se o token do contexto foi cancelado (no-op sem token)."""
+    token = _ATUAL.get()
+    if token is not None:
+        token.verificar()
+
+
+def esperar(segundos: float) -> bool:
+    """time.sleep interrompível pelo token do contexto; True se cancelado."""
+    token = _ATUAL.get()
+    if token is None:
+        if segundos > 0:
+            time.sleep(segundos)
+        return False
+    return token.esperar(segundos)
+
+
+def cancelar_todos(motivo: str = MOTIVO_PADRAO) -> int:
+    """Cancela todos os escopos abertos no processo (botão Cancelar legado); devolve quantos."""
+    with _ativos_lock:
+        tokens = list(_ATIVOS)
+    for t in tokens:
+        t.cancelar(motivo)
+    return len(tokens)
@@ -2,9 +2,16 @@
 # Ajustes: _wordpress suporta páginas de busca (?s=...) e categorias (/products/.../) com paginação.
 
 import requests
-from urllib.parse import urlparse, urljoin
+from typing import Callable, Optional
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 
+from . import cancelamento
+from . import classificador_url
+from .rate_limiter import get_limiter
+from .tracing import span
+
+MAX_PAGINAS = {"wordpress": 20, "yupoo": 10}
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125 Safari/537.36"
 
 class CategoryCrawler:
@@ -12,137 +19,134 @@ class CategoryCrawler:
         self.logger = logger
 
     def collect_products(self, url: str) -> list[str]:
-        host = urlparse(url).netloc.lower()
-        if ".yupoo.com" in host:
-            return self._yupoo(url)
-        return self._wordpress(url)
-
-    def _session(self):
-        s = requests.Session()
-        s.headers.update({"User-Agent": UA})
-        s.timeout = 20
-        return s
-
-    def _is_valid_product_url(self, href: str) -> bool:
-        if not href:
-            return False
-        product_indicators = ['/product/', '/produtos/', '/item/']
-        ignore_indicators = [
-            '/category/', '/tag/', '/author/', '/page/', '/cart/', '/checkout/', '/account/', '/login/',
-            '.jpg', '.png', '.gif', '.pdf', '.zip', 'javascript:', 'mailto:', 'tel:', '#'
-        ]
-        href_lower = href.lower()
-        has_product_indicator = any(ind in href_lower for ind in product_indicators)
-        has_ignore_indicator = any(ind in href_lower for ind in ignore_indicators)
-        return has_product_indicator and not has_ignore_indicator
-
-    def _wordpress(self, url: str) -> list[str]:
+        produtos: dict = {}  # dict mantém a ordem de descoberta
+        self.percorrer(url, lambda href, pagina: produtos.setdefault(href, pagina))
+        return list(produtos)
+
+    def percorrer(self, url: str, emitir: Callable[[str, int], Optional[bool]]) -> int:
+        """Entrega cada produto a emitir(url, pagina) assim que a página é lida (ex.: Fronteira.put),
+        sem acumular a categoria inteira em memória; devolve quantos emitir não recusou (False)."""
+        aceitos = 0
+
+        def _emitir(href: str, pagina: int) -> None:
+            nonlocal aceitos
+            if emitir(href, pagina) is not False:
+                aceitos += 1
+
+        with span("categoria", url=url) as s:
+            self._paginar(url, _emitir)
+            s.set(produtos=aceitos)
+        return aceitos
+
+    @staticmethod
+    def plataforma(url: str) -> str:
+        return "yupoo" if classificador_url.plataforma(url) == "yupoo" else "wordpress"
+
+    def max_paginas(self, url: str) -> int:
+        return MAX_PAGINAS[self.plataforma(url)]
+
+    def ler_pagina(self, sess, url: str, pagina_url: str, pagina: int,
+                   emitir: Callable[[str, int], None]) -> Optional[str]:
+        """Uma página da categoria `url`: entrega os produtos (como aparecem na página) e devolve a
+        próxima página (None no fim). Erros HTTP sobem para quem pagina (percorrer ou o agendador)."""
+        response = get_limiter().get(sess, pagina_url, timeout=20)
+        response.raise_for_status()
+        parse = self._parse_yupoo if self.plataforma(url) == "yupoo" else self._parse_wordpress
+        propria = classificador_url.chave_url(url)
+
+        def _emitir(href: str) -> None:
+            # a chave canônica só compara; a URL buscada e gravada é a da página
+            if classificador_url.chave_url(href) != propria:
+                emitir(href, pagina)
+
+        with span("parse", pagina=pagina):
+            next_url = parse(response.text, pagina_url, _emitir)
+        return next_url if next_url != pagina_url else None
+
+    def _paginar(self, url: str, emitir: Callable[[str, int], None]) -> None:
         sess = self._session()
-        produtos = set()
-
-        def parse_page(html, base):
-            soup = BeautifulSoup(html, "lxml")
-
-            # Seletores abrangendo páginas de busca (?s=...) e categorias (/products/.../)
-            product_selectors = [
-                ".products .product a[href]",              # WooCommerce padrão (categorias e busca)
-                "ul.products li.product a[href]",          # alternativa
-                ".woocommerce-LoopProduct-link",           # link padrão WC
-                "a[href*='/product/']", "a[href*='/produtos/']", "a[href*='/item/']"
-            ]
-
-            for selector in product_selectors:
-                for a in soup.select(selector):
-                    href = urljoin(base, a.get("href"))
-                    if self._is_valid_product_url(href):
-                        produtos.add(href)
-
-            # Paginadores (funciona tanto em categorias quanto em buscas)
-            next_selectors = [
-                "a.next", "a.next.page-numbers", "a[rel='next']",
-                ".pagination-next a", ".wp-pagenavi a.next",
-                "[class*='next'] a", "a[aria-label*='Next']"
-            ]
-            for selector in next_selectors:
-                nxt = soup.select_one(selector)
-                if nxt and nxt.get("href"):
-                    return urljoin(base, nxt.get("href"))
-            return None
+        nome = "Yupoo" if self.plataforma(url) == "yupoo" else "WordPress"
+        encontrados = 0
+
+        def _contar(href: str, pagina: int) -> None:
+            nonlocal encontrados
+            encontrados += 1
+            emitir(href, pagina)
 
         current_url = url
         seen = set()
         page_count = 0
-        max_pages = 20
+        max_pages = self.max_paginas(url)
 
-        self.logger.log(f"🔍 Iniciando coleta WordPress: {url}", "INFO", "🔍")
+        self.logger.log(f"🔍 Iniciando coleta {nome}: {url}", "INFO", "🔍")
 
         while current_url and current_url not in seen and page_count < max_pages:
             seen.add(current_url)
             page_count += 1
+            cancelamento.verificar()  # Cancelado não é Exception: atravessa o except abaixo
             try:
                 self.logger.log(f"📄 Processando página {page_count}: {current_url}", "DEBUG", "📄")
-                response = sess.get(current_url)
-                response.raise_for_status()
-                next_url = parse_page(response.text, current_url)
-                if next_url and next_url != current_url:
-                    current_url = next_url
-                else:
-                    break
+                current_url = self.ler_pagina(sess, url, current_url, page_count, _contar)
             except Exception as e:
                 self.logger.log(f"❌ Erro ao processar página {page_count}: {str(e)}", "ERROR", "❌")
                 break
 
-        resultado = [u for u in produtos if self._is_valid_product_url(u) and u != url]
-        if not resultado:
-            self.logger.log(f"⚠️ Nenhum produto encontrado na categoria WordPress: {url}", "WARNING", "⚠️")
+        if not encontrados:
+            self.logger.log(f"⚠️ Nenhum produto encontrado na categoria {nome}: {url}", "WARNING", "⚠️")
         else:
-            self.logger.log(f"✅ WordPress coleta concluída: {len(resultado)} produtos encontrados", "SUCCESS", "✅")
-        return resultado
+            self.logger.log(f"✅ {nome} coleta concluída em {page_count} página(s)", "SUCCESS", "✅")
 
-    def _yupoo(self, url: str) -> list[str]:
-        sess = self._session()
-        prod = set()
-
-        def parse(html, base):
-            soup = BeautifulSoup(html, "lxml")
-            album_selectors = [
-                "a[href*='/albums/']", ".album-item a", ".showalbum__children a", "[data-album-id] a"
-            ]
-            for selector in album_selectors:
-                for a in soup.select(selector):
-                    href = urljoin(base, a.get("href"))
-                    if "/albums/" in href and href not in prod:
-                        prod.add(href)
-            next_selectors = ["a.next, a[rel='next']", ".pagination .next", "[class*='next'] a"]
-            for selector in next_selectors:
-                nxt = soup.select_one(selector)
-                if nxt and nxt.get("href"):
-                    return urljoin(base, nxt.get("href"))
-            return None
+    def _session(self):
+        s = requests.Session()
+        s.headers.update({"User-Agent": UA})
+        s.timeout = 20
+        return s
 
-        current_url = url
-        seen = set()
-        page_count = 0
-        max_pages = 10
+    def _is_valid_product_url(self, href: str) -> bool:
+        return bool(href) and classificador_url.eh_produto(href)
 
-        self.logger.log(f"🔍 Iniciando coleta Yupoo: {url}", "INFO", "🔍")
+    def _parse_wordpress(self, html: str, base: str, emitir: Callable[[str], None]) -> Optional[str]:
+        soup = BeautifulSoup(html, "lxml")
 
-        while current_url and current_url not in seen and page_count < max_pages:
-            seen.add(current_url)
-            page_count += 1
-            try:
-                self.logger.log(f"📄 Processando página {page_count}: {current_url}", "DEBUG", "📄")
-                response = sess.get(current_url)
-                response.raise_for_status()
-                next_url = parse(response.text, current_url)
-                if next_url and next_url != current_url:
-                    current_url = next_url
-                else:
-                    break
-            except Exception as e:
-                self.logger.log(f"❌ Erro ao processar página {page_count}: {str(e)}", "ERROR", "❌")
-                break
+        # Seletores abrangendo páginas de busca (?s=...) e categorias (/products/.../)
+        product_selectors = [
+            ".products .product a[href]",              # WooCommerce padrão (categorias e busca)
+            "ul.products li.product a[href]",          # alternativa
+            ".woocommerce-LoopProduct-link",           # link padrão WC
+            "a[href*='/product/']", "a[href*='/produtos/']", "a[href*='/item/']"
+        ]
 
-        result = [u for u in prod if "/albums/" in u and u != url]
-        self.logger.log(f"✅ Yupoo coleta concluída: {len(result)} álbuns encontrados", "SUCCESS", "✅")
-        return result
+        for selector in product_selectors:
+            for a in soup.select(selector):
+                href = urljoin(base, a.get("href"))
+                if self._is_valid_product_url(href):
+                    emitir(href)
+
+        # Paginadores (funciona tanto em categorias quanto em buscas)
+        next_selectors = [
+            "a.next", "a.next.page-numbers", "a[rel='next']",
+            ".pagination-next a", ".wp-pagenavi a.next",
+            "[class*='next'] a", "a[aria-label*='Next']"
+        ]
+        for selector in next_selectors:
+            nxt = soup.select_one(selector)
+            if nxt and nxt.get("href"):
+                return urljoin(base, nxt.get("href"))
+        return None
+
+    def _parse_yupoo(self, html: str, base: str, emitir: Callable[[str], None]) -> Optional[str]:
+        soup = BeautifulSoup(html, "lxml")
+        album_selectors = [
+            "a[href*='/albums/']", ".album-item a", ".showalbum__children a", "[data-album-id] a"
+        ]
+        for selector in album_selectors:
+            for a in soup.select(selector):
+                href = urljoin(base, a.get("href"))
+                if self._is_valid_product_url(href):
+                    emitir(href)
+        next_selectors = ["a.next, a[rel='next']", ".pagination .next", "[class*='next'] a"]
+        for selector in next_selectors:
+            nxt = soup.select_one(selector)
+            if nxt and nxt.get("href"):
+                return urljoin(base, nxt.get("href"))
+        return None
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+classificador_url.py — Plataforma e entidade de uma URL, com a mesma resposta em todo o sistema
+- Usado por URLAnalyzer.analyze, DataProcessor._is_category_url, CategoryCrawler (links de produto,
+  plataforma da categoria) e image_downloader (provedor do álbum)
+- Uma análise por URL (urlsplit uma vez) + regex pré-compiladas + cache LRU limitado:
+  a mesma URL passa por expansão, fronteira, extração e download
+- Plataforma: host *.yupoo.com → "yupoo"; outro http(s) → "wordpress"; o resto → "desconhecido"
+- Entidade: "produto" (álbum Yupoo /albums/<id>; WordPress /product/<slug> ou /item/<slug>),
+  "categoria" (listas, buscas, coleções e os identificadores_categoria do config) ou "desconhecido"
+- canonica(url): a forma única de um álbum (sem ?uid=1, parâmetros de rastreio e de variação WP,
+  fragmento, porta padrão; host minúsculo; barra final do WordPress); chave_url(url) ignora também
+  http/https — é a chave de deduplicação da fronteira e do índice de vistos
+
+Uso:
+    from system.classificador_url import classificar, eh_categoria
+    c = classificar("https://loja.x.yupoo.com/albums/123?uid=1")   # Classificacao(plataforma, entidade, host)
+    eh_categoria("https://loja.com/product-category/camisas/")      # True
+    canonica("http://Loja.x.yupoo.com/albums/123/?uid=1#x")          # "http://loja.x.yupoo.com/albums/123"
+    configurar(["search", "collection"])                             # aba Categorias alterou a lista
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+CACHE_MAX = 65536
+
+# segmentos de caminho que indicam lista de produtos (WordPress/WooCommerce e buscas Yupoo)
+SEGMENTOS_CATEGORIA = (
+    "category", "product-category", "collection", "collections", "shop", "store", "catalogo",
+    "produtos", "products", "search", "categories",
+)
+# parâmetros de busca/filtro na query
+PARAMETROS_CATEGORIA = ("s", "q", "search", "category", "cat", "tag", "post_type")
+
+_RE_PRODUTO_WP = re.compile(r"/(?:product|item)/[^/]")
+_RE_IGNORAR_WP = re.compile(r"/(?:category|tag|author|page|cart|checkout|account|login)/|\.(?:jpe?g|png|gif|pdf|zip)$")
+_RE_ALBUM_YUPOO = re.compile(r"/albums/\d")
+_RE_QUERY = re.compile(r"(?:^|&)(?:%s)=" % "|".join(map(re.escape, PARAMETROS_CATEGORIA)))
+_ESQUEMAS_WEB = ("http", "https", "")
+_RE_ALBUM_ID = re.compile(r"/albums/(\d+)")
+_RE_BARRAS = re.compile(r"/{2,}")
+# parâmetros que não mudam o álbum: rastreio, sessão Yupoo e variação/carrinho do WooCommerce
+_RE_PARAM_DESCARTAVEL = re.compile(
+    r"(?:utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|_gl|igshid|srsltid|spm|ref|ref_src"
+    r"|uid|issubcate|referrercate|variation|variation_id|attribute_\w+|add-to-cart|quantity)$")
+_PORTAS_PADRAO = {"http": 80, "https": 443}
+
+_re_categoria: Optional["re.Pattern[str]"] = None
+_identificadores: Tuple[str, ...] = ()
+
+
+class Classificacao(NamedTuple):
+    plataforma: str  # "yupoo" | "wordpress" | "desconhecido"
+    entidade: str    # "produto" | "categoria" | "desconhecido"
+    host: str
+
+    @property
+    def categoria(self) -> bool:
+        return self.entidade == "categoria"
+
+    @property
+    def produto(self) -> bool:
+        return self.entidade == "produto"
+
+
+def _compilar(identificadores: Iterable[str]) -> "re.Pattern[str]":
+    palavras = dict.fromkeys(SEGMENTOS_CATEGORIA)
+    palavras.update(dict.fromkeys(i.strip().lower() for i in identificadores if i and i.strip()))
+    # segmento inteiro (/search, /search/...), mais longos primeiro para a alternância não parar cedo
+    alt = "|".join(re.escape(p) for p in sorted(palavras, key=len, reverse=True))
+    return re.compile(r"/(?:%s)(?:/|$)" % alt)
+
+
+def configurar(identificadores: Optional[Iterable[str]] = None) -> None:
+    """(Re)monta as regras; None lê identificadores_categoria do config.json."""
+    global _re_categoria, _identificadores
+    if identificadores is None:
+        from system.config_service import get_config_service
+        identificadores = get_config_service().get("identificadores_categoria") or []
+    _identificadores = tuple(identificadores)
+    _re_categoria = _compilar(_identificadores)
+    classificar.cache_clear()
+
+
+def identificadores() -> Tuple[str, ...]:
+    if _re_categoria is None:
+        configurar()
+    return _identificadores
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def classificar(url: str) -> Classificacao:
+    if _re_categoria is None:
+        configurar()
+    try:
+        partes = urlsplit((url or "").strip())
+    except ValueError:  # ex.: colchete sem par no host
+        return Classificacao("desconhecido", "desconhecido", "")
+    host = (partes.hostname or "").lower()
+    esquema = partes.scheme.lower()
+    if esquema not in _ESQUEMAS_WEB or not host:
+        return Classificacao("desconhecido", "desconhecido", host)
+    path = partes.path.lower()
+    if host.endswith(".yupoo.com"):
+        # álbum é produto; o resto da loja (início, categorias, buscas) lista álbuns
+        return Classificacao("yupoo", "produto" if _RE_ALBUM_YUPOO.search(path) else "categoria", host)
+    if _re_categoria.search(path) or (partes.query and _RE_QUERY.search(partes.query.lower())):
+        return Classificacao("wordpress", "categoria", host)
+    if partes.fragment or not _RE_PRODUTO_WP.search(path) or _RE_IGNORAR_WP.search(path):
+        return Classificacao("wordpress", "desconhecido", host)
+    return Classificacao("wordpress", "produto", host)
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def canonica(url: str) -> str:
+    """URL única do álbum/página; URLs que não são http(s) voltam como vieram (sem espaços)."""
+    bruta = (url or "").strip()
+    if bruta.startswith("//"):
+        bruta = "https:" + bruta
+    try:
+        partes = urlsplit(bruta)
+        porta = partes.port
+    except ValueError:
+        return bruta
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or "").lower()
+    if esquema not in ("http", "https") or not host:
+        return bruta
+    if porta and porta != _PORTAS_PADRAO[esquema]:
+        host = f"{host}:{porta}"
+    path = _RE_BARRAS.sub("/", partes.path) or "/"
+    if host.endswith(".yupoo.com"):
+        album = _RE_ALBUM_ID.search(path)
+        if album:  # o id basta: ?uid=1, &isSubCate=..., barra final e fragmento não mudam o álbum
+            return f"{esquema}://{host}/albums/{album.group(1)}"
+        path = path.rstrip("/") or "/"
+    elif not path.endswith("/") and "." not in path.rsplit("/", 1)[-1]:
+        path += "/"  # permalink WordPress termina em barra (sem ela o servidor só redireciona)
+    query = ""
+    if partes.query:
+        pares = [(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+                 if not _RE_PARAM_DESCARTAVEL.match(k.lower())]
+        query = urlencode(sorted(pares))
+    return urlunsplit((esquema, host, path, query, ""))
+
+
+def chave_url(url: str) -> str:
+    """canonica() sem o esquema: http e https do mesmo álbum têm a mesma chave."""
+    c = canonica(url)
+    return c.split("://", 1)[1] if "://" in c else c
+
+
+def plataforma(url: str) -> str:
+    return classificar(url).plataforma
+
+
+def eh_categoria(url: str) -> bool:
+    return classificar(url).entidade == "categoria"
+
+
+def eh_produto(url: str) -> bool:
+    return classificar(url).entidade == "produto"
+
+
+def cache_clear() -> None:
+    classificar.cache_clear()
+    canonica.cache_clear()
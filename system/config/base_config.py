@@ -37,17 +37,8 @@ class BaseConfig:
     
     def set_config_value(self, key: str, value: Any):
         """Define valor de configuração"""
-        keys = key.split('.')
-        config = self.config_manager.config
-        
-        # Navega até o penúltimo nível
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        
-        # Define o valor final
-        config[keys[-1]] = value
+        # cópia na escrita no serviço de config: leitores em outras threads não veem o meio da troca
+        self.config_manager.set(key, value)
     
     def create_frame_with_title(self, parent, title: str, emoji: str = "") -> ctk.CTkFrame:
         """Cria frame com título padronizado"""
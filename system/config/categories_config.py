@@ -7,6 +7,7 @@ Módulo para identificadores de URL de categoria
 
 import customtkinter as ctk
 from .base_config import BaseConfig
+from .. import classificador_url
 
 class CategoriesConfig(BaseConfig):
     """Configurações de identificadores de categoria"""
@@ -162,7 +163,7 @@ class CategoriesConfig(BaseConfig):
         
         # Adiciona
         identificadores.append(identificador)
-        self.set_config_value("identificadores_categoria", identificadores)
+        self._aplicar(identificadores)
         self.novo_identificador_entry.delete(0, "end")
         
         self.log_action(f"Identificador '{identificador}' adicionado", "SUCCESS", "➕")
@@ -174,17 +175,22 @@ class CategoriesConfig(BaseConfig):
         
         if identificador in identificadores:
             identificadores.remove(identificador)
-            self.set_config_value("identificadores_categoria", identificadores)
+            self._aplicar(identificadores)
             self.log_action(f"Identificador '{identificador}' removido", "INFO", "🗑️")
             self._load_identifiers()
     
     def _restore_defaults(self):
         """Restaura identificadores padrão"""
         default_identifiers = ["search", "collection", "categories", "gallery", "shop", "products"]
-        self.set_config_value("identificadores_categoria", default_identifiers)
+        self._aplicar(default_identifiers)
         self.log_action("Identificadores restaurados para padrão", "INFO", "🔄")
         self._load_identifiers()
     
+    def _aplicar(self, identificadores: list):
+        """Grava a lista e atualiza o classificador de URLs (vale já para a próxima coleta)"""
+        self.set_config_value("identificadores_categoria", identificadores)
+        classificador_url.configurar(identificadores)
+    
     def save_config(self) -> bool:
         """Salva configurações de categorias"""
         # Identificadores são salvos em tempo real
@@ -39,20 +39,20 @@ class GeneralConfig(BaseConfig):
         delay_frame.pack(fill="x", pady=5)
         
         # Delay padrão
-        self.delay_padrao_var = ctk.DoubleVar(value=self.get_config_value("delay_padrao", 2.0))
-        self.create_entry_row(delay_frame, "Delay Padrão (segundos):", self.delay_padrao_var)
+        self.delay_padrao_var = ctk.DoubleVar(value=self.get_config_value("rate_limit.default.delay", 0.5))
+        self.create_entry_row(delay_frame, "Intervalo Inicial por Host (segundos):", self.delay_padrao_var)
         
         # Delay após erro
-        self.delay_erro_var = ctk.DoubleVar(value=self.get_config_value("delay_apos_erro", 5.0))
-        self.create_entry_row(delay_frame, "Delay Após Erro (segundos):", self.delay_erro_var)
+        self.delay_erro_var = ctk.DoubleVar(value=self.get_config_value("rate_limit.default.error_delay", 5.0))
+        self.create_entry_row(delay_frame, "Espera Mínima Após Erro (segundos):", self.delay_erro_var)
         
         # Descrições
         desc_frame = ctk.CTkFrame(delay_frame)
         desc_frame.pack(fill="x", padx=10, pady=5)
         
         desc_text = """Delays controlam a velocidade do scraping:
-• Delay Padrão: Tempo entre requisições normais
-• Delay Após Erro: Tempo extra após falhas de conexão"""
+• Intervalo Inicial: Tempo entre requisições ao mesmo host (diminui enquanto o host responde bem)
+• Espera Após Erro: Pausa mínima após 429/5xx/timeout (dobra a cada falha seguida)"""
         
         ctk.CTkLabel(
             desc_frame,
@@ -113,8 +113,8 @@ class GeneralConfig(BaseConfig):
     def save_config(self) -> bool:
         """Salva configurações gerais"""
         try:
-            self.set_config_value("delay_padrao", self.delay_padrao_var.get())
-            self.set_config_value("delay_apos_erro", self.delay_erro_var.get())
+            self.set_config_value("rate_limit.default.delay", self.delay_padrao_var.get())
+            self.set_config_value("rate_limit.default.error_delay", self.delay_erro_var.get())
             self.set_config_value("tamanho_minimo_imagem", self.tamanho_img_var.get())
             return True
         except Exception as e:
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+config_service.py — Acesso único ao config.json (leitura em memória, gravação atômica)
+- Um dicionário por processo: lido uma vez e servido da memória; relido quando o mtime/tamanho muda
+  (checagem no disco no máximo a cada VERIFICAR_S)
+- Cópia na escrita: releitura, set() e substituir() montam um dicionário novo e trocam a referência
+  sob o lock; quem já pegou dados() continua com um retrato íntegro (nada muda enquanto itera)
+- get("a.b.c") e secao("csv", padroes) para leitores; set("a.b", v) agenda a gravação
+- Gravação via arquivo temporário + os.replace (leitores nunca veem o arquivo pela metade)
+- Gravações seguidas (arrasto do divisor, redimensionar janela) viram uma só após debounce_s
+- Caminho: system/config.json (config.json na raiz só se o de system/ não existir)
+
+Uso:
+    from system.config_service import get_config_service
+    cfg = get_config_service()
+    cfg.get("image_downloader.timeout", 12.0)
+    cfg.set("paned_divider_position", 420)   # grava ~0,5 s depois, uma única vez
+    cfg.flush()                              # ao sair: grava o que estiver pendente
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+CAMINHOS = (Path("system") / "config.json", Path("config.json"))
+DEBOUNCE_S = 0.5
+VERIFICAR_S = 1.0  # intervalo mínimo entre stat() do arquivo nas leituras
+
+
+def _caminho_padrao() -> Path:
+    for p in CAMINHOS:
+        if p.exists():
+            return p
+    return CAMINHOS[0]
+
+
+class ConfigService:
+    def __init__(self, path: Optional[Path] = None, debounce_s: float = DEBOUNCE_S):
+        self.path = Path(path) if path else _caminho_padrao()
+        self.debounce_s = debounce_s
+        self._dados: Dict[str, Any] = {}
+        self._assinatura: Optional[Tuple[int, int]] = None
+        self._verificado_em = 0.0
+        self._carregado = False
+        self._pendente = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    # ------------------------------ Leitura ------------------------------
+    def _assinatura_disco(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _ler(self) -> None:
+        try:
+            novos = json.loads(self.path.read_text(encoding="utf-8"))
+            if not isinstance(novos, dict):
+                novos = {}
+        except (OSError, ValueError):
+            novos = {}
+        with self._lock:
+            self._dados = novos  # troca a referência: leitores em curso ficam com o retrato anterior
+            self._assinatura = self._assinatura_disco()
+            self._verificado_em = time.monotonic()
+            self._carregado = True
+
+    def dados(self) -> Dict[str, Any]:
+        """Retrato atual da configuração (relido se o arquivo mudou fora deste processo).
+        Não altere o dicionário devolvido: use set()/remover()/substituir()."""
+        with self._lock:
+            if not self._carregado:
+                self._ler()
+            elif not self._pendente and time.monotonic() - self._verificado_em >= VERIFICAR_S:
+                self._verificado_em = time.monotonic()
+                if self._assinatura_disco() != self._assinatura:
+                    self._ler()
+            return self._dados
+
+    def recarregar(self) -> Dict[str, Any]:
+        """Grava o que estiver pendente e relê o arquivo."""
+        with self._lock:
+            self.flush()
+            self._ler()
+            return self._dados
+
+    def get(self, chave: str, padrao: Any = None) -> Any:
+        valor: Any = self.dados()
+        for k in chave.split("."):
+            if isinstance(valor, dict) and k in valor:
+                valor = valor[k]
+            else:
+                return padrao
+        return valor
+
+    def secao(self, nome: str, padroes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Cópia da seção mesclada sobre os padrões (o chamador pode alterar à vontade)."""
+        sec = self.get(nome) or {}
+        if not isinstance(sec, dict):
+            sec = {}
+        return {**copy.deepcopy(padroes or {}), **copy.deepcopy(sec)}
+
+    # ------------------------------ Escrita ------------------------------
+    def _copiar_caminho(self, partes) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(nova raiz, dicionário do penúltimo nível), copiando só os níveis do caminho."""
+        raiz = dict(self.dados())
+        alvo = raiz
+        for k in partes[:-1]:
+            filho = alvo.get(k)
+            alvo[k] = dict(filho) if isinstance(filho, dict) else {}
+            alvo = alvo[k]
+        return raiz, alvo
+
+    def set(self, chave: str, valor: Any, atraso: Optional[float] = None) -> None:
+        with self._lock:
+            partes = chave.split(".")
+            raiz, alvo = self._copiar_caminho(partes)
+            alvo[partes[-1]] = valor
+            self._dados = raiz
+            self.salvar(atraso)
+
+    def remover(self, chave: str, atraso: Optional[float] = None) -> None:
+        with self._lock:
+            if self.get(chave) is None:
+                return
+            partes = chave.split(".")
+            raiz, alvo = self._copiar_caminho(partes)
+            alvo.pop(partes[-1], None)
+            self._dados = raiz
+            self.salvar(atraso)
+
+    def substituir(self, novos: Dict[str, Any], atraso: Optional[float] = 0.0) -> None:
+        """Troca o conteúdo inteiro (ex.: config padrão) e grava."""
+        with self._lock:
+            self.dados()
+            self._dados = dict(novos)
+            self.salvar(atraso)
+
+    def salvar(self, atraso: Optional[float] = None) -> None:
+        """Marca como alterado e grava após atraso (padrão debounce_s; 0 = agora)."""
+        atraso = self.debounce_s if atraso is None else atraso
+        with self._lock:
+            self._pendente = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if atraso <= 0:
+                self._gravar()
+                return
+            self._timer = threading.Timer(atraso, self._flush_adiado)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Grava imediatamente se houver alteração pendente."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pendente:
+                self._gravar()
+
+    def _flush_adiado(self) -> None:
+        try:
+            self.flush()
+        except OSError:
+            pass  # continua pendente; a próxima gravação ou o flush() ao sair tenta de novo
+
+    def _gravar(self) -> None:
+        conteudo = json.dumps(self._dados, indent=2, ensure_ascii=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        for tentativa in range(5):
+            try:
+                os.replace(tmp, self.path)
+                break
+            except PermissionError:  # Windows: outro processo com o arquivo aberto
+                if tentativa == 4:
+                    raise
+                time.sleep(0.05 * (tentativa + 1))
+        self._assinatura = self._assinatura_disco()
+        self._pendente = False
+
+
+_SERVICO: Optional[ConfigService] = None
+_servico_lock = threading.Lock()
+
+
+def get_config_service() -> ConfigService:
+    """Serviço compartilhado por todo o processo (GUI, CLI, downloaders, rate limiter)."""
+    global _SERVICO
+    with _servico_lock:
+        if _SERVICO is None:
+            _SERVICO = ConfigService()
+            atexit.register(_SERVICO._flush_adiado)  # timers são daemon: não perde a última alteração
+        return _SERVICO
@@ -404,8 +404,8 @@ class LoggerConfig:
                 font_config[key] = value
             
             # Atualiza config_manager
-            self.config_manager.config["logger_colors"] = colors_config
-            self.config_manager.config["logger_font"] = font_config
+            self.config_manager.set("logger_colors", colors_config)
+            self.config_manager.set("logger_font", font_config)
             
             # Aplica configurações no logger principal se disponível
             if hasattr(self.configurador, 'main_app') and self.configurador.main_app:
@@ -475,12 +475,10 @@ class ConfiguradorSistema:
         if event.widget == self.config_window:
             try:
                 geometry = self.config_window.geometry()
-                self.config_manager.config["config_window_geometry"] = geometry
-                
-                # Salva imediatamente no arquivo
-                config_file = Path("system") / "config.json"
-                with open(config_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.config_manager.config, f, indent=2, ensure_ascii=False)
+                if self.config_manager.config.get("config_window_geometry") == geometry:
+                    return
+                # Redimensionar gera dezenas de eventos: grava uma vez ao final (debounce)
+                self.config_manager.set("config_window_geometry", geometry)
                     
             except Exception as e:
                 self.logger.log(f"Erro ao salvar geometria: {str(e)}", "ERROR", "❌")
@@ -604,6 +602,10 @@ class ConfiguradorSistema:
             # Salva arquivo principal de configuração
             self._salvar_arquivo_config()
             
+            # Novos limites por host valem a partir da próxima requisição
+            from system.rate_limiter import reset_limiter
+            reset_limiter()
+            
             if success_count == total_modules:
                 self._update_status("✅ Todas as configurações salvas com sucesso!")
                 self.logger.log("💾 Configurações salvas com sucesso!", "SUCCESS", "✅")
@@ -620,9 +622,7 @@ class ConfiguradorSistema:
     def _salvar_arquivo_config(self):
         """Salva o arquivo principal config.json"""
         try:
-            config_file = Path("system") / "config.json"
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config_manager.config, f, indent=2, ensure_ascii=False)
+            self.config_manager.save()  # temporário + os.replace
         except Exception as e:
             raise Exception(f"Falha ao salvar config.json: {str(e)}")
     
@@ -703,8 +703,7 @@ class ImageDownloadConfig:
         # Configurações padrão
         self.default_config = {
             "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "timeout": 10.0,
-            "delay_between_images": 1.0
+            "timeout": 10.0
         }
         
         self.vars = {}
@@ -774,33 +773,6 @@ class ImageDownloadConfig:
             foreground="gray"
         ).pack(side="left", padx=(10, 0))
         
-        # Delay entre imagens
-        delay_frame = ttk.Frame(network_frame)
-        delay_frame.pack(fill="x", pady=5)
-        
-        ttk.Label(delay_frame, text="Delay entre imagens (segundos):", font=("Arial", 10, "bold")).pack(anchor="w")
-        
-        delay_container = ttk.Frame(delay_frame)
-        delay_container.pack(fill="x", pady=2)
-        
-        self.vars["delay_between_images"] = tk.DoubleVar(value=self.default_config["delay_between_images"])
-        delay_spin = ttk.Spinbox(
-            delay_container,
-            from_=0.1,
-            to=10.0,
-            increment=0.1,
-            textvariable=self.vars["delay_between_images"],
-            width=10
-        )
-        delay_spin.pack(side="left")
-        
-        ttk.Label(
-            delay_container,
-            text="Pausa entre downloads para evitar sobrecarga do servidor",
-            font=("Arial", 8),
-            foreground="gray"
-        ).pack(side="left", padx=(10, 0))
-        
         # Frame para configurações de imagem (movido da aba Geral)
         images_frame = ttk.LabelFrame(main_frame, text="Configurações de Imagem", padding=15)
         images_frame.pack(fill="x", pady=10)
@@ -884,11 +856,11 @@ class ImageDownloadConfig:
             for key, var in self.vars.items():
                 if key == "tamanho_minimo_imagem":
                     # Salva tamanho mínimo da imagem no nível raiz do config
-                    self.config_manager.config["tamanho_minimo_imagem"] = var.get()
+                    self.config_manager.set("tamanho_minimo_imagem", var.get())
                 else:
                     download_config[key] = var.get()
             
-            self.config_manager.config["image_downloader"] = download_config
+            self.config_manager.set("image_downloader", download_config)
             
             return True
             
@@ -925,30 +897,30 @@ class GeneralConfig:
         delays_frame = ttk.LabelFrame(main_frame, text="Configurações de Tempo", padding=15)
         delays_frame.pack(fill="x", pady=10)
         
-        # Delay padrão
+        # Intervalo inicial por host (rate_limit.default.delay)
         delay_frame = ttk.Frame(delays_frame)
         delay_frame.pack(fill="x", pady=5)
         
-        ttk.Label(delay_frame, text="Delay padrão (segundos):").pack(side="left")
+        ttk.Label(delay_frame, text="Intervalo inicial por host (segundos):").pack(side="left")
         
-        self.delay_var = tk.StringVar(value=str(self.config_manager.get("delay_padrao", 2.0)))
+        self.delay_var = tk.StringVar(value=str(self.config_manager.get("rate_limit.default.delay", 0.5)))
         delay_spin = tk.Spinbox(
             delay_frame,
-            from_=0.5,
+            from_=0.1,
             to=10.0,
-            increment=0.5,
+            increment=0.1,
             textvariable=self.delay_var,
             width=10
         )
         delay_spin.pack(side="right")
         
-        # Delay após erro
+        # Espera mínima após 429/5xx/timeout (rate_limit.default.error_delay)
         error_delay_frame = ttk.Frame(delays_frame)
         error_delay_frame.pack(fill="x", pady=5)
         
-        ttk.Label(error_delay_frame, text="Delay após erro (segundos):").pack(side="left")
+        ttk.Label(error_delay_frame, text="Espera mínima após erro (segundos):").pack(side="left")
         
-        self.error_delay_var = tk.StringVar(value=str(self.config_manager.get("delay_apos_erro", 5.0)))
+        self.error_delay_var = tk.StringVar(value=str(self.config_manager.get("rate_limit.default.error_delay", 5.0)))
         error_delay_spin = tk.Spinbox(
             error_delay_frame,
             from_=1.0,
@@ -958,12 +930,22 @@ class GeneralConfig:
             width=10
         )
         error_delay_spin.pack(side="right")
+        
+        ttk.Label(
+            delays_frame,
+            text="O intervalo diminui sozinho enquanto o host responde bem e dobra em 429/5xx.\n"
+                 "Limites específicos por host ficam em config.json → rate_limit.hosts",
+            font=("Arial", 8),
+            foreground="gray"
+        ).pack(anchor="w", pady=(5, 0))
     
     def save_config(self):
         """Salva configurações gerais"""
         try:
-            self.config_manager.config["delay_padrao"] = float(self.delay_var.get())
-            self.config_manager.config["delay_apos_erro"] = float(self.error_delay_var.get())
+            self.config_manager.set("rate_limit.default.delay", float(self.delay_var.get()))
+            self.config_manager.set("rate_limit.default.error_delay", float(self.error_delay_var.get()))
+            self.config_manager.service.remover("delay_padrao")
+            self.config_manager.service.remover("delay_apos_erro")
             return True
         except Exception as e:
             self.logger.log(f"Erro ao salvar config geral: {str(e)}", "ERROR", "❌")
@@ -1069,7 +1051,7 @@ class SizesConfig:
             adult_sizes = []
             for i in range(self.adult_listbox.size()):
                 adult_sizes.append(self.adult_listbox.get(i))
-            self.config_manager.config["tamanhos_adulto"] = adult_sizes
+            self.config_manager.set("tamanhos_adulto", adult_sizes)
             
             # Salva tamanhos infantil
             child_sizes = {}
@@ -1078,7 +1060,7 @@ class SizesConfig:
                 if " - " in item:
                     size, desc = item.split(" - ", 1)
                     child_sizes[size] = desc
-            self.config_manager.config["tamanhos_infantil"] = child_sizes
+            self.config_manager.set("tamanhos_infantil", child_sizes)
             
             return True
         except Exception as e:
@@ -0,0 +1,80 @@
+# Módulo: csv_delta.py
+# Função: impressões digitais (hash) por produto do último catálogo exportado → CSV delta.
+# Chamadas: CSVGenerator._write_products -> CatalogFingerprints.classify(slug, linhas) / removed() / save()
+# Regras:
+#  - hash = sha1 das linhas do produto (slug, nome, categorias, preço, tamanhos...);
+#  - novo ou alterado → entra no delta; igual ao último export → fica de fora;
+#  - produto do último export que não apareceu → removido (linha com estoque 0 e oculto na loja) SÓ
+#    quando a exportação é o catálogo inteiro (catalogo_completo); senão ele segue na referência
+#    como estava (export de um subconjunto, ou álbuns pulados pelo índice de vistos, não esconde nada);
+#  - o arquivo de impressões só é substituído (atômico) depois que o CSV foi gravado.
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+NOVO = "novo"
+ALTERADO = "alterado"
+IGUAL = "igual"
+
+
+def fingerprint(linhas: Sequence[Sequence[str]]) -> str:
+    h = hashlib.sha1()
+    for row in linhas:
+        h.update('\x1f'.join(row).encode('utf-8'))
+        h.update(b'\x1e')
+    return h.hexdigest()
+
+
+class CatalogFingerprints:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._anterior: Dict[str, Dict] = {}
+        self._atual: Dict[str, Dict] = {}
+        self.contagem = {NOVO: 0, ALTERADO: 0, IGUAL: 0}
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            self._anterior = data.get('produtos') or {}
+        except (OSError, ValueError):
+            self._anterior = {}
+
+    @property
+    def primeira_exportacao(self) -> bool:
+        return not self._anterior
+
+    def classify(self, slug: str, nome: str, linhas: Sequence[Sequence[str]]) -> str:
+        fp = fingerprint(linhas)
+        atual = self._atual.setdefault(slug, {'nome': nome, 'hashes': []})
+        atual['hashes'].append(fp)
+        anterior = self._anterior.get(slug)
+        if anterior is None:
+            estado = NOVO
+        elif fp in (anterior.get('hashes') or []):
+            estado = IGUAL
+        else:
+            estado = ALTERADO
+        self.contagem[estado] += 1
+        return estado
+
+    def removed(self) -> List[Tuple[str, str]]:
+        """(slug, nome) dos produtos do último export que não estão neste."""
+        return [(slug, (info or {}).get('nome') or slug)
+                for slug, info in self._anterior.items() if slug not in self._atual]
+
+    def save(self, arquivo: Optional[str] = None, manter_ausentes: bool = True) -> None:
+        """manter_ausentes: produtos do export anterior que não vieram agora continuam na referência."""
+        produtos = dict(self._atual)
+        if manter_ausentes:
+            for slug, info in self._anterior.items():
+                produtos.setdefault(slug, info)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp.write_text(json.dumps({
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'arquivo': arquivo,
+            'produtos': produtos,
+        }, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, self.path)
@@ -4,15 +4,36 @@
 # Regras: cabeÃ§alho csv_modelo.csv; UTF-8 BOM; ';'; 1 linha por tamanho;
 # Identificador URL (slug de album_folder_name); Categorias (tipo,continente,pais,regiao-se-br,especial,genero);
 # PreÃ§os: aplica preÃ§o padrÃ£o; se palavra-chave bater (palavra inteira), substitui; loga fonte do preÃ§o.
-import os, re, json, unicodedata
+# Escrita: csv_stream.CSVStreamWriter (streaming, aspas corretas, partes por csv.max_linhas_por_arquivo).
+# Delta: csv.exportar_delta=true grava catalogo_x_delta.csv (novos/alterados) via csv_delta; linhas de
+#        removidos só com csv.delta_catalogo_completo=true (cada export contém o catálogo inteiro).
+# Paralelo: csv.processos > 1 monta as linhas em lotes (csv.tamanho_lote) num pool de processos; ordem preservada.
+# Indice de precos: price_index.PriceIndex; faixas de regras_preco.json entram se csv.usar_regras_preco=true.
+# Desempenho: execucao "csv" do tracing com tempos de montagem (csv.linhas) e escrita (csv.gravar).
+import os, re, json, time
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 
+from . import text_norm
+from .team_matcher import TeamMatcher
+from .price_index import PriceIndex
+from .csv_stream import CSVStreamWriter
+from .csv_delta import CatalogFingerprints, IGUAL, NOVO, ALTERADO
+from . import cancelamento, tracing
+
 class CSVGenerator:
     def __init__(self, logger=None, config_manager=None):
         self.log = logger
         self.config = config_manager
+        self._equipes: Dict[str, Any] = {}
+        self._team_matcher = None
+        self._price_index = None
+        self.ultimos_arquivos: List[str] = []
+        self.ultimo_relatorio = None
         if self.log: 
             try: self.log.log("CSVGenerator inicializado", "DEBUG", "🧩")
             except Exception: pass
@@ -20,26 +41,19 @@ class CSVGenerator:
     # Helpers
     @staticmethod
     def _strip_accents(text: str) -> str:
-        if not text: return ''
-        return unicodedata.normalize('NFKD', text).encode('ASCII','ignore').decode('ASCII')
+        return text_norm.strip_accents(text)
 
     @staticmethod
     def _slug_from_name(name: str) -> str:
-        s = CSVGenerator._strip_accents((name or '').lower())
-        s = s.replace('/', '-').replace('\\', '-')
-        s = re.sub(r'\s+', '-', s)
-        s = re.sub(r'[^a-z0-9_-]+', '', s)
-        s = re.sub(r'-{2,}', '-', s).strip('-')
-        if len(s) > 120: s = s[:120].rstrip('-')
-        return s
+        return text_norm.slug_from_name(name or '')
 
     @staticmethod
     def _norm(s: str) -> str:
-        return CSVGenerator._strip_accents((s or '').lower())
+        return text_norm.norm(s)
 
     @staticmethod
     def _tokenize_words(s: str):
-        return re.findall(r'[a-z0-9]+', CSVGenerator._norm(s))
+        return list(text_norm.tokenize_words(s or ''))
 
     # Load tables
     def _load_equipes(self) -> Dict[str, Any]:
@@ -87,7 +101,11 @@ class CSVGenerator:
         return best, best_len
 
     def _team_info_for_product(self, product: Dict[str, Any]):
-        buckets = self._equipes
+        # Aho-Corasick sobre todas as chaves normalizadas (mesma semântica de _scan_bucket
+        # aplicado a brasileiros → internacionais → seleções), construído 1x por equipes.json
+        matcher = self._team_matcher
+        if matcher is None:
+            matcher = self._team_matcher = TeamMatcher.for_buckets(self._equipes, self._norm)
         candidates = [
             product.get('category',''),
             product.get('team_brand',''),
@@ -96,11 +114,7 @@ class CSVGenerator:
             product.get('page_title',''),
         ]
         for text in candidates:
-            info,_ = self._scan_bucket(text, buckets.get('times_brasileiros',{}))
-            if info: return info
-            info,_ = self._scan_bucket(text, buckets.get('times_internacionais',{}))
-            if info: return info
-            info,_ = self._scan_bucket(text, buckets.get('selecoes',{}))
+            info = matcher.find(text)
             if info: return info
         return {"tipo":"Outros","continente":"","pais":"","regiao":"","estado":"","is_national_team":False,"is_brazilian":False}
 
@@ -156,33 +170,31 @@ class CSVGenerator:
         return uniq
 
     # Prices
-    def _price_for_name(self, nome: str) -> Tuple[str,str,str]:
-        prices = self._prices or {}
-        padrao = prices.get("preco_padrao", {"preco":0.0,"preco_promocional":0.0})
-        preco = float(padrao.get("preco",0) or 0)
-        promo = float(padrao.get("preco_promocional",0) or 0)
-
-        source = "preço padrão"
-        n_tokens = set(self._tokenize_words(nome))
-
-        # match palabra inteira
-        best = None
-        for key, val in (prices.get("palavras_chave") or {}).items():
-            if not isinstance(val, dict): continue
-            k_tokens = set(self._tokenize_words(key))
-            if not k_tokens: continue
-            # palavra inteira: todos tokens da chave precisam estar em nome
-            if not k_tokens.issubset(n_tokens): 
+    def _load_price_rules(self) -> Dict[str, Any]:
+        """Faixas de regras_preco.json (multiplicador × preço base) — opt-in via csv.usar_regras_preco"""
+        if not (self.config and self.config.get("csv.usar_regras_preco", False)):
+            return {}
+        candidates = [
+            Path(__file__).resolve().parent / 'regras_preco.json',
+            Path(__file__).resolve().parent.parent / 'regras_preco.json',
+            Path(os.getcwd()) / 'regras_preco.json'
+        ]
+        for p in candidates:
+            try:
+                if p.exists():
+                    data = json.loads(p.read_text(encoding='utf-8'))
+                    if isinstance(data, dict):
+                        return data
+            except Exception:
                 continue
-            ppromo = float(val.get('preco_promocional', 0) or 0)
-            pfull  = float(val.get('preco', 0) or 0)
-            if best is None or ppromo > best[0] or (ppromo == best[0] and pfull > best[1]):
-                best = (ppromo, pfull, val, key)
+        return {}
 
-        if best:
-            promo = float(best[2].get('preco_promocional',0) or 0)
-            preco = float(best[2].get('preco',0) or 0)
-            source = f"palavra-chave: {best[3]}"
+    def _price_for_name(self, nome: str) -> Tuple[str,str,str]:
+        # índice invertido compilado 1x por carga de prices.json/regras_preco.json
+        index = self._price_index
+        if index is None:
+            index = self._price_index = PriceIndex(self._prices or {}, self._tokenize_words, self._load_price_rules())
+        preco, promo, source = index.lookup(nome)
 
         preco_s = f"{preco:.2f}" if preco>0 else ""
         promo_s = f"{promo:.2f}" if promo>0 else ""
@@ -201,18 +213,224 @@ class CSVGenerator:
             'MPN (Cód. Exclusivo Modelo Fabricante)', 'Sexo', 'Faixa etária', 'Custo'
         ]
 
-    def gerar_csv_ecommerce(self, produtos_combinados: List[Dict[str, Any]]) -> bool:
-        """Gera CSV para e-commerce a partir de produtos combinados - CORRIGIDO"""
+    def _stream_settings(self) -> Tuple[int, int]:
+        """(max_linhas por arquivo, flush a cada N linhas) de csv.* no config"""
+        max_linhas, flush = 0, 500
+        if self.config:
+            try:
+                max_linhas = int(self.config.get("csv.max_linhas_por_arquivo", 0) or 0)
+                flush = int(self.config.get("csv.flush_linhas", 500) or 500)
+            except Exception:
+                pass
+        return max_linhas, flush
+
+    def _product_rows(self, product: Dict[str, Any], nome: str) -> List[List[str]]:
+        """Linhas (1 por tamanho) de um produto"""
+        identificador = self._slug_from_name(nome)
+        categorias = self._categorias_str(product, nome)
+        sexo = 'Feminino' if re.search(r'\b(woman|women|female|feminino|feminina)\b', self._norm(nome)) else 'Unissex'
+        faixa = 'Infantil' if re.search(r'\bkids?\b', self._norm(nome)) else 'Jovens e Adultos'
+        preco, promo, fonte = self._price_for_name(nome)
+
+        if self.log:
+            try:
+                self.log.log(f"Preço aplicado ({fonte}) → {preco}/{promo or '—'}", "DEBUG", "💲")
+            except Exception:
+                pass
+
+        sizes = self._sizes_from_json(product) or ['']
+
+        rows: List[List[str]] = []
+        for sz in sizes:
+            row = [
+                identificador, nome, categorias,
+                'Tamanho', sz,
+                '', '', '', '',
+                preco, promo, '0.250', '', '', '',
+                '', '', '', 'NÃO', '',
+                '', '', '', '', '', 'SIM',
+                '', sexo, faixa, ''
+            ]
+            rows.append([str(x) if x is not None else '' for x in row])
+        return rows
+
+    def _pool_settings(self) -> Tuple[int, int]:
+        """(processos, produtos por lote) de csv.* no config; processos <= 1 = modo serial"""
+        processos, lote = 1, 2000
+        if self.config:
+            try:
+                processos = int(self.config.get("csv.processos", 1) or 1)
+                lote = int(self.config.get("csv.tamanho_lote", 2000) or 2000)
+            except Exception:
+                pass
+        if processos == 0:
+            processos = os.cpu_count() or 1
+        return processos, max(1, lote)
+
+    def _iter_rows(self, products: Iterator[Dict[str, Any]],
+                   name_keys: Tuple[str, ...]) -> Iterator[Tuple[str, List[List[str]]]]:
+        """(nome, linhas) por produto, na ordem de entrada; em lotes num pool de processos se csv.processos > 1"""
+        processos, lote = self._pool_settings()
+        if processos <= 1:
+            for product in products:
+                nome = _product_name(product, name_keys)
+                yield nome, self._product_rows(product, nome)
+            return
+
+        if self.log:
+            try:
+                self.log.log(f"CSV em paralelo: {processos} processos, lotes de {lote} produtos", "INFO", "⚙️")
+            except Exception:
+                pass
+        tabelas = (self._equipes, self._prices, self._load_price_rules())
+        with ProcessPoolExecutor(max_workers=processos, initializer=_pool_init, initargs=tabelas) as pool:
+            # janela limitada de lotes em voo: memória não cresce com o tamanho do catálogo
+            pendentes = deque()
+            try:
+                while True:
+                    while len(pendentes) < processos * 2:
+                        chunk = list(islice(products, lote))
+                        if not chunk:
+                            break
+                        pendentes.append(pool.submit(_pool_rows, chunk, name_keys))
+                    if not pendentes:
+                        break
+                    yield from pendentes.popleft().result()
+            except BaseException:
+                # cancelamento/erro: lotes ainda na fila não chegam a rodar
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    def _delta_settings(self) -> Tuple[bool, bool, bool]:
+        """(exportar delta, gerar catálogo completo, delta com removidos) de csv.* no config"""
+        delta, completo, catalogo_completo = False, True, False
+        if self.config:
+            try:
+                delta = bool(self.config.get("csv.exportar_delta", False))
+                completo = bool(self.config.get("csv.gerar_completo", True))
+                catalogo_completo = bool(self.config.get("csv.delta_catalogo_completo", False))
+            except Exception:
+                pass
+        return delta, completo or not delta, catalogo_completo
+
+    def _removed_row(self, slug: str, nome: str) -> List[str]:
+        """Linha do delta para produto que saiu do catálogo: estoque 0 e oculto"""
+        row = [''] * len(self._headers())
+        row[0], row[1], row[15], row[18] = slug, nome, '0', 'NÃO'
+        return row
+
+    def _write_products(self, products: Iterator[Dict[str, Any]], output_filename: str,
+                        name_keys: Tuple[str, ...], catalogo_completo: Optional[bool] = None) -> List[str]:
+        """Grava o catálogo dentro da execução "csv" do tracing (relatório em Logs/)"""
+        gravar = bool(self.config.get("desempenho.relatorio", True)) if self.config else True
+        with tracing.execucao("csv", gravar=gravar) as run:
+            arquivos = self._stream_products(products, output_filename, name_keys, catalogo_completo)
+            run.set(arquivos=len(arquivos))
+        self.ultimo_relatorio = run.arquivo
+        return arquivos
+
+    def _stream_products(self, products: Iterator[Dict[str, Any]], output_filename: str,
+                         name_keys: Tuple[str, ...], catalogo_completo: Optional[bool] = None) -> List[str]:
+        """Consome os produtos um a um e grava em streaming; retorna os arquivos gerados.
+        catalogo_completo: estes produtos são a loja inteira (ausentes viram removidos no delta);
+        None = csv.delta_catalogo_completo do config"""
+        max_linhas, flush = self._stream_settings()
+        exportar_delta, completo, remover = self._delta_settings()
+        if catalogo_completo is not None:
+            remover = catalogo_completo
+        raiz, ext = os.path.splitext(output_filename)
+        full = CSVStreamWriter(output_filename, self._headers(), max_linhas=max_linhas, flush_linhas=flush) if completo else None
+        delta = CSVStreamWriter(f"{raiz}_delta{ext or '.csv'}", self._headers(), max_linhas=max_linhas,
+                                flush_linhas=flush) if exportar_delta else None
+        fps = CatalogFingerprints(Path(output_filename).parent / 'ultimo_catalogo.json') if exportar_delta else None
+        arquivos: List[str] = []
+        # tempos somados no laço (um span por produto pesaria mais que a própria linha)
+        relogio = time.perf_counter if tracing.ativo() else None
+        montar = gravar = 0.0
+        produtos = 0
+        try:
+            t = relogio() if relogio else 0.0
+            for nome, linhas in self._iter_rows(products, name_keys):
+                if relogio:
+                    t1 = relogio()
+                    montar += t1 - t
+                produtos += 1
+                cancelamento.verificar()
+                if full:
+                    full.write_group(linhas)
+                if fps and fps.classify(linhas[0][0], nome, linhas) != IGUAL:
+                    delta.write_group(linhas)
+                if relogio:
+                    t = relogio()
+                    gravar += t - t1
+            if relogio:
+                tracing.registrar("csv.linhas", montar, produtos=produtos)
+                tracing.registrar("csv.gravar", gravar)
+            removidos = fps.removed() if fps and remover else []
+            for slug, nome in removidos:
+                delta.write_group([self._removed_row(slug, nome)])
+        finally:
+            if full:
+                arquivos += full.close()
+            if delta and (delta.arquivos or not full):
+                arquivos += delta.close()
+
+        self.ultimos_arquivos = arquivos
+        if full and self.log and len(full.arquivos) > 1:
+            try:
+                self.log.log(f"CSV dividido em {len(full.arquivos)} partes ({full.total_linhas} linhas)", "INFO", "✂️")
+            except Exception:
+                pass
+        if fps:
+            # só agora o catálogo gravado vira a referência do próximo delta
+            fps.save(output_filename if full else None, manter_ausentes=not remover)
+            if self.log:
+                try:
+                    c = fps.contagem
+                    self.log.log(f"Delta: {c[NOVO]} novos, {c[ALTERADO]} alterados, {len(removidos)} removidos, "
+                                 f"{c[IGUAL]} sem mudança", "INFO", "🔁")
+                except Exception:
+                    pass
+        return arquivos
+
+    def _iter_products(self, json_files: Iterable) -> Iterator[Dict[str, Any]]:
+        """Produtos dos JSONs, um arquivo por vez"""
+        for f in json_files:
+            try:
+                # Converte para Path se for string
+                file_path = Path(f) if isinstance(f, str) else f
+                data = json.loads(file_path.read_text(encoding='utf-8'))
+                if isinstance(data, dict):
+                    items = data.get('items') or data.get('produtos') or data.get('produtos_extraidos') or []
+                else:
+                    items = data
+            except Exception as e:
+                file_name = f.name if hasattr(f, 'name') else str(f)
+                if self.log:
+                    try: self.log.log(f"Erro lendo {file_name}: {e}", "ERROR", "❌")
+                    except Exception: pass
+                continue
+            if isinstance(items, list):
+                yield from items
+
+    def gerar_csv_ecommerce(self, produtos_combinados: Iterable[Dict[str, Any]],
+                            catalogo_completo: Optional[bool] = None) -> bool:
+        """Gera CSV para e-commerce a partir de produtos combinados (lista ou gerador).
+        catalogo_completo: ver _stream_products (None = config)"""
         try:
             self._equipes = self._load_equipes()
+            self._team_matcher = None
             self._prices = self._load_prices()
+            self._price_index = None
             if self.log:
                 try: 
                     self.log.log("📚 Tabelas carregadas (equipes, prices)", "INFO", "📚")
                 except Exception: 
                     pass
 
-            if not produtos_combinados:
+            produtos = iter(produtos_combinados or ())
+            primeiro = next(produtos, None)
+            if primeiro is None:
                 if self.log:
                     try:
                         self.log.log("Nenhum produto para processar", "WARNING", "⚠️")
@@ -223,45 +441,13 @@ class CSVGenerator:
             # Gera nome do arquivo
             ts = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_filename = f"csv_gerados/catalogo_{ts}.csv"
-            os.makedirs(os.path.dirname(output_filename), exist_ok=True)
 
-            rows: List[List[str]] = [self._headers()]
-
-            for product in produtos_combinados:
-                nome = product.get('album_folder_name') or product.get('album_title') or product.get('page_title') or 'Produto'
-                identificador = self._slug_from_name(nome)
-                categorias = self._categorias_str(product, nome)
-                sexo = 'Feminino' if re.search(r'\b(woman|women|female|feminino|feminina)\b', self._norm(nome)) else 'Unissex'
-                faixa = 'Infantil' if re.search(r'\bkids?\b', self._norm(nome)) else 'Jovens e Adultos'
-                preco, promo, fonte = self._price_for_name(nome)
-
-                if self.log:
-                    try: 
-                        self.log.log(f"Preço aplicado ({fonte}) → {preco}/{promo or '—'}", "DEBUG", "💲")
-                    except Exception: 
-                        pass
-
-                sizes = self._sizes_from_json(product) or ['']
-
-                for sz in sizes:
-                    row = [
-                        identificador, nome, categorias,
-                        'Tamanho', sz,
-                        '', '', '', '',
-                        preco, promo, '0.250', '', '', '',
-                        '', '', '', 'NÃO', '',
-                        '', '', '', '', '', 'SIM',
-                        '', sexo, faixa, ''
-                    ]
-                    rows.append([str(x) if x is not None else '' for x in row])
-
-            with open(output_filename, 'w', encoding='utf-8-sig', newline='') as f:
-                for row in rows:
-                    f.write(';'.join(row) + '\n')
+            arquivos = self._write_products(chain((primeiro,), produtos), output_filename,
+                                            ('album_folder_name', 'album_title', 'page_title'), catalogo_completo)
 
             if self.log:
                 try: 
-                    self.log.log(f"✅ CSV gerado: {output_filename}", "SUCCESS", "✅")
+                    self.log.log(f"✅ CSV gerado: {', '.join(arquivos)}", "SUCCESS", "✅")
                 except Exception: 
                     pass
             return True
@@ -277,70 +463,53 @@ class CSVGenerator:
     def generate_csv(self, json_files: List, output_filename: str|None=None):
         """Método de compatibilidade - aceita lista de strings ou Paths"""
         self._equipes = self._load_equipes()
+        self._team_matcher = None
         self._prices = self._load_prices()
+        self._price_index = None
         if self.log:
             try: self.log.log("📚 Tabelas carregadas (equipes, prices)", "INFO", "📚")
             except Exception: pass
 
-        products: List[Dict[str, Any]] = []
-        for f in json_files:
-            try:
-                # Converte para Path se for string
-                file_path = Path(f) if isinstance(f, str) else f
-                data = json.loads(file_path.read_text(encoding='utf-8'))
-                if isinstance(data, dict):
-                    items = data.get('items') or data.get('produtos') or data.get('produtos_extraidos') or []
-                else:
-                    items = data
-                if isinstance(items, list):
-                    products.extend(items)
-            except Exception as e:
-                file_name = f.name if hasattr(f, 'name') else str(f)
-                if self.log: 
-                    try: self.log.log(f"Erro lendo {file_name}: {e}", "ERROR", "❌")
-                    except Exception: pass
-
-        if not products:
+        products = self._iter_products(json_files)
+        primeiro = next(products, None)
+        if primeiro is None:
             return None
 
         if not output_filename:
             ts = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_filename = f"csv_gerados/catalogo_{ts}.csv"
-        os.makedirs(os.path.dirname(output_filename), exist_ok=True)
-
-        rows: List[List[str]] = [self._headers()]
 
-        for product in products:
-            nome = product.get('album_folder_name') or product.get('page_title') or 'Produto'
-            identificador = self._slug_from_name(nome)
-            categorias = self._categorias_str(product, nome)
-            sexo = 'Feminino' if re.search(r'\b(woman|women|female|feminino|feminina)\b', self._norm(nome)) else 'Unissex'
-            faixa = 'Infantil' if re.search(r'\bkids?\b', self._norm(nome)) else 'Jovens e Adultos'
-            preco, promo, fonte = self._price_for_name(nome)
-
-            if self.log:
-                try: self.log.log(f"Preço aplicado ({fonte}) → {preco}/{promo or '—'}", "DEBUG", "💲")
-                except Exception: pass
-
-            sizes = self._sizes_from_json(product) or ['']
-
-            for sz in sizes:
-                row = [
-                    identificador, nome, categorias,
-                    'Tamanho', sz,
-                    '', '', '', '',
-                    preco, promo, '0.250', '', '', '',
-                    '', '', '', 'NÃO', '',
-                    '', '', '', '', '', 'SIM',
-                    '', sexo, faixa, ''
-                ]
-                rows.append([str(x) if x is not None else '' for x in row])
-
-        with open(output_filename, 'w', encoding='utf-8-sig', newline='') as f:
-            for row in rows:
-                f.write(';'.join(row) + '\n')
+        arquivos = self._write_products(chain((primeiro,), products), output_filename,
+                                        ('album_folder_name', 'page_title'))
 
         if self.log:
-            try: self.log.log(f"✅ CSV gerado: {output_filename}", "SUCCESS", "✅")
+            try: self.log.log(f"✅ CSV gerado: {', '.join(arquivos)}", "SUCCESS", "✅")
             except Exception: pass
-        return output_filename
\ No newline at end of file
+        return arquivos[0] if arquivos else output_filename
+
+
+# ---------------------------------------------------------------------------
+# Pool de processos (csv.processos > 1): cada worker recebe as tabelas uma vez
+# ---------------------------------------------------------------------------
+_WORKER_GEN = None
+
+
+def _product_name(product: Dict[str, Any], name_keys: Tuple[str, ...]) -> str:
+    return next((product.get(k) for k in name_keys if product.get(k)), None) or 'Produto'
+
+
+def _pool_init(equipes: Dict[str, Any], prices: Dict[str, Any], regras: Dict[str, Any]) -> None:
+    global _WORKER_GEN
+    gen = CSVGenerator()
+    gen._equipes = equipes
+    gen._prices = prices
+    gen._price_index = PriceIndex(prices or {}, gen._tokenize_words, regras)
+    _WORKER_GEN = gen
+
+
+def _pool_rows(chunk: List[Dict[str, Any]], name_keys: Tuple[str, ...]) -> List[Tuple[str, List[List[str]]]]:
+    out = []
+    for product in chunk:
+        nome = _product_name(product, name_keys)
+        out.append((nome, _WORKER_GEN._product_rows(product, nome)))
+    return out
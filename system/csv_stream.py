@@ -0,0 +1,89 @@
+# Módulo: csv_stream.py
+# Função: escrever o CSV do catálogo em streaming (memória constante) com aspas corretas.
+# Chamadas: CSVGenerator.gerar_csv_ecommerce / generate_csv -> CSVStreamWriter.write_group(linhas)
+# Regras:
+#  - módulo csv (QUOTE_MINIMAL): ';', aspas ou quebras de linha dentro do campo não quebram o arquivo;
+#  - UTF-8 BOM em cada arquivo; cabeçalho repetido em cada parte;
+#  - flush a cada `flush_linhas` linhas;
+#  - max_linhas > 0 → divide em partes (catalogo_x.csv, catalogo_x_parte2.csv, ...) sem separar
+#    as linhas (tamanhos) de um mesmo produto.
+
+import csv
+import os
+from typing import Iterable, List, Optional, Sequence
+
+
+class CSVStreamWriter:
+    def __init__(self, path: str, headers: Sequence[str], max_linhas: int = 0,
+                 flush_linhas: int = 500, delimiter: str = ';'):
+        self.base_path = path
+        self.headers = list(headers)
+        self.max_linhas = max(0, int(max_linhas or 0))
+        self.flush_linhas = max(1, int(flush_linhas or 1))
+        self.delimiter = delimiter
+        self.arquivos: List[str] = []
+        self.total_linhas = 0
+        self._f = None
+        self._writer = None
+        self._linhas_parte = 0
+        self._pendentes = 0
+
+    def _part_path(self, n: int) -> str:
+        if n == 1:
+            return self.base_path
+        raiz, ext = os.path.splitext(self.base_path)
+        return f"{raiz}_parte{n}{ext or '.csv'}"
+
+    def _open_next(self) -> None:
+        self._close_file()
+        path = self._part_path(len(self.arquivos) + 1)
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._f = open(path, 'w', encoding='utf-8-sig', newline='')
+        self._writer = csv.writer(self._f, delimiter=self.delimiter, quoting=csv.QUOTE_MINIMAL,
+                                  lineterminator='\n')
+        self._writer.writerow(self.headers)
+        self.arquivos.append(path)
+        self._linhas_parte = 0
+
+    def _close_file(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            self._writer = None
+
+    def write_group(self, linhas: Sequence[Sequence[Optional[object]]]) -> None:
+        """Linhas de um produto; nunca são divididas entre duas partes."""
+        if not linhas:
+            return
+        if self._f is None:
+            self._open_next()
+        elif self.max_linhas and self._linhas_parte and self._linhas_parte + len(linhas) > self.max_linhas:
+            self._open_next()
+        for row in linhas:
+            self._writer.writerow(['' if x is None else str(x) for x in row])
+        self._linhas_parte += len(linhas)
+        self.total_linhas += len(linhas)
+        self._pendentes += len(linhas)
+        if self._pendentes >= self.flush_linhas:
+            self._f.flush()
+            self._pendentes = 0
+
+    def write_groups(self, grupos: Iterable[Sequence[Sequence[Optional[object]]]]) -> int:
+        for linhas in grupos:
+            self.write_group(linhas)
+        return self.total_linhas
+
+    def close(self) -> List[str]:
+        # sem nenhuma linha ainda gera o arquivo só com cabeçalho (comportamento antigo)
+        if not self.arquivos:
+            self._open_next()
+        self._close_file()
+        return self.arquivos
+
+    def __enter__(self) -> "CSVStreamWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -2,7 +2,8 @@
 # Módulo: data_processor_main.py (corrigido)
 # Ajustes: reconhecer categorias /products/.../ e reforçar logs quando não houver expansão.
 
-import json, os, re
+import json, os, threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -10,41 +11,29 @@ from .scraper_engine import get_metadata
 from .metadata.url_analyzer import URLAnalyzer
 from .metadata.size_rules import normalize_sizes
 from .category_crawler import CategoryCrawler
-
-FORBIDDEN = set('<>:"\\|?*')  # removemos '/' daqui para tratá-lo separadamente
+from .classificador_url import chave_url, eh_categoria
+from .indice_vistos import ETAPA_METADADOS, get_indice_vistos
+from .metadata.metadata_generator import MetadataGenerator
+from .text_norm import intersecao_textual, sanitize_win
+from .metadata_index import registrar_arquivo
+from .fronteira import Fronteira
+from .agendador import Agendador
+from . import cancelamento, metrics, tracing
 
 def _intersecao_textual(a: str, b: str) -> str:
-    a, b = (a or '').strip(), (b or '').strip()
-    if not a: return b
-    if not b: return a
-    if a.lower() in b.lower(): base = a
-    elif b.lower() in a.lower(): base = b
-    else:
-        aw, bw = a.split(), b.split()
-        common = []
-        for i in range(min(len(aw), len(bw))):
-            if aw[i].lower() == bw[i].lower(): common.append(aw[i])
-            else: break
-        base = ' '.join(common) if common else a
-    base = base.replace('25/26','25-26')
-    base = re.sub(r'(S-\s*X{1,4}L)\d+', r'\1', base, flags=re.I)
-    base = re.sub(r'(S-\s*\dXL)\d*', r'\1', base, flags=re.I)
-    return base.strip()
+    return intersecao_textual(a or '', b or '')
 
 def _sanitize_win(name: str) -> str:
-    # Substitui '/' explicitamente por '-'
-    name = name.replace('/', '-')
-    # Remove demais caracteres proibidos
-    cleaned = ''.join(ch for ch in name if ch not in FORBIDDEN).strip()
-    while cleaned.endswith((' ', '.')):
-        cleaned = cleaned[:-1]
-    return cleaned[:120] if len(cleaned) > 120 else cleaned
-
-def _dedupe(seq):
+    # '/' vira '-', demais caracteres proibidos são removidos (ver text_norm.sanitize_win)
+    return sanitize_win(name)
+
+def _dedupe(seq, chave=chave_url):
+    # compara pela forma canônica (http/https, rastreio, barra final); mantém a primeira grafia
     seen, out = set(), []
     for s in seq or []:
-        if s and s not in seen:
-            seen.add(s); out.append(s)
+        k = chave(s) if s else None
+        if k and k not in seen:
+            seen.add(k); out.append(s)
     return out
 
 class DataProcessor:
@@ -54,92 +43,189 @@ class DataProcessor:
         self.category_crawler = CategoryCrawler(logger)
 
     def _is_category_url(self, url: str) -> bool:
-        url_lower = url.lower()
-        wordpress_patterns = [
-            '/category/', '/product-category/', '/collection/', '/collections/',
-            '/shop/', '/store/', '/catalogo/', '/produtos/', '/search/',
-            '/products/'  # <- adicionado suporte explícito
-        ]
-        yupoo_patterns = ['/search/', '/categories/', 'search?', 'category?']
-        for pattern in wordpress_patterns + yupoo_patterns:
-            if pattern in url_lower:
-                return True
-        if "?s=" in url_lower:
-            return True
+        return eh_categoria(url)
 
-        search_params = ['search=', 'q=', 'category=', 'cat=', 'tag=']
-        for param in search_params:
-            if param in url_lower:
-                return True
-        return False
+    def _expand_category_urls(self, urls: list[str], fronteira: Fronteira, agendador: Agendador,
+                              forcar: bool = False) -> int:
+        """Produtor: URLs diretas e produtos das categorias entram na fronteira conforme são
+        descobertos (a extração já consome enquanto o crawl pagina). As categorias de todas as
+        lojas são percorridas juntas pelo agendador (rodízio entre lojas, cortesia por domínio).
+        Álbuns já coletados em execuções anteriores ficam de fora (forcar=True refaz); devolve quantos."""
+        indice = get_indice_vistos()
+        pulados = []  # emitir roda nos workers do agendador: list.append é atômico
+
+        def emitir(url: str, prioridade: int) -> bool:
+            # filtro de qualquer URL de categoria que tenha escapado; a fronteira deduplica pela chave
+            # canônica, mas busca e grava a URL como veio
+            if self._is_category_url(url):
+                return False
+            if not forcar and indice.visto(url, ETAPA_METADADOS):
+                pulados.append(url)
+                return False
+            if not fronteira.put(url, prioridade, chave=chave_url(url)):
+                return False
+            metrics.add("bora_metadados_pendentes", 1)
+            return True
 
-    def _expand_category_urls(self, urls: list[str]) -> list[str]:
-        expanded_urls = []
+        categorias = []
         for url in urls:
+            cancelamento.verificar()
             if self._is_category_url(url):
                 self.logger.log(f"📂 Detectada categoria: {url}", "INFO", "📂")
-                try:
-                    product_urls = self.category_crawler.collect_products(url)
-                    if product_urls:
-                        self.logger.log(f"✅ Expandida: {len(product_urls)} produtos encontrados", "SUCCESS", "✅")
-                        expanded_urls.extend(product_urls)
-                    else:
-                        self.logger.log(f"⚠️ Nenhum produto encontrado na categoria: {url}", "WARNING", "⚠️")
-                except Exception as e:
-                    self.logger.log(f"❌ Erro ao expandir categoria: {str(e)}", "ERROR", "❌")
+                categorias.append(url)
             else:
-                expanded_urls.append(url)
-        # Deduplicação e filtro para remover qualquer URL de categoria que tenha escapado
-        unique_urls, seen = [], set()
-        for url in expanded_urls:
-            if url not in seen and not self._is_category_url(url):
-                seen.add(url)
-                unique_urls.append(url)
-        return unique_urls
-
-    def processar_metadados(self, urls: list[str]) -> dict:
+                emitir(url, 0)  # URL direta: à frente dos produtos das páginas de categoria
+        if categorias:
+            stats = agendador.executar(categorias, emitir)
+            if stats["produtos"] or stats["retomados"]:
+                self.logger.log(f"✅ Expandida: {stats['produtos']} produtos encontrados em {stats['paginas']} "
+                                f"página(s) de {stats['lojas']} loja(s)", "SUCCESS", "✅")
+            elif not pulados:
+                self.logger.log("⚠️ Nenhum produto encontrado nas categorias", "WARNING", "⚠️")
+            if stats["retomados"]:
+                self.logger.log(f"↪️ {stats['retomados']} produto(s) pendentes da execução anterior", "INFO", "↪️")
+            if stats["adiadas"] or stats["erros"]:
+                self.logger.log(f"⏸️ {stats['adiadas']} categoria(s) adiadas pelo orçamento e {stats['erros']} "
+                                f"com erro: continuam na próxima execução", "WARNING", "⏸️")
+        if pulados:
+            self.logger.log(f"⏭️ {len(pulados)} álbum(ns) já coletado(s) em execuções anteriores "
+                            f"(use forçar para refazer)", "INFO", "⏭️")
+        return len(pulados)
+
+    def _coletar_item(self, url: str, idx: int, total: int, refresh: bool = False):
+        """Metadados de uma URL de produto (dict do JSON) ou None em caso de falha.
+        refresh=True ignora o cache de álbuns (título/tamanhos/imagens recolhidos da página)."""
+        try:
+            cancelamento.verificar()  # itens ainda na fila do pool saem na hora após o cancelamento
+            with tracing.span("item", url=url):
+                item = self._extrair_item(url, idx, total, refresh)
+        finally:
+            metrics.add("bora_metadados_pendentes", -1)
+        metrics.inc("bora_metadados_urls_total", resultado="ok" if item else "falha")
+        return item
+
+    def _extrair_item(self, url: str, idx: int, total: int, refresh: bool = False):
+        try:
+            posicao = f"{idx}/{total}" if total else f"{idx}"  # total desconhecido enquanto o crawl segue
+            self.logger.log(f"🔎 Analisando URL {posicao}: {url}", "INFO", "🔎")
+            info = URLAnalyzer.analyze(url)
+            self.logger.log(f"🧭 Plataforma: {info['platform']} | Entidade: {info['entity']}", "DEBUG", "🧭")
+            meta = get_metadata(url, info["platform"], refresh=refresh)
+            # get_metadata devolve um dict vazio (sem título e sem imagens) quando a coleta falha:
+            # não é álbum coletado — não entra no índice de vistos e volta na próxima execução
+            if not meta or not (meta.get("album_title") or meta.get("page_title") or meta.get("images_candidates")):
+                self.logger.log(f"❌ Falha ao extrair metadados de: {url}", "ERROR", "❌")
+                return None
+            album_title = (meta.get("album_title") or "").strip()
+            page_title = (meta.get("page_title") or "").strip()
+            folder_base = _intersecao_textual(page_title, album_title) or album_title or page_title
+            album_folder_name = _sanitize_win(folder_base)
+            sizes = normalize_sizes(album_title, meta.get("raw_sizes"))
+            images = _dedupe(meta.get("images_candidates", []), chave=lambda s: s)  # query distingue imagens
+            album_id = MetadataGenerator._derive_album_id(url)
+            return {
+                "album_url": url,
+                "album_title": album_title,
+                "page_title": page_title,
+                "album_folder_name": album_folder_name,
+                "sizes": sizes,
+                "image_urls": images,
+                "album_id": album_id
+            }
+        except Exception as e:
+            self.logger.log(f"❌ Erro no processamento da URL: {str(e)}", "ERROR", "❌")
+            return None
+
+    def processar_metadados(self, urls: list[str], workers: int = 1, forcar: bool = False) -> dict:
+        """workers > 1: URLs coletadas em paralelo (ritmo por host continua no rate_limiter); ordem preservada.
+        forcar: coleta também os álbuns que o índice de vistos já registrou e ignora o cache de álbuns."""
         if not urls:
             self.logger.log("Nenhuma URL fornecida para processamento", "WARNING", "⚠️")
             return {"ok": False, "erro": "Lista de URLs vazia"}
+        gravar = bool(self.config.get("desempenho.relatorio", True)) if self.config else True
+        with tracing.execucao("metadados", gravar=gravar, urls=len(urls), workers=workers) as run:
+            try:
+                resultado = self._processar_metadados(urls, workers, forcar)
+            except cancelamento.Cancelado as c:
+                self.logger.log(f"⏹️ Coleta de metadados interrompida: {c}", "WARNING", "⏹️")
+                resultado = {"ok": False, "erro": f"Coleta cancelada ({c})", "cancelado": True}
+            run.set(**{k: resultado.get(k) for k in ("total_urls", "sucessos", "falhas") if k in resultado})
+        if run.arquivo:
+            resultado["relatorio_desempenho"] = str(run.arquivo)
+            resultado["desempenho"] = run.resumo()
+            for linha in resultado["desempenho"]:
+                self.logger.log(f"⏱️ {linha}", "INFO", "⏱️")
+        return resultado
+
+    def _processar_metadados(self, urls: list[str], workers: int, forcar: bool) -> dict:
+        urls = _dedupe(urls)  # variantes da mesma URL (?uid=1, http/https) contam uma vez
         self.logger.log(f"🔍 Analisando {len(urls)} URL(s) de entrada...", "INFO", "🔍")
-        expanded_urls = self._expand_category_urls(urls)
-        if len(expanded_urls) != len(urls):
-            self.logger.log(f"📈 Expansão concluída: {len(urls)} → {len(expanded_urls)} URLs", "INFO", "📈")
-        itens, total = [], len(expanded_urls)
-        self.logger.log(f"▶️ Iniciando processamento de {total} URL(s)...", "INFO", "▶️")
-        for idx, url in enumerate(expanded_urls, 1):
+        resultados = []  # (seq, item): a ordem de descoberta é restaurada no fim
+        agendador = Agendador.do_config(self.category_crawler, self.logger, self.config)
+        indice = get_indice_vistos()
+        pulados = 0
+        with Fronteira.do_config(self.config) as fronteira:
+            falha_produtor = []
+
+            def produzir():
+                nonlocal pulados
+                try:
+                    with tracing.span("expandir", entradas=len(urls)):
+                        pulados = self._expand_category_urls(urls, fronteira, agendador, forcar)
+                except BaseException as e:  # Cancelado inclusive: repassado abaixo
+                    falha_produtor.append(e)
+                finally:
+                    fronteira.fechar()
+
+            def consumir():
+                for entrada in fronteira:
+                    item = self._coletar_item(entrada.url, entrada.seq, None, refresh=forcar)
+                    resultados.append((entrada.seq, item))
+                    if item:
+                        indice.marcar(entrada.url, ETAPA_METADADOS)
+                    agendador.processado(entrada.url, ok=bool(item))  # falha volta na próxima execução
+
+            produtor = threading.Thread(target=tracing.propagar(produzir), daemon=True, name="bora-fronteira")
+            produtor.start()
+            self.logger.log("▶️ Iniciando processamento conforme as URLs são descobertas...", "INFO", "▶️")
             try:
-                self.logger.log(f"🔎 Analisando URL {idx}/{total}: {url}", "INFO", "🔎")
-                info = URLAnalyzer.analyze(url)
-                self.logger.log(f"🧭 Plataforma: {info['platform']} | Entidade: {info['entity']}", "DEBUG", "🧭")
-                meta = get_metadata(url, info["platform"])
-                if not meta:
-                    self.logger.log(f"❌ Falha ao extrair metadados de: {url}", "ERROR", "❌")
-                    continue
-                album_title = (meta.get("album_title") or "").strip()
-                page_title = (meta.get("page_title") or "").strip()
-                folder_base = _intersecao_textual(page_title, album_title) or album_title or page_title
-                album_folder_name = _sanitize_win(folder_base)
-                sizes = normalize_sizes(album_title, meta.get("raw_sizes"))
-                images = _dedupe(meta.get("images_candidates", []))
-                album_id = (url.split("/")[-1] or "").split("?")[0]
-                itens.append({
-                    "album_url": url,
-                    "album_title": album_title,
-                    "page_title": page_title,
-                    "album_folder_name": album_folder_name,
-                    "sizes": sizes,
-                    "image_urls": images,
-                    "album_id": album_id
-                })
-            except Exception as e:
-                self.logger.log(f"❌ Erro no processamento da URL: {str(e)}", "ERROR", "❌")
-                continue
+                try:
+                    if workers > 1:
+                        coletar = tracing.propagar(consumir)  # spans dos workers ficam sob esta execução
+                        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bora-meta") as pool:
+                            for f in [pool.submit(coletar) for _ in range(workers)]:
+                                f.result()
+                    else:
+                        consumir()
+                finally:
+                    # se os consumidores falharem, o produtor para de paginar (o estado fica para a retomada)
+                    fronteira.fechar()
+                    agendador.parar()
+                    produtor.join()
+                if falha_produtor:
+                    raise falha_produtor[0]
+                agendador.finalizar()
+            finally:
+                agendador.fechar()
+            resumo = fronteira.resumo()
+        total = resumo["adicionadas"]
+        if total != len(urls):
+            self.logger.log(f"📈 Expansão concluída: {len(urls)} → {total} URLs", "INFO", "📈")
+        if resumo["para_disco"]:
+            self.logger.log(f"💾 Fronteira: {resumo['para_disco']} URL(s) passaram pelo disco", "DEBUG", "💾")
+        resultados = [r for _, r in sorted(resultados, key=lambda t: t[0])]
+        itens = [r for r in resultados if r]
         if not itens:
+            if pulados and not total:
+                return {"ok": False, "erro": "Todos os álbuns já foram coletados (use forçar para refazer)",
+                        "pulados": pulados}
             return {"ok": False, "erro": "Nenhum metadado gerado"}
         outdir = Path("Metadados"); outdir.mkdir(exist_ok=True)
         ts = datetime.now().strftime("%Y%m%d-%H%M%S")
         outpath = outdir / f"metadados-{ts}.json"
-        with open(outpath, "w", encoding="utf-8") as f:
-            json.dump(itens, f, ensure_ascii=False, indent=2)
-        return {"ok": True, "arquivo": str(outpath), "total_urls": len(expanded_urls), "sucessos": len(itens), "falhas": len(expanded_urls) - len(itens)}
+        with tracing.span("gravar", itens=len(itens)):
+            with open(outpath, "w", encoding="utf-8") as f:
+                json.dump(itens, f, ensure_ascii=False, indent=2)
+            registrar_arquivo(outpath, itens)
+        return {"ok": True, "arquivo": str(outpath), "total_urls": total, "sucessos": len(itens), "falhas": total - len(itens),
+                "pulados": pulados}
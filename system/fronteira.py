@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+fronteira.py — Fila de URLs do crawl com deduplicação, prioridades e baldes por host
+- put(url, prioridade) de qualquer thread (crawler); get()/iteração de quem extrai, enquanto o
+  crawl ainda descobre URLs (fechar() avisa que não virão mais)
+- Um balde por host, servidos em rodízio: várias lojas avançam juntas; no balde, menor prioridade
+  primeiro e, empatando, ordem de chegada
+- Memória limitada: passando de limite_memoria pendentes, as novas URLs vão para um SQLite
+  temporário (cache/fronteira-*.sqlite3) e voltam aos baldes conforme eles esvaziam;
+  passando de limite_vistos, o conjunto de deduplicação também vai para o disco
+- Cancelamento: get() acorda com o token do contexto (system.cancelamento)
+
+Uso:
+    with Fronteira(limite_memoria=5000) as f:
+        f.put("https://x.yupoo.com/albums/1", prioridade=1)   # False se já visto
+        f.fechar()
+        for entrada in f:       # Entrada(seq, url, host, prioridade)
+            ...
+"""
+from __future__ import annotations
+
+import heapq
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from . import cancelamento
+
+DEFAULTS = {"limite_memoria": 5000, "limite_vistos": 100000, "pasta": "cache"}
+_ESPERA_S = 0.25  # fatia de espera de get(): confere o cancelamento entre fatias
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pendentes (
+    seq        INTEGER PRIMARY KEY,
+    host       TEXT NOT NULL,
+    prioridade INTEGER NOT NULL,
+    url        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pendentes_host ON pendentes(host, prioridade, seq);
+CREATE TABLE IF NOT EXISTS vistos (url TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+
+
+class Entrada(NamedTuple):
+    seq: int
+    url: str
+    host: str
+    prioridade: int
+
+
+class Fronteira:
+    def __init__(self, limite_memoria: int = DEFAULTS["limite_memoria"],
+                 limite_vistos: int = DEFAULTS["limite_vistos"], pasta: Path = Path(DEFAULTS["pasta"])):
+        self.limite_memoria = max(1, int(limite_memoria))
+        self.limite_vistos = max(1, int(limite_vistos))
+        self.pasta = Path(pasta)
+        self._baldes: "OrderedDict[str, List[tuple]]" = OrderedDict()  # host -> heap (prioridade, seq, url)
+        self._em_memoria = 0
+        self._em_disco = 0
+        self._vistos: Optional[set] = set()  # None = deduplicação no SQLite
+        self._seq = 0
+        self._fechada = False
+        self._db: Optional[sqlite3.Connection] = None
+        self._arquivo: Optional[Path] = None
+        self._cond = threading.Condition()
+        self.stats = {"adicionadas": 0, "repetidas": 0, "entregues": 0, "para_disco": 0}
+
+    @classmethod
+    def do_config(cls, config) -> "Fronteira":
+        """Limites de config "fronteira" (ConfigManager/CLIConfig com get('a.b') ou dict)."""
+        cfg = dict(DEFAULTS)
+        sec = config.get("fronteira") if config is not None else None
+        cfg.update(sec or {})
+        return cls(cfg["limite_memoria"], cfg["limite_vistos"], Path(cfg["pasta"]))
+
+    # ------------------------------ SQLite ------------------------------
+    def _disco(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            fd, nome = tempfile.mkstemp(prefix="fronteira-", suffix=".sqlite3", dir=self.pasta)
+            os.close(fd)
+            self._arquivo = Path(nome)
+            # só esta instância usa o arquivo, sempre sob self._cond
+            self._db = sqlite3.connect(nome, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _vistos_para_disco(self) -> None:
+        db = self._disco()
+        db.execute("BEGIN")
+        db.executemany("INSERT OR IGNORE INTO vistos(url) VALUES (?)", ((u,) for u in self._vistos))
+        db.execute("COMMIT")
+        self._vistos = None
+
+    def _marcar_visto(self, url: str) -> bool:
+        """True se a URL é nova."""
+        if self._vistos is not None:
+            if url in self._vistos:
+                return False
+            self._vistos.add(url)
+            if len(self._vistos) > self.limite_vistos:
+                self._vistos_para_disco()
+            return True
+        return self._disco().execute("INSERT OR IGNORE INTO vistos(url) VALUES (?)", (url,)).rowcount == 1
+
+    def _recarregar(self) -> None:
+        """Traz do disco para os baldes (fatia igual por host) até metade do limite de memória."""
+        db = self._disco()
+        hosts = [h for (h,) in db.execute("SELECT DISTINCT host FROM pendentes")]
+        if not hosts:
+            self._em_disco = 0
+            return
+        vaga = max(1, (self.limite_memoria // 2 - self._em_memoria) // len(hosts))
+        db.execute("BEGIN")
+        for host in hosts:
+            linhas = db.execute("SELECT seq, prioridade, url FROM pendentes WHERE host=? "
+                                "ORDER BY prioridade, seq LIMIT ?", (host, vaga)).fetchall()
+            balde = self._baldes.setdefault(host, [])
+            for seq, prioridade, url in linhas:
+                heapq.heappush(balde, (prioridade, seq, url))
+            db.executemany("DELETE FROM pendentes WHERE seq=?", ((seq,) for seq, _, _ in linhas))
+            self._em_memoria += len(linhas)
+            self._em_disco -= len(linhas)
+        db.execute("COMMIT")
+
+    # ------------------------------ API ---------------------------------
+    def put(self, url: str, prioridade: int = 0, chave: Optional[str] = None) -> bool:
+        """Enfileira a URL se nunca vista (pela chave, se dada: ex. classificador_url.chave_url);
+        devolve False para repetidas (ou fronteira fechada)."""
+        if not url:
+            return False
+        host = urlparse(url).netloc.lower()
+        with self._cond:
+            if self._fechada or not self._marcar_visto(chave or url):
+                self.stats["repetidas"] += 1
+                return False
+            self._seq += 1
+            self.stats["adicionadas"] += 1
+            if self._em_memoria >= self.limite_memoria:
+                self._disco().execute("INSERT INTO pendentes(seq, host, prioridade, url) VALUES (?, ?, ?, ?)",
+                                      (self._seq, host, int(prioridade), url))
+                self._em_disco += 1
+                self.stats["para_disco"] += 1
+            else:
+                heapq.heappush(self._baldes.setdefault(host, []), (int(prioridade), self._seq, url))
+                self._em_memoria += 1
+            self._cond.notify()
+            return True
+
+    def _proxima(self) -> Optional[Entrada]:
+        if self._em_disco and self._em_memoria <= self.limite_memoria // 4:
+            self._recarregar()
+        while self._baldes:
+            host, balde = next(iter(self._baldes.items()))
+            if not balde:
+                del self._baldes[host]
+                continue
+            prioridade, seq, url = heapq.heappop(balde)
+            self._em_memoria -= 1
+            self._baldes.move_to_end(host)  # rodízio: o próximo get() serve outro host
+            if not balde:
+                del self._baldes[host]
+            self.stats["entregues"] += 1
+            return Entrada(seq, url, host, prioridade)
+        return None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Entrada]:
+        """Próxima URL; espera enquanto o crawl não terminar. None quando fechada e vazia
+        (ou após `timeout` segundos sem URL). Levanta Cancelado se o job for cancelado."""
+        restante = timeout
+        with self._cond:
+            while True:
+                entrada = self._proxima()
+                if entrada is not None:
+                    return entrada
+                if self._fechada and not self._em_disco:
+                    return None
+                cancelamento.verificar()
+                fatia = _ESPERA_S if restante is None else min(_ESPERA_S, restante)
+                if fatia <= 0:
+                    return None
+                self._cond.wait(fatia)
+                if restante is not None:
+                    restante -= fatia
+
+    def fechar(self) -> None:
+        """Não haverá novas URLs; consumidores esvaziam a fila e terminam."""
+        with self._cond:
+            self._fechada = True
+            self._cond.notify_all()
+
+    def descartar(self) -> None:
+        """Fecha e apaga o arquivo temporário."""
+        self.fechar()
+        with self._cond:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            if self._arquivo is not None:
+                self._arquivo.unlink(missing_ok=True)
+                self._arquivo = None
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._em_memoria + self._em_disco
+
+    def __iter__(self) -> Iterator[Entrada]:
+        while True:
+            entrada = self.get()
+            if entrada is None:
+                return
+            yield entrada
+
+    def __enter__(self) -> "Fronteira":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.descartar()
+
+    def resumo(self) -> Dict[str, int]:
+        with self._cond:
+            return {**self.stats, "pendentes": self._em_memoria + self._em_disco, "em_disco": self._em_disco}
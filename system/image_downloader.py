@@ -2,18 +2,21 @@
 """
 image_downloader.py — Orquestrador do download de imagens
 - Integra com a UI (bora.py/interface_manager.py)
-- Lê configurações (config.json na raiz OU system/config.json)
+- Lê configurações pelo serviço compartilhado (system/config_service.py)
 - Roteia para Yupoo (Selenium) e WordPress (HTTP)
-- Suporta cancelamento solicitado na UI
+- Ritmo por host via system.rate_limiter (config "rate_limit")
+- Cancelamento por job (system.cancelamento): cancel_event ou o token do contexto;
+  request_cancel() cancela os jobs em andamento (botão Cancelar da UI)
 """
 from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Union
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from system import cancelamento
 
 # Estado global simples
-_CANCEL = False
 _LOGGER = None
 
 
@@ -23,8 +26,7 @@ def set_system_logger(logger) -> None:
 
 
 def request_cancel() -> None:
-    global _CANCEL
-    _CANCEL = True
+    cancelamento.cancelar_todos()
     if _LOGGER:
         _LOGGER.log("Cancelamento solicitado pelo usuário", "WARNING", "⏹️")
 
@@ -37,14 +39,8 @@ def _log(msg: str, level: str = "INFO", emoji: str = "ℹ️") -> None:
 # ------------------------------- Config -------------------------------
 
 def _load_config() -> Dict:
-    """Lê config da raiz (config.json) ou fallback em system/config.json."""
-    for p in (Path("config.json"), Path("system/config.json")):
-        if p.exists():
-            try:
-                return json.loads(p.read_text(encoding="utf-8"))
-            except Exception:
-                pass
-    return {}
+    from system.config_service import get_config_service
+    return get_config_service().dados()
 
 
 # ------------------------------- Entrada ------------------------------
@@ -77,21 +73,37 @@ def _iter_items_from_json(path: Path) -> Iterable[Dict]:
 
 
 def _classify(url: str) -> str:
-    return "yupoo" if ".yupoo.com" in url else "wordpress"
+    from system.classificador_url import plataforma
+    return "yupoo" if plataforma(url) == "yupoo" else "wordpress"
 
 
 # ------------------------------ Execução ------------------------------
 
-def main_integrated(system_logger=None, selected_files: Optional[List[Path]] = None) -> Dict[str, object]:
+def main_integrated(system_logger=None, selected_files: Optional[List[Path]] = None,
+                    out_root: Optional[Path] = None,
+                    on_saved: Optional[Callable[[Path], None]] = None,
+                    on_album: Optional[Callable[[str, bool], None]] = None,
+                    cancel_event: Optional[cancelamento.TokenCancelamento] = None,
+                    forcar: bool = False) -> Dict[str, object]:
     """Entrada padrão chamada pelo bora.py.
     selected_files: lista de Path (provocado) ou None (autônomo → usa último JSON por timestamp no nome)
+    out_root: pasta de saída (padrão ./imagens; o app web usa uma pasta por sessão)
+    on_saved: callback chamado com o Path de cada imagem gravada
+    on_album: callback chamado com (url, sucesso) ao fim de cada álbum
+    cancel_event: token do job (padrão: o do contexto, ou um novo que request_cancel() alcança)
+    forcar: baixa também os álbuns que o índice de vistos já registrou para esta pasta de saída
     """
-    global _CANCEL
-    _CANCEL = False
     if system_logger:
         set_system_logger(system_logger)
+    with cancelamento.escopo(cancelamento.como_token(cancel_event)) as token:
+        return _main_integrated(token, system_logger, selected_files, out_root, on_saved, on_album, forcar)
+
 
+def _main_integrated(token: cancelamento.TokenCancelamento, system_logger, selected_files, out_root,
+                     on_saved, on_album, forcar: bool) -> Dict[str, object]:
     cfg = _load_config()
+    from system.rate_limiter import get_limiter
+    limiter = get_limiter(cfg)
     id_cfg = cfg.get("image_downloader", {})
     ua = id_cfg.get("user_agent")
     timeout = float(id_cfg.get("timeout", 12.0))
@@ -100,7 +112,8 @@ def main_integrated(system_logger=None, selected_files: Optional[List[Path]] = N
     headless = bool(id_cfg.get("headless", True))
     min_kb = int(cfg.get("tamanho_minimo_imagem", 50))
 
-    out_root = Path("./imagens"); out_root.mkdir(exist_ok=True)
+    out_root = Path(out_root) if out_root else Path("./imagens")
+    out_root.mkdir(parents=True, exist_ok=True)
 
     # modo autônomo → pega JSON mais recente pelo timestamp no nome
     if not selected_files:
@@ -115,45 +128,103 @@ def main_integrated(system_logger=None, selected_files: Optional[List[Path]] = N
     else:
         _log(f"Modo provocado: {len(selected_files)} arquivo(s)", "INFO", "📁")
 
-    # instanciar provedores
-    from system.imgdownloader.yupoo import YupooDownloader
+    # instanciar provedores (Yupoo/selenium só quando aparecer o primeiro álbum Yupoo)
     from system.imgdownloader.wordpress import WordPressDownloader
 
-    yup = YupooDownloader(logger=_LOGGER, user_agent=ua, timeout=timeout, delay=delay,
-                          referer_all=referer_all, headless=headless, min_kb=min_kb, out_root=out_root)
-    wp = WordPressDownloader(logger=_LOGGER, user_agent=ua, timeout=timeout, delay=delay,
-                             referer_all=referer_all, min_kb=min_kb, out_root=out_root)
-
-    total = 0
-    ok = True
-
-    for jf in selected_files or []:
-        if _CANCEL:
-            break
-        _log(f"📁 Arquivo: {jf.name}", "INFO", "📁")
-        for it in _iter_items_from_json(jf):
-            if _CANCEL:
+    # logger local: jobs simultâneos (app web) não devem trocar o logger um do outro
+    logger = system_logger or _LOGGER
+    yup = None
+
+    def _yupoo():
+        nonlocal yup
+        if yup is None:
+            from system.imgdownloader.yupoo import YupooDownloader
+            yup = YupooDownloader(logger=logger, user_agent=ua, timeout=timeout, delay=delay,
+                                  referer_all=referer_all, headless=headless, min_kb=min_kb, out_root=out_root,
+                                  limiter=limiter, on_saved=on_saved)
+        return yup
+
+    wp = WordPressDownloader(logger=logger, user_agent=ua, timeout=timeout, delay=delay,
+                             referer_all=referer_all, min_kb=min_kb, out_root=out_root, limiter=limiter,
+                             on_saved=on_saved)
+
+    from system import tracing
+    from system.indice_vistos import chave_album, etapa_imagens, get_indice_vistos
+    indice = get_indice_vistos()
+    etapa = etapa_imagens(out_root)
+    nesta_execucao = set()  # o mesmo álbum em dois JSONs (ou com ?uid=1 e sem) baixa uma vez
+    pulados = 0     # baixados em execuções anteriores (forcar refaz)
+    repetidos = 0   # o mesmo álbum de novo nesta execução
+    gravar = bool((cfg.get("desempenho") or {}).get("relatorio", True))
+    with tracing.execucao("imagens", gravar=gravar, arquivos=len(selected_files)) as run:
+        total = 0
+        ok = True
+
+        for jf in selected_files or []:
+            if token.cancelado:
                 break
-            url = it["album_url"]; folder = it.get("album_folder_name")
-            prov = _classify(url)
-            _log(f"📁 Álbum: {folder} ", "INFO", "📁")
-            _log(f"🔍 URL: {url}  [{prov}]", "INFO", "🔍")
-            try:
-                if prov == "yupoo":
-                    yup.process_album(url, album_folder_name=folder)
-                else:
-                    wp.process_page(url, album_folder_name=folder)
-                total += 1
-            except Exception as e:
-                ok = False
-                _log(f"Falha no álbum: {url} → {e}", "ERROR", "❌")
-
-    if _CANCEL:
-        _log("Download cancelado pelo usuário", "WARNING", "⏹️")
+            _log(f"📁 Arquivo: {jf.name}", "INFO", "📁")
+            for it in _iter_items_from_json(jf):
+                if token.cancelado:
+                    break
+                url = it["album_url"]; folder = it.get("album_folder_name")
+                album = chave_album(url)
+                if album in nesta_execucao:
+                    repetidos += 1
+                    _log(f"⏭️ Álbum repetido nesta execução: {url}", "DEBUG", "⏭️")
+                    continue
+                if not forcar and indice.visto(url, etapa):
+                    nesta_execucao.add(album)
+                    pulados += 1
+                    _log(f"⏭️ Álbum já baixado: {url}", "DEBUG", "⏭️")
+                    continue
+                nesta_execucao.add(album)
+                prov = _classify(url)
+                _log(f"📁 Álbum: {folder} ", "INFO", "📁")
+                _log(f"🔍 URL: {url}  [{prov}]", "INFO", "🔍")
+                try:
+                    if prov == "yupoo":
+                        r = _yupoo().process_album(url, album_folder_name=folder, cancel_event=token)
+                    else:
+                        r = wp.process_page(url, album_folder_name=folder, cancel_event=token)
+                    r = r or {"salvas": 0, "falhas": 0}
+                    total += 1
+                    # só álbum completo entra no índice: vazio ou com imagens faltando tenta de novo
+                    if r["salvas"] and not r["falhas"]:
+                        indice.marcar(url, etapa)
+                    else:
+                        _log(f"Álbum incompleto ({r['salvas']} salva(s), {r['falhas']} falha(s)): "
+                             f"será tentado de novo na próxima execução", "WARNING", "⚠️")
+                    if not r["salvas"]:
+                        ok = False
+                    if on_album:
+                        on_album(url, bool(r["salvas"]))
+                except cancelamento.Cancelado:
+                    _log(f"Álbum interrompido: {url}", "WARNING", "⏹️")
+                    break
+                except Exception as e:
+                    ok = False
+                    _log(f"Falha no álbum: {url} → {e}", "ERROR", "❌")
+                    if on_album:
+                        on_album(url, False)
+        run.set(albuns=total, pulados=pulados, repetidos=repetidos)
+    if pulados:
+        _log(f"⏭️ {pulados} álbum(ns) já baixado(s) nesta pasta (use forçar para refazer)", "INFO", "⏭️")
+    if repetidos:
+        _log(f"⏭️ {repetidos} álbum(ns) repetido(s) nos arquivos selecionados (considerado(s) uma vez)", "INFO", "⏭️")
+
+    if token.cancelado:
+        _log(f"Download cancelado: {token.motivo}", "WARNING", "⏹️")
     else:
         _log("Processo de download finalizado", "SUCCESS", "✅")
 
-    return {"success": ok and not _CANCEL, "total_albums": total, "cancelled": _CANCEL}
+    res = {"success": ok and not token.cancelado, "total_albums": total, "cancelled": token.cancelado,
+           "skipped": pulados, "repeated": repetidos}
+    if run.arquivo:
+        res["relatorio_desempenho"] = str(run.arquivo)
+        for linha in run.resumo():
+            _log(f"⏱️ {linha}", "INFO", "⏱️")
+    return res
 
 
 # --------------------------- Compatibilidade UI ---------------------------
@@ -9,26 +9,32 @@ WordPressDownloader (HTTP)
 - Referer: URL da página do produto
 - Saída unificada com Yupoo: ./imagens/{album_folder_name}/
   * Para WordPress o nome do arquivo é: wp-imagem-nnn.ext
+- Ritmo e novas tentativas: HostRateLimiter compartilhado (limites por host)
+- Métricas: bora_imagens_total{plataforma="wordpress",resultado=salva|rejeitada|falha} e bytes por host
+- Cancelamento: cancel_event (TokenCancelamento) ou o token do contexto; download em curso é abortado
+- process_page devolve {"salvas": n, "falhas": m} (quem chama decide se o álbum está completo)
 """
 from __future__ import annotations
 
 from dataclasses import dataclass
+import os
 import re
-import time
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set
 from urllib.parse import urlparse
 
 import requests
 from bs4 import BeautifulSoup
 
+from system import cancelamento, metrics
+from system.rate_limiter import HostRateLimiter, abortavel, get_limiter
+from system.tracing import span
+
 
 @dataclass
 class _Cfg:
     ua: str
     timeout: float
-    delay: float
-    referer_all: bool
     min_kb: int
     out_root: Path
 
@@ -43,6 +49,8 @@ class WordPressDownloader:
         referer_all: bool,
         min_kb: int,
         out_root: Path,
+        limiter: Optional[HostRateLimiter] = None,
+        on_saved: Optional[Callable[[Path], None]] = None,
     ) -> None:
         # Logger compatível com logger.log(msg, level, emoji)
         self._log = (lambda m, l="INFO", e="ℹ️": logger.log(m, l, e)) if logger else (lambda *a, **k: None)
@@ -52,13 +60,14 @@ class WordPressDownloader:
                 or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
                 "Chrome/124.0.0.0 Safari/537.36"
             ),
-            timeout=float(timeout),
-            delay=float(delay),
-            referer_all=bool(referer_all),  # compatibilidade
+            timeout=float(timeout),  # delay/referer_all: ignorados (ritmo do limiter; Referer = página)
             min_kb=int(min_kb),
             out_root=Path(out_root) if out_root else Path("imagens"),
         )
         self.cfg = cfg
+        self.limiter = limiter or get_limiter()
+        # chamado com o Path de cada imagem gravada (ex.: ZIP em streaming no app.py)
+        self.on_saved = on_saved
 
     # -------------------------- Helpers --------------------------
     @staticmethod
@@ -153,9 +162,10 @@ class WordPressDownloader:
 
     def _extract_image_urls(self, page_url: str) -> List[str]:
         headers = {"User-Agent": self.cfg.ua, "Referer": page_url}
-        r = requests.get(page_url, headers=headers, timeout=self.cfg.timeout)
+        r = self.limiter.get(None, page_url, headers=headers, timeout=self.cfg.timeout)
         r.raise_for_status()
-        soup = BeautifulSoup(r.text, "lxml")
+        with span("parse", bytes=len(r.content or b"")):
+            soup = BeautifulSoup(r.text, "lxml")
 
         # 1) Escopo: SOMENTE o bloco do produto
         product_root = soup.select_one("div.product, div[id^=product-].product")
@@ -176,19 +186,34 @@ class WordPressDownloader:
 
     def _download(self, img_url: str, referer: str, dest: Path) -> bool:
         headers = {"User-Agent": self.cfg.ua, "Referer": referer}
-        with requests.get(img_url, headers=headers, timeout=self.cfg.timeout, stream=True) as r:
-            r.raise_for_status()
-            size_kb = int(r.headers.get("Content-Length", 0)) // 1024
-            if size_kb and size_kb < self.cfg.min_kb:
-                self._log(f"Ignorado (< {self.cfg.min_kb} KB): {img_url}", "WARNING", "🪶")
-                return False
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            with open(dest, "wb") as f:
-                for chunk in r.iter_content(1024 * 64):
-                    if not chunk:
-                        continue
-                    f.write(chunk)
-        return True
+        with span("download", url=img_url) as s:
+            with self.limiter.get(None, img_url, headers=headers, timeout=self.cfg.timeout, stream=True) as r, \
+                    abortavel(r):
+                r.raise_for_status()
+                size_kb = int(r.headers.get("Content-Length", 0)) // 1024
+                if size_kb and size_kb < self.cfg.min_kb:
+                    self._log(f"Ignorado (< {self.cfg.min_kb} KB): {img_url}", "WARNING", "🪶")
+                    s.set(ignorado=True)
+                    metrics.inc("bora_imagens_total", plataforma="wordpress", resultado="rejeitada")
+                    return False
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                total = 0
+                try:
+                    with open(dest, "wb") as f:
+                        for chunk in r.iter_content(1024 * 64):
+                            cancelamento.verificar()
+                            if not chunk:
+                                continue
+                            f.write(chunk)
+                            total += len(chunk)
+                except BaseException:
+                    dest.unlink(missing_ok=True)  # sem arquivo pela metade na pasta do álbum
+                    cancelamento.verificar()
+                    raise
+            s.set(bytes=total)
+            metrics.inc("bora_imagens_total", plataforma="wordpress", resultado="salva")
+            metrics.add("bora_bytes_baixados_total", total, host=self.limiter.host_of(img_url))
+            return True
 
     # -------------------------- API pública --------------------------
     def process_page(
@@ -196,62 +221,68 @@ class WordPressDownloader:
         page_url: str,
         cancel_event: Optional[object] = None,
         album_folder_name: Optional[str] = None,
-    ) -> None:
+    ) -> Dict[str, int]:
         """Baixa somente as imagens da galeria do produto (ignora relacionadas).
         - Pasta: ./imagens/{album_folder_name}/ (mesma regra do Yupoo)
         - Arquivo: wp-imagem-nnn.ext
         """
-        folder = self._create_output_folder(album_folder_name, page_url)
-        urls = self._extract_image_urls(page_url)
-        if not urls:
-            self._log(f"Nenhuma imagem encontrada em {page_url}", "WARNING", "🫙")
-            return
+        with cancelamento.escopo(cancelamento.como_token(cancel_event)) as token, \
+                span("album", url=page_url, plataforma="wordpress"):
+            folder = self._create_output_folder(album_folder_name, page_url)
+            urls = self._extract_image_urls(page_url)
+            if not urls:
+                self._log(f"Nenhuma imagem encontrada em {page_url}", "WARNING", "🫙")
+                return {"salvas": 0, "falhas": 0}
 
-        self._log(f"{len(urls)} imagem(ns) em {page_url}", "INFO", "🖼️")
-        pendentes = []
-        name_map = {}
-        seq = 1
-        for u in urls:
-            if cancel_event and getattr(cancel_event, "is_set", lambda: False)():
-                self._log("Cancelado pelo usuário", "WARNING", "⏹️")
-                break
+            self._log(f"{len(urls)} imagem(ns) em {page_url}", "INFO", "🖼️")
+            pendentes = []  # falhas fora do HTTP (conexão caiu no meio do arquivo): uma nova passada
+            falhas = salvas = 0
+            name_map = {}
+            seq = 1
+            for u in urls:
+                if token.cancelado:
+                    self._log("Cancelado pelo usuário", "WARNING", "⏹️")
+                    token.verificar()
 
-            path_ext = Path(urlparse(u).path).suffix.lower() or ".jpg"
-            dest = folder / f"wp-imagem-{seq:03d}{path_ext}"
-            name_map[u] = dest.name
+                path_ext = Path(urlparse(u).path).suffix.lower() or ".jpg"
+                dest = folder / f"wp-imagem-{seq:03d}{path_ext}"
+                name_map[u] = dest.name
 
-            try:
-                ok = self._download(u, referer=page_url, dest=dest)
-                if ok:
-                    self._log(
-                        f"OK {dest.name} | bytes={dest.stat().st_size} | src={u}",
-                        "SUCCESS",
-                        "✅",
-                    )
-                    seq += 1
-            except Exception as e:
-                pendentes.append(u)
-                self._log(f"Erro ao baixar {u} → {e}", "ERROR", "❌")
+                try:
+                    ok = self._download(u, referer=page_url, dest=dest)
+                    if ok:
+                        self._log(
+                            f"OK {dest.name} | bytes={dest.stat().st_size} | src={u}",
+                            "SUCCESS",
+                            "✅",
+                        )
+                        if self.on_saved:
+                            self.on_saved(dest)
+                        salvas += 1
+                        seq += 1
+                except requests.HTTPError as e:
+                    # 429/5xx já tiveram as novas tentativas (com backoff) do limiter
+                    falhas += 1
+                    self._log(f"Erro ao baixar {u} → {e}", "ERROR", "❌")
+                except Exception as e:
+                    pendentes.append(u)
+                    self._log(f"Erro ao baixar {u} → {e}", "ERROR", "❌")
 
-            time.sleep(self.cfg.delay)
-        # ## PATCH RETRY pendentes após loop
-        if pendentes:
-            for delay in (0, 3, 2):
-                if not pendentes:
-                    break
-                novos = []
-                if delay:
-                    time.sleep(delay)
-                for href in pendentes:
-                    try:
-                        name = name_map.get(href) or f"retry-{os.path.basename(href)}"
-                        dest = folder / name
-                        ok = self._download(href, referer=page_url, dest=dest)
-                        if ok:
-                            self._log(f"OK (retry) {dest.name}", "SUCCESS", "✅")
-                        else:
-                            novos.append(href)
-                    except Exception as e:
-                        self._log(f"Falha retry {href}: {e}", "ERROR", "❌")
-                        novos.append(href)
-                pendentes = novos
+            # Uma passada pelos pendentes (espera ditada pelo limiter do host)
+            for href in pendentes:
+                token.verificar()
+                try:
+                    name = name_map.get(href) or f"retry-{os.path.basename(href)}"
+                    dest = folder / name
+                    # False = rejeitada (< min_kb): como na passada principal, não deixa o álbum incompleto
+                    if self._download(href, referer=page_url, dest=dest):
+                        self._log(f"OK (retry) {dest.name}", "SUCCESS", "✅")
+                        if self.on_saved:
+                            self.on_saved(dest)
+                        salvas += 1
+                except Exception as e:
+                    self._log(f"Falha retry {href}: {e}", "ERROR", "❌")
+                    falhas += 1
+            if falhas:
+                metrics.add("bora_imagens_total", falhas, plataforma="wordpress", resultado="falha")
+            return {"salvas": salvas, "falhas": falhas}
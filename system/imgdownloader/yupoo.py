@@ -4,13 +4,18 @@ YupooDownloader (Selenium)
 - Lê diretamente os atributos `data-origin-src` na página do álbum.
 - Mantém fallback por página de foto (botão "Imagem Original").
 - Referer: 1ª imagem do álbum sempre; todas se `referer_all`=True (config).
-- Manifest 1 por URL.
+- Ritmo e novas tentativas: HostRateLimiter compartilhado (limites por host).
+- Métricas: bora_imagens_total{plataforma="yupoo",resultado=salva|rejeitada|falha} e bytes por host.
+- Cancelamento: cancel_event (TokenCancelamento) ou o token do contexto; encerrar o navegador
+  interrompe o carregamento de página em curso e o download em streaming é abortado.
+- Saída: imagem-nnn.ext em {out_root}/{album_folder_name}/ (sem manifest por imagem).
+- process_album devolve {"salvas": n, "falhas": m} (quem chama decide se o álbum está completo).
 """
 from __future__ import annotations
 
-import json, os, time
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 
 import requests
 from selenium import webdriver
@@ -20,21 +25,29 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from system import cancelamento, metrics
+from system.rate_limiter import HostRateLimiter, abortavel, get_limiter
+from system.tracing import span
+
 
 class YupooDownloader:
     def __init__(self, logger, user_agent: Optional[str], timeout: float, delay: float,
-                 referer_all: bool, headless: bool, min_kb: int, out_root: Path):
+                 referer_all: bool, headless: bool, min_kb: int, out_root: Path,
+                 limiter: Optional[HostRateLimiter] = None,
+                 on_saved: Optional[Callable[[Path], None]] = None):
         self.log = (lambda m, l="INFO", e="ℹ️": logger.log(m, l, e)) if logger else (lambda *a, **k: None)
         self.ua = user_agent or (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
             "Chrome/124.0.0.0 Safari/537.36"
         )
-        self.timeout = float(timeout)
-        self.delay = float(delay)
+        self.timeout = float(timeout)  # delay: ignorado, o ritmo vem do limiter (rate_limit.default.delay)
         self.referer_all = bool(referer_all)
         self.headless = bool(headless)
         self.min_kb = int(min_kb)
         self.out_root = out_root
+        self.limiter = limiter or get_limiter()
+        # chamado com o Path de cada imagem gravada (ex.: ZIP em streaming no app.py)
+        self.on_saved = on_saved
 
     # ----------------------------- Selenium -----------------------------
     def _driver(self):
@@ -71,15 +84,25 @@ class YupooDownloader:
 
     def _download(self, url: str, referer: str, dest: Path) -> int:
         headers = {"User-Agent": self.ua, "Referer": referer}
-        with requests.get(url, headers=headers, timeout=self.timeout, stream=True) as r:
-            r.raise_for_status()
-            size_kb = 0
-            with open(dest, "wb") as f:
-                for chunk in r.iter_content(64 * 1024):
-                    if chunk:
-                        f.write(chunk)
-                        size_kb += len(chunk) // 1024
-        return size_kb
+        with span("download", url=url) as s:
+            with self.limiter.get(None, url, headers=headers, timeout=self.timeout, stream=True) as r, \
+                    abortavel(r):
+                r.raise_for_status()
+                size_kb = 0
+                try:
+                    with open(dest, "wb") as f:
+                        for chunk in r.iter_content(64 * 1024):
+                            cancelamento.verificar()
+                            if chunk:
+                                f.write(chunk)
+                                size_kb += len(chunk) // 1024
+                except BaseException:
+                    dest.unlink(missing_ok=True)  # conexão caída ou cancelamento: nada pela metade
+                    cancelamento.verificar()
+                    raise
+            s.set(bytes=dest.stat().st_size)
+            metrics.add("bora_bytes_baixados_total", dest.stat().st_size, host=self.limiter.host_of(url))
+            return size_kb
 
     def _wait(self, drv, by, sel, t=None):
         return WebDriverWait(drv, t or (self.timeout + 8)).until(
@@ -90,7 +113,8 @@ class YupooDownloader:
         last_h, stable = 0, 0
         for _ in range(max_rounds):
             drv.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(0.8)
+            if cancelamento.esperar(0.8):
+                break
             h = drv.execute_script("return document.body.scrollHeight || 0;")
             if h == last_h:
                 stable += 1
@@ -184,112 +208,126 @@ class YupooDownloader:
         return None
 
     # ------------------------------ Público ------------------------------
-    def process_album(self, album_url: str, album_folder_name: Optional[str] = None, cancel_event=None):
-        folder = self._album_folder(album_url, album_folder_name)
+    def process_album(self, album_url: str, album_folder_name: Optional[str] = None,
+                      cancel_event=None) -> Dict[str, int]:
+        with cancelamento.escopo(cancelamento.como_token(cancel_event)) as token, \
+                span("album", url=album_url, plataforma="yupoo"):
+            folder = self._album_folder(album_url, album_folder_name)
 
-        drv = self._driver()
-        try:
-            drv.set_page_load_timeout(self.timeout + 15)
-            drv.get(album_url)
+            token.verificar()
+            drv = self._driver()
             try:
-                self._wait(drv, By.TAG_NAME, "body", t=self.timeout)
-            except Exception:
-                pass
-
-            # 1) Preferido: data-origin-src no álbum
-            self._scroll_until_loaded(drv)
-            originals = self._collect_originals_from_album(drv)
-
-            # 2) Fallback: páginas de foto
-            if not originals:
-                self.log("data-origin-src não encontrado; usando fallback por página de foto", "WARNING", "⚠️")
-                for purl in self._gather_photo_links(drv):
-                    if cancel_event and cancel_event.is_set():
-                        break
+                drv.set_page_load_timeout(self.timeout + 15)
+                self.limiter.wait(album_url)
+                # encerrar o navegador derruba drv.get()/esperas em curso na hora do cancelamento
+                with token.ao_cancelar(drv.quit), span("navegar", host=self.limiter.host_of(album_url)):
                     try:
-                        drv.get(purl)
+                        drv.get(album_url)
                         try:
                             self._wait(drv, By.TAG_NAME, "body", t=self.timeout)
                         except Exception:
                             pass
-                        href = self._extract_original_from_photo(drv)
-                        if href:
-                            originals.append(href)
-                    except Exception as e:
-                        self.log(f"Erro na página {purl}: {e}", "ERROR", "❌")
 
-            if not originals:
-                self.log("Nenhuma imagem original encontrada", "WARNING", "⚠️")
-                return
+                        # 1) Preferido: data-origin-src no álbum
+                        self._scroll_until_loaded(drv)
+                        originals = self._collect_originals_from_album(drv)
+                    except Exception:
+                        token.verificar()
+                        raise
+                    token.verificar()
 
-            # Download serial mantendo a página do álbum aberta
-            seq = 1
-            pendentes = []
-            name_map = {}
-            for href in originals:
-                if cancel_event and cancel_event.is_set():
-                    break
-                try:
-                    base = os.path.basename(href.split("?")[0]) or f"img{seq:03d}"
-                    root, ext = os.path.splitext(base)
-                    if not ext:
-                        ext = ".jpg"
-                    name = f"imagem-{seq:03d}{ext}"
-                    name_map[href] = name
-                    dest = folder / name
+                # 2) Fallback: páginas de foto
+                if not originals:
+                    self.log("data-origin-src não encontrado; usando fallback por página de foto", "WARNING", "⚠️")
+                    with token.ao_cancelar(drv.quit):
+                        for purl in self._gather_photo_links(drv):
+                            token.verificar()
+                            try:
+                                self.limiter.wait(purl)
+                                drv.get(purl)
+                                try:
+                                    self._wait(drv, By.TAG_NAME, "body", t=self.timeout)
+                                except Exception:
+                                    pass
+                                href = self._extract_original_from_photo(drv)
+                                if href:
+                                    originals.append(href)
+                            except Exception as e:
+                                token.verificar()
+                                self.log(f"Erro na página {purl}: {e}", "ERROR", "❌")
+                        token.verificar()
 
-                    ref = album_url if (seq == 1 or self.referer_all) else album_url
-                    size_kb = self._download(href, referer=ref, dest=dest)
-                    if size_kb < self.min_kb:
-                        self.log(f"Descartada (pequena) {name} ({size_kb}KB)", "WARNING", "⚠️")
-                        dest.unlink(missing_ok=True)
-                        seq += 1
-                        continue
+                if not originals:
+                    self.log("Nenhuma imagem original encontrada", "WARNING", "⚠️")
+                    return {"salvas": 0, "falhas": 0}
+
+                # Download serial mantendo a página do álbum aberta
+                seq = 1
+                pendentes = []  # falhas fora do HTTP (conexão caiu no meio do arquivo): uma nova passada
+                falhas = salvas = 0
+                name_map = {}
+                for href in originals:
+                    token.verificar()
+                    try:
+                        base = os.path.basename(href.split("?")[0]) or f"img{seq:03d}"
+                        root, ext = os.path.splitext(base)
+                        if not ext:
+                            ext = ".jpg"
+                        name = f"imagem-{seq:03d}{ext}"
+                        name_map[href] = name
+                        dest = folder / name
 
-                    man = {
-                        "page_url": album_url,
-                        "original_image_url": href,
-                        "saved_path": str(dest),
-                        "bytes": dest.stat().st_size,
-                        "referer_applied": ref,
-                    }
-                    #with open(folder / f"manifest_{seq:03d}.json", "w", encoding="utf-8") as f:
-                    #    json.dump(man, f, ensure_ascii=False, indent=2)
+                        ref = album_url if (seq == 1 or self.referer_all) else album_url
+                        size_kb = self._download(href, referer=ref, dest=dest)
+                        if size_kb < self.min_kb:
+                            self.log(f"Descartada (pequena) {name} ({size_kb}KB)", "WARNING", "⚠️")
+                            metrics.inc("bora_imagens_total", plataforma="yupoo", resultado="rejeitada")
+                            dest.unlink(missing_ok=True)
+                            seq += 1
+                            continue
 
-                    self.log(f"OK {name}", "SUCCESS", "✅")
-                    seq += 1
-                    time.sleep(self.delay)
-                except Exception as e:
-                    self.log(f"Falha download {href}: {e}", "ERROR", "❌")
-                    pendentes.append(href)
-                    seq += 1
-                    continue
-            # ## PATCH RETRY pendentes
-            if pendentes:
-                for delay in (0, 3, 2):
-                    if not pendentes:
-                        break
-                    novos = []
-                    if delay:
-                        time.sleep(delay)
-                    for href in pendentes:
-                        try:
-                            name = name_map.get(href) or os.path.basename(href.split("?")[0]) or "img.jpg"
-                            dest = folder / name
-                            ref = album_url
-                            size_kb = self._download(href, referer=ref, dest=dest)
-                            if size_kb < self.min_kb:
-                                dest.unlink(missing_ok=True)
-                                novos.append(href)
-                            else:
-                                self.log(f"OK (retry) {name}", "SUCCESS", "✅")
-                        except Exception as e:
-                            self.log(f"Falha retry {href}: {e}", "ERROR", "❌")
-                            novos.append(href)
-                    pendentes = novos
+                        self.log(f"OK {name}", "SUCCESS", "✅")
+                        metrics.inc("bora_imagens_total", plataforma="yupoo", resultado="salva")
+                        salvas += 1
+                        if self.on_saved:
+                            self.on_saved(dest)
+                        seq += 1
+                    except requests.HTTPError as e:
+                        # 429/5xx já tiveram as novas tentativas (com backoff) do limiter
+                        self.log(f"Falha download {href}: {e}", "ERROR", "❌")
+                        falhas += 1
+                        seq += 1
+                    except Exception as e:
+                        self.log(f"Falha download {href}: {e}", "ERROR", "❌")
+                        pendentes.append(href)
+                        seq += 1
+                # Uma passada pelos pendentes (espera ditada pelo limiter do host)
+                for href in pendentes:
+                    token.verificar()
+                    try:
+                        name = name_map.get(href) or os.path.basename(href.split("?")[0]) or "img.jpg"
+                        dest = folder / name
+                        size_kb = self._download(href, referer=album_url, dest=dest)
+                        if size_kb < self.min_kb:
+                            # como na passada principal: rejeitada não deixa o álbum incompleto
+                            self.log(f"Descartada (pequena) {name} ({size_kb}KB)", "WARNING", "⚠️")
+                            metrics.inc("bora_imagens_total", plataforma="yupoo", resultado="rejeitada")
+                            dest.unlink(missing_ok=True)
+                        else:
+                            self.log(f"OK (retry) {name}", "SUCCESS", "✅")
+                            metrics.inc("bora_imagens_total", plataforma="yupoo", resultado="salva")
+                            salvas += 1
+                            if self.on_saved:
+                                self.on_saved(dest)
+                    except Exception as e:
+                        self.log(f"Falha retry {href}: {e}", "ERROR", "❌")
+                        falhas += 1
+                if falhas:
+                    metrics.add("bora_imagens_total", falhas, plataforma="yupoo", resultado="falha")
+                return {"salvas": salvas, "falhas": falhas}
 
-        finally:
-            try:
-                drv.quit()
-            except Exception:
-                pass
+            finally:
+                try:
+                    drv.quit()
+                except Exception:
+                    pass
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+indice_vistos.py — Álbuns já processados, entre execuções (metadados e imagens)
+- Chave do álbum: host + id de MetadataGenerator._derive_album_id sobre a URL canônica
+  (classificador_url.canonica): ?uid=1, http/https, rastreio, barra final e ?variation=
+  caem no mesmo álbum; sem id reconhecível, a própria URL canônica é a chave
+- Uma linha por (etapa, álbum): "metadados" e "imagens:<pasta de saída>" são independentes
+- SQLite em cache/vistos.sqlite3 (como o album_cache: seguro entre threads e entre GUI/CLI)
+- Config "indice_vistos": ativo, ttl_horas (padrão 168: um álbum volta a ser coletado uma vez por
+  semana; 0 = não expira); forcar=True nas entradas ignora o índice; expirados saem ao abrir o índice
+- Metadados pulados não viram "removidos" no CSV delta: removidos só com csv.delta_catalogo_completo,
+  e as entradas desligam isso quando houve álbum pulado
+
+Uso:
+    idx = get_indice_vistos()
+    if not idx.visto(url, "metadados"):
+        ...
+        idx.marcar(url, "metadados")
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from .classificador_url import canonica, chave_url
+from .metadata.metadata_generator import MetadataGenerator
+
+DEFAULTS = {"ativo": True, "ttl_horas": 168.0}
+ETAPA_METADADOS = "metadados"
+
+
+def etapa_imagens(out_root: Path) -> str:
+    """Imagens contam por pasta de saída: outra pasta (ou o app web) baixa de novo."""
+    return f"imagens:{Path(out_root).resolve()}"
+
+
+def chave_album(url: str) -> str:
+    c = canonica(url)
+    album_id = MetadataGenerator._derive_album_id(c)
+    if not album_id or album_id == c:
+        return chave_url(c)
+    return f"{(urlsplit(c).netloc or '').lower()}/{album_id}"
+
+
+def _load_config() -> Dict:
+    from system.config_service import get_config_service
+    return get_config_service().dados()
+
+
+class IndiceVistos:
+    def __init__(self, path: Path = Path("cache") / "vistos.sqlite3", ttl_horas: float = DEFAULTS["ttl_horas"],
+                 ativo: bool = DEFAULTS["ativo"]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = float(ttl_horas) * 3600
+        self.ativo = bool(ativo)
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS vistos ("
+                " etapa TEXT NOT NULL, album TEXT NOT NULL, url TEXT NOT NULL, visto_em REAL NOT NULL,"
+                " PRIMARY KEY (etapa, album))"
+            )
+            if self.ttl:
+                con.execute("DELETE FROM vistos WHERE visto_em < ?", (time.time() - self.ttl,))
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def visto(self, url: str, etapa: str = ETAPA_METADADOS) -> bool:
+        """True se o álbum já passou por esta etapa (e não expirou); sempre False se desativado."""
+        if not self.ativo:
+            return False
+        with self._connect() as con:
+            linha = con.execute("SELECT visto_em FROM vistos WHERE etapa=? AND album=?",
+                                (etapa, chave_album(url))).fetchone()
+        return bool(linha) and (not self.ttl or time.time() - linha[0] < self.ttl)
+
+    def marcar(self, url: str, etapa: str = ETAPA_METADADOS) -> None:
+        if not self.ativo:
+            return
+        with self._connect() as con:
+            con.execute("INSERT OR REPLACE INTO vistos(etapa, album, url, visto_em) VALUES (?, ?, ?, ?)",
+                        (etapa, chave_album(url), canonica(url), time.time()))
+
+    def esquecer(self, urls: Optional[Iterable[str]] = None, etapa: Optional[str] = None) -> int:
+        """Remove álbuns do índice (todos, se urls=None); devolve quantas linhas saíram."""
+        with self._connect() as con:
+            if urls is None:
+                cur = con.execute("DELETE FROM vistos" + (" WHERE etapa=?" if etapa else ""),
+                                  (etapa,) if etapa else ())
+                return cur.rowcount
+            total = 0
+            for u in urls:
+                sql, params = "DELETE FROM vistos WHERE album=?", [chave_album(u)]
+                if etapa:
+                    sql, params = sql + " AND etapa=?", params + [etapa]
+                total += con.execute(sql, params).rowcount
+            return total
+
+
+_SHARED: Optional[IndiceVistos] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_indice_vistos() -> IndiceVistos:
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            cfg = {**DEFAULTS, **(_load_config().get("indice_vistos") or {})}
+            _SHARED = IndiceVistos(ttl_horas=cfg["ttl_horas"], ativo=cfg["ativo"])
+        return _SHARED
@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import json
 import platform
+import queue
 import subprocess
 import threading
 import tkinter as tk
@@ -15,6 +16,8 @@ from tkinter import ttk, messagebox
 from typing import List, Optional
 import time
 
+from .metadata_index import extrair_itens, get_metadata_index
+
 class MetadataInterface:
     def __init__(self, parent, config_manager, process_callback):
         self.parent = parent
@@ -162,9 +165,15 @@ class MetadataInterface:
         ttk.Label(resumo, text=f"URLs processadas: {total}").pack(anchor="w", pady=2)
         ttk.Label(resumo, text=f"Sucessos: {sucessos} | Falhas: {falhas}").pack(anchor="w", pady=2)
         ttk.Label(resumo, text=f"Tempo decorrido: {elapsed:.1f}s").pack(anchor="w", pady=2)
+        # etapas que mais consumiram tempo (relatório de desempenho do tracing)
+        for linha in resultado.get("desempenho") or []:
+            ttk.Label(resumo, text=f"  ⏱️ {linha}").pack(anchor="w", pady=1)
         
         if arquivo and arquivo != "-":
             ttk.Label(resumo, text=f"Metadados salvos em: {arquivo}").pack(anchor="w", pady=2)
+        relatorio = resultado.get("relatorio_desempenho")
+        if relatorio:
+            ttk.Label(resumo, text=f"Relatório de desempenho: {relatorio}").pack(anchor="w", pady=2)
 
         btns = ttk.Frame(resumo)
         btns.pack(fill="x", pady=10)
@@ -206,6 +215,7 @@ class InterfaceManager:
         self.download_callback = None
         self.files_tree: Optional[ttk.Treeview] = None
         self.download_status: Optional[ttk.Label] = None
+        self._lista_geracao = 0
 
     def _clear(self, container: tk.Widget) -> None:
         for w in container.winfo_children():
@@ -281,6 +291,7 @@ class InterfaceManager:
         self._carregar_lista_arquivos()
 
     def _carregar_lista_arquivos(self) -> None:
+        """Lista Metadados/*.json a partir do índice; arquivos novos/alterados são lidos em segundo plano."""
         if not self.files_tree:
             return
         for item in self.files_tree.get_children():
@@ -291,30 +302,76 @@ class InterfaceManager:
             self.logger.log("Pasta 'Metadados' não encontrada", "WARNING", "📁")
             return
 
-        arquivos = sorted(pasta.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-        for arq in arquivos:
+        indice = get_metadata_index()
+        arquivos = []
+        for arq in pasta.glob("*.json"):
             try:
-                tamanho = len(self._load_metadata_file(arq))
-            except Exception as e:
-                tamanho = 0
-                self.logger.log(f"Erro ao ler {arq.name}: {e}", "ERROR", "❌")
-            mod = datetime.fromtimestamp(arq.stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S")
-            self.files_tree.insert("", "end", text=arq.name, values=(tamanho, mod))
+                arquivos.append((arq, arq.stat().st_mtime))
+            except OSError:
+                continue
+        arquivos.sort(key=lambda x: x[1], reverse=True)
+        indice.prune(a for a, _ in arquivos)
+
+        pendentes = []
+        for arq, mtime in arquivos:
+            mod = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+            entrada = indice.cached(arq)
+            iid = self.files_tree.insert("", "end", text=arq.name, values=(entrada["itens"] if entrada else "…", mod))
+            if not entrada:
+                pendentes.append((iid, arq))
+
+        self._lista_geracao += 1
+        if pendentes:
+            self._indexar_em_segundo_plano(pendentes, self._lista_geracao)
+
+    def _indexar_em_segundo_plano(self, pendentes, geracao: int) -> None:
+        resultados: "queue.Queue" = queue.Queue()
+
+        def worker():
+            indice = get_metadata_index()
+            for iid, arq in pendentes:
+                if geracao != self._lista_geracao:
+                    break
+                try:
+                    resultados.put((iid, arq, indice.scan(arq, save=False)["itens"], None))
+                except Exception as e:
+                    resultados.put((iid, arq, 0, e))
+            try:
+                indice.save()
+            except Exception:
+                pass
+            resultados.put(None)
+
+        def aplicar():
+            # roda no thread do Tk: só ele mexe no Treeview
+            if geracao != self._lista_geracao or not self.files_tree:
+                return
+            try:
+                while True:
+                    r = resultados.get_nowait()
+                    if r is None:
+                        return
+                    iid, arq, itens, erro = r
+                    if erro:
+                        self.logger.log(f"Erro ao ler {arq.name}: {erro}", "ERROR", "❌")
+                    if self.files_tree.exists(iid):
+                        self.files_tree.set(iid, "itens", itens)
+            except tk.TclError:
+                return  # tela fechada
+            except queue.Empty:
+                pass
+            try:
+                self.files_tree.after(100, aplicar)
+            except tk.TclError:
+                pass  # tela fechada
+
+        threading.Thread(target=worker, daemon=True, name="bora-indice-metadados").start()
+        self.files_tree.after(100, aplicar)
 
     def _load_metadata_file(self, path: Path):
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        if isinstance(data, list):
-            return data
-        if isinstance(data, dict):
-            return (
-                data.get("produtos")
-                or data.get("produtos_extraidos")
-                or data.get("items")
-                or data.get("data")
-                or []
-            )
-        return []
+        return extrair_itens(data)
 
     def _get_selected_metadata_files(self) -> List[Path]:
         if not self.files_tree:
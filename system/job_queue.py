@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+job_queue.py — Fila de jobs em segundo plano (usada pelo app.py / Streamlit)
+- Jobs = lote de URLs; executados num ThreadPoolExecutor fora do script do Streamlit
+- Estado em SQLite local (sobrevive a reruns; jobs órfãos de um processo anterior
+  são marcados como interrompidos ao abrir a fila)
+- A página consulta o progresso por polling (get_job / list_jobs)
+- Worker que devolve {"success": False, "erro": ...} termina como "failed" (o resultado é mantido)
+- Jobs encerrados há mais de keep_hours saem (com a pasta) a cada submit: a fila vive em
+  st.cache_resource e só seria recriada ao reiniciar o servidor
+- Cada job roda com o próprio TokenCancelamento (system.cancelamento); cancel(job_id) o interrompe
+  na fila ou em andamento (downloads e esperas param em ~1 s)
+
+Uso:
+    fila = JobQueue(worker=minha_funcao)   # worker(job_id, urls, pasta, progresso, **opcoes) -> dict
+    job_id = fila.submit(session_id, urls, opcoes={"forcar": True})
+    fila.get_job(job_id)  # {"status": "running", "done": 3, "total": 10, ...}
+    fila.cancel(job_id)
+"""
+from __future__ import annotations
+
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .cancelamento import Cancelado, TokenCancelamento, escopo
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_INTERRUPTED = "interrupted"
+STATUS_CANCELLED = "cancelled"
+
+ACTIVE_STATUS = (STATUS_QUEUED, STATUS_RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    session_id  TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    urls        TEXT NOT NULL,
+    total       INTEGER NOT NULL,
+    done        INTEGER NOT NULL DEFAULT 0,
+    failed      INTEGER NOT NULL DEFAULT 0,
+    message     TEXT NOT NULL DEFAULT '',
+    result      TEXT NOT NULL DEFAULT '{}',
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs(session_id, created_at);
+"""
+
+
+class JobProgress:
+    """Callback entregue ao worker para reportar andamento do job."""
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self._queue = queue
+        self.job_id = job_id
+
+    def __call__(self, done: Optional[int] = None, failed: Optional[int] = None, message: Optional[str] = None):
+        self._queue._update(self.job_id, done=done, failed=failed, message=message)
+
+
+class JobQueue:
+    def __init__(
+        self,
+        worker: Callable[[str, List[str], Path, JobProgress], Dict],
+        base_dir: Path = Path("jobs"),
+        max_workers: int = 2,
+        keep_hours: float = 24.0,
+    ):
+        self.worker = worker
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.base_dir / "jobs.sqlite3"
+        self.keep_hours = keep_hours
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, TokenCancelamento] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bora-job")
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+            # threads de um processo anterior não existem mais
+            con.execute(
+                "UPDATE jobs SET status=?, message=?, updated_at=? WHERE status IN (?, ?)",
+                (STATUS_INTERRUPTED, "Interrompido (servidor reiniciado)", time.time(), *ACTIVE_STATUS),
+            )
+        self._purge_old()
+
+    # ------------------------------ SQLite ------------------------------
+    @contextmanager
+    def _connect(self):
+        """Conexão curta por operação (threads diferentes não compartilham conexão)."""
+        con = sqlite3.connect(self.db_path, timeout=30)
+        con.row_factory = sqlite3.Row
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _update(self, job_id: str, **fields) -> None:
+        sets, vals = [], []
+        for k, v in fields.items():
+            if v is None:
+                continue
+            sets.append(f"{k}=?")
+            vals.append(json.dumps(v, ensure_ascii=False) if k == "result" else v)
+        if not sets:
+            return
+        sets.append("updated_at=?")
+        vals.append(time.time())
+        with self._lock, self._connect() as con:
+            con.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE id=?", (*vals, job_id))
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        d = dict(row)
+        d["urls"] = json.loads(d["urls"])
+        d["result"] = json.loads(d["result"] or "{}")
+        return d
+
+    def _purge_old(self) -> None:
+        limite = time.time() - self.keep_hours * 3600
+        with self._lock, self._connect() as con:
+            antigos = [r["id"] for r in con.execute(
+                "SELECT id FROM jobs WHERE updated_at < ? AND status NOT IN (?, ?)", (limite, *ACTIVE_STATUS)
+            )]
+            con.executemany("DELETE FROM jobs WHERE id=?", [(i,) for i in antigos])
+        for job_id in antigos:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    # ------------------------------ API ---------------------------------
+    def job_dir(self, job_id: str) -> Path:
+        return self.base_dir / job_id
+
+    def submit(self, session_id: str, urls: List[str], opcoes: Optional[Dict] = None) -> str:
+        """Enfileira o lote; opcoes vão como argumentos nomeados para o worker."""
+        self._purge_old()
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock, self._connect() as con:
+            con.execute(
+                "INSERT INTO jobs (id, session_id, status, urls, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, session_id, STATUS_QUEUED, json.dumps(urls, ensure_ascii=False), len(urls), now, now),
+            )
+        token = TokenCancelamento(job_id)
+        with self._lock:
+            self._tokens[job_id] = token
+        self._executor.submit(self._run, job_id, list(urls), token, dict(opcoes or {}))
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancela um job na fila ou em andamento; False se ele já terminou (ou não existe)."""
+        with self._lock:
+            token = self._tokens.get(job_id)
+        if token is None:
+            return False
+        token.cancelar("cancelado pelo usuário")
+        self._update(job_id, message="Cancelando...")
+        return True
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as con:
+            row = con.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list_jobs(self, session_id: str) -> List[Dict]:
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT * FROM jobs WHERE session_id=? ORDER BY created_at DESC", (session_id,)
+            ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def has_active(self, session_id: str) -> bool:
+        return any(j["status"] in ACTIVE_STATUS for j in self.list_jobs(session_id))
+
+    # ------------------------------ Execução ----------------------------
+    def _run(self, job_id: str, urls: List[str], token: TokenCancelamento, opcoes: Dict) -> None:
+        try:
+            if token.cancelado:  # cancelado ainda na fila
+                self._update(job_id, status=STATUS_CANCELLED, message="Cancelado")
+                return
+            self._update(job_id, status=STATUS_RUNNING, message="Iniciando...")
+            pasta = self.job_dir(job_id)
+            pasta.mkdir(parents=True, exist_ok=True)
+            with escopo(token):
+                result = self.worker(job_id, urls, pasta, JobProgress(self, job_id), **opcoes) or {}
+            if token.cancelado:
+                self._update(job_id, status=STATUS_CANCELLED, message="Cancelado", result=result)
+            elif not result.get("success", True):
+                self._update(job_id, status=STATUS_FAILED, message=f"Erro: {result.get('erro') or 'falha no job'}",
+                             result=result)
+            else:
+                self._update(job_id, status=STATUS_DONE, message="Concluído", result=result)
+        except Cancelado:
+            self._update(job_id, status=STATUS_CANCELLED, message="Cancelado")
+        except Exception as e:
+            self._update(job_id, status=STATUS_FAILED, message=f"Erro: {e}")
+        finally:
+            with self._lock:
+                self._tokens.pop(job_id, None)
@@ -67,20 +67,14 @@ import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from ..metadata_index import registrar_arquivo
+from ..text_norm import sanitize_folder_name
+
 WINDOWS_FORBIDDEN = set('<>:"/\\|?*')
 
 def _sanitize_folder_name(name: str) -> str:
-    # normaliza 25/26 → 25-26
-    name = name.replace('25/26', '25-26').replace('24/25', '24-25').replace('23/24', '23-24')
-    # remove sufixos de site comuns
-    for suf in (' | Yupoo', ' | 又拍图片管家', '| Yupoo', '| 又拍图片管家'):
-        name = name.replace(suf, '').strip()
-    # remove dígitos-resíduo logo após variação de tamanho (ex.: S-XXL9 → S-XXL)
-    name = re.sub(r'(S-X{0,4}XL|S-\dXL)\d+\b', r'\1', name, flags=re.IGNORECASE)
-    # sanitiza para Windows
-    name = ''.join('_' if ch in WINDOWS_FORBIDDEN else ch for ch in name)
-    # remove pontos/espaços finais
-    return name.rstrip(' .')
+    # 25/26 → 25-26, sem sufixo do site, sem resíduo após tamanho (S-XXL9 → S-XXL), seguro p/ Windows
+    return sanitize_folder_name(name)
 
 def _clean_title(s: str) -> str:
     if not s:
@@ -92,27 +86,55 @@ def _clean_title(s: str) -> str:
     s = s.replace('25/26', '25-26').replace('24/25', '24-25').replace('23/24', '23-24')
     return s
 
+def _suffix_automaton(s: str):
+    """Autômato de sufixos de s: (transições, links, comprimentos) — O(len(s))."""
+    nxt: List[Dict[str, int]] = [{}]
+    link = [-1]
+    length = [0]
+    last = 0
+    for ch in s:
+        cur = len(nxt)
+        nxt.append({}); link.append(0); length.append(length[last] + 1)
+        p = last
+        while p != -1 and ch not in nxt[p]:
+            nxt[p][ch] = cur
+            p = link[p]
+        if p != -1:
+            q = nxt[p][ch]
+            if length[p] + 1 == length[q]:
+                link[cur] = q
+            else:
+                clone = len(nxt)
+                nxt.append(dict(nxt[q])); link.append(link[q]); length.append(length[p] + 1)
+                while p != -1 and nxt[p].get(ch) == q:
+                    nxt[p][ch] = clone
+                    p = link[p]
+                link[q] = link[cur] = clone
+        last = cur
+    return nxt, link, length
+
 def _longest_common_substring(a: str, b: str) -> str:
     if not a or not b:
         return ''
     a, b = a.strip(), b.strip()
-    # DP simples para LCS (substring contígua)
-    m, n = len(a), len(b)
-    dp = [0] * (n + 1)
-    longest_len = 0
-    end_pos = 0
-    for i in range(1, m + 1):
-        prev = 0
-        for j in range(1, n + 1):
-            temp = dp[j]
-            if a[i-1] == b[j-1]:
-                dp[j] = prev + 1
-                if dp[j] > longest_len:
-                    longest_len = dp[j]
-                    end_pos = i
-            else:
-                dp[j] = 0
-            prev = temp
+    if not a or not b:
+        return ''
+    # autômato de sufixos de b + varredura de a: O(m + n) em vez da DP O(m·n).
+    # Mesmo desempate da DP antiga: a primeira ocorrência (menor fim em a) do maior comprimento.
+    nxt, link, length = _suffix_automaton(b)
+    state = cur_len = 0
+    longest_len = end_pos = 0
+    for i, ch in enumerate(a, 1):
+        while state and ch not in nxt[state]:
+            state = link[state]
+            cur_len = length[state]
+        if ch in nxt[state]:
+            state = nxt[state][ch]
+            cur_len += 1
+        else:
+            state = cur_len = 0
+        if cur_len > longest_len:
+            longest_len, end_pos = cur_len, i
     return a[end_pos - longest_len:end_pos] if longest_len else ''
 
 def _compute_album_folder_name(album_title: str, page_title: str) -> str:
@@ -222,6 +244,7 @@ class MetadataGenerator:
 
         with open(out_path, 'w', encoding='utf-8') as f:
             json.dump(saida, f, ensure_ascii=False, indent=2)
+        registrar_arquivo(out_path, saida)
 
         if self.logger:
             try:
@@ -12,6 +12,8 @@ from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime
 
+from ..metadata_index import registrar_arquivo
+
 class SimpleMetadataGenerator:
     """Gerador simplificado que retorna apenas campos essenciais"""
     
@@ -59,6 +61,7 @@ class SimpleMetadataGenerator:
         
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(final_data, f, indent=2, ensure_ascii=False)
+        registrar_arquivo(filepath, final_data)
         
         self.logger.log(f"Arquivo simplificado gerado: {filename}", "SUCCESS", "OK")
         self.logger.log(f"Produtos válidos: {len(simplified_products)}", "INFO", "#")
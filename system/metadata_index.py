@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+metadata_index.py — Índice lateral dos JSONs em Metadados/ (tela de download de imagens)
+- Por arquivo: nome, mtime, tamanho, nº de itens e hash das URLs de álbum
+- Gravado em cache/metadados_indice.json (fora de Metadados/, que é varrida por *.json)
+- Quem grava metadados chama registrar_arquivo(path, itens) → sem reler o arquivo depois
+- Entradas valem enquanto mtime e tamanho baterem; senão o arquivo é relido (scan)
+
+Uso:
+    idx = get_metadata_index()
+    entrada = idx.cached(path) or idx.scan(path)   # {"itens": 120, "mtime": ..., ...}
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+INDEX_PATH = Path("cache") / "metadados_indice.json"
+
+
+def extrair_itens(data: Any) -> List[Any]:
+    """Lista de produtos de um JSON de metadados (mesmas chaves da tela de download)."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return (
+            data.get("produtos")
+            or data.get("produtos_extraidos")
+            or data.get("items")
+            or data.get("data")
+            or []
+        )
+    return []
+
+
+def _urls_hash(itens: Iterable[Any]) -> str:
+    urls = sorted(
+        str(i.get("album_url") or i.get("url") or "") for i in itens if isinstance(i, dict)
+    )
+    return hashlib.sha1("\n".join(urls).encode("utf-8")).hexdigest()[:16]
+
+
+class MetadataIndex:
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._dados: Dict[str, Dict[str, Any]] = {}
+        try:
+            self._dados = json.loads(self.path.read_text(encoding="utf-8")).get("arquivos") or {}
+        except (OSError, ValueError, AttributeError):
+            self._dados = {}
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        # gravação e replace sob o lock: duas gravações não dividem o .tmp nem trocam a ordem das versões
+        with self._lock:
+            conteudo = json.dumps({"arquivos": self._dados}, ensure_ascii=False)
+            tmp.write_text(conteudo, encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def cached(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Entrada do índice se o arquivo não mudou (mtime + tamanho); senão None."""
+        try:
+            st = Path(path).stat()
+        except OSError:
+            return None
+        with self._lock:
+            e = self._dados.get(self._key(path))
+        if e and e.get("mtime") == st.st_mtime and e.get("size") == st.st_size:
+            return dict(e)
+        return None
+
+    def record(self, path: Path, itens: List[Any], save: bool = True) -> Dict[str, Any]:
+        path = Path(path)
+        st = path.stat()
+        e = {
+            "nome": path.name,
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "itens": len(itens),
+            "urls_hash": _urls_hash(itens),
+        }
+        with self._lock:
+            self._dados[self._key(path)] = e
+        if save:
+            self._save()
+        return dict(e)
+
+    def scan(self, path: Path, save: bool = True) -> Dict[str, Any]:
+        """Lê o JSON inteiro (caminho lento) e atualiza o índice."""
+        with open(path, "r", encoding="utf-8") as f:
+            itens = extrair_itens(json.load(f))
+        return self.record(path, itens, save=save)
+
+    def prune(self, existentes: Iterable[Path]) -> None:
+        """Remove do índice arquivos que não existem mais (na mesma pasta)."""
+        vivos = {self._key(p) for p in existentes}
+        pastas = {str(Path(k).parent) for k in vivos}
+        with self._lock:
+            mortos = [k for k in self._dados if str(Path(k).parent) in pastas and k not in vivos]
+            for k in mortos:
+                del self._dados[k]
+        if mortos:
+            self._save()
+
+    def save(self) -> None:
+        self._save()
+
+
+_SHARED: Optional[MetadataIndex] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_metadata_index() -> MetadataIndex:
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = MetadataIndex()
+        return _SHARED
+
+
+def registrar_arquivo(path, itens: List[Any]) -> None:
+    """Chamado logo após gravar um JSON de metadados; falhas no índice nunca quebram a gravação."""
+    try:
+        get_metadata_index().record(Path(path), extrair_itens(itens))
+    except Exception:
+        pass
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py — Contadores ao vivo para sincronizações longas (formato texto do Prometheus)
+- Registro único por processo; contadores e medidores com rótulos (host, status, resultado...)
+- Exportação opcional (config "metricas"):
+    porta    > 0  → servidor HTTP local em 127.0.0.1:<porta>/metrics
+    arquivo  != "" → textfile reescrito a cada intervalo_s (node_exporter textfile collector)
+- Desligado (padrão): inc()/add() retornam na primeira linha, sem lock nem dicionário
+
+Uso:
+    from system import metrics
+    metrics.configurar(cfg)                       # dict do config.json (idempotente)
+    metrics.inc("bora_http_requisicoes_total", host=h, status="200")
+    metrics.add("bora_http_em_andamento", 1, host=h) ... metrics.add(..., -1, host=h)
+"""
+from __future__ import annotations
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULTS = {"ativo": False, "porta": 0, "endereco": "127.0.0.1", "arquivo": "", "intervalo_s": 15.0}
+
+# nome → (tipo, ajuda); só métricas declaradas aqui são exportadas com HELP/TYPE
+METRICAS: Dict[str, Tuple[str, str]] = {
+    "bora_http_em_andamento": ("gauge", "Requisições HTTP em andamento por host"),
+    "bora_http_fila": ("gauge", "Requisições aguardando a vez do host no rate limiter"),
+    "bora_http_requisicoes_total": ("counter", "Respostas HTTP por host e status (inclui tentativas)"),
+    "bora_http_retentativas_total": ("counter", "Novas tentativas por host e motivo (429, 5xx, timeout)"),
+    "bora_http_429_total": ("counter", "Respostas 429 (Too Many Requests) por host"),
+    "bora_bytes_baixados_total": ("counter", "Bytes de imagem gravados em disco por host"),
+    "bora_imagens_total": ("counter", "Imagens por plataforma e resultado (salva, rejeitada, falha)"),
+    "bora_metadados_urls_total": ("counter", "URLs de produto processadas por resultado (ok, falha)"),
+    "bora_metadados_pendentes": ("gauge", "URLs de produto aguardando coleta de metadados"),
+}
+
+_ATIVO = False
+_lock = threading.Lock()
+_valores: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_servidor: Optional[ThreadingHTTPServer] = None
+_escritor: Optional[threading.Thread] = None
+_parar = threading.Event()
+
+
+# ------------------------------ Registro ------------------------------
+def ativo() -> bool:
+    return _ATIVO
+
+
+def add(nome: str, valor: float = 1.0, **rotulos) -> None:
+    """Soma valor à série (nome, rótulos); negativo só faz sentido em medidores."""
+    if not _ATIVO:
+        return
+    chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+    with _lock:
+        _valores[chave] = _valores.get(chave, 0.0) + valor
+
+
+def inc(nome: str, **rotulos) -> None:
+    if not _ATIVO:
+        return
+    add(nome, 1.0, **rotulos)
+
+
+def set_valor(nome: str, valor: float, **rotulos) -> None:
+    if not _ATIVO:
+        return
+    chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+    with _lock:
+        _valores[chave] = float(valor)
+
+
+def valor(nome: str, **rotulos) -> float:
+    chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+    with _lock:
+        return _valores.get(chave, 0.0)
+
+
+def limpar() -> None:
+    with _lock:
+        _valores.clear()
+
+
+# ------------------------------ Formato -------------------------------
+def _escapar(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(v)
+
+
+def texto_prometheus() -> str:
+    """Todas as séries no formato de exposição texto (versão 0.0.4)."""
+    with _lock:
+        itens = sorted(_valores.items())
+    linhas = []
+    atual = None
+    for (nome, rotulos), v in itens:
+        if nome != atual:
+            atual = nome
+            tipo, ajuda = METRICAS.get(nome, ("untyped", ""))
+            if ajuda:
+                linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+        rot = ",".join(f'{k}="{_escapar(val)}"' for k, val in rotulos)
+        linhas.append(f"{nome}{{{rot}}} {_numero(v)}" if rot else f"{nome} {_numero(v)}")
+    return "\n".join(linhas) + "\n"
+
+
+# ------------------------------ Exportação ----------------------------
+def _handler():
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):  # silencioso
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            corpo = texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+    return Handler
+
+
+def escrever_arquivo(path: Path) -> None:
+    """Grava via arquivo temporário + os.replace (o coletor nunca lê um arquivo pela metade)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(texto_prometheus(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _loop_arquivo(path: Path, intervalo: float) -> None:
+    while not _parar.wait(intervalo):
+        try:
+            escrever_arquivo(path)
+        except OSError:
+            pass
+    try:
+        escrever_arquivo(path)  # retrato final ao encerrar
+    except OSError:
+        pass
+
+
+def configurar(config: Optional[Dict] = None, logger=None) -> bool:
+    """Liga o registro e os exportadores conforme config["metricas"]; devolve se ficou ativo."""
+    global _ATIVO, _servidor, _escritor
+    cfg = dict(DEFAULTS)
+    cfg.update((config or {}).get("metricas") or {})
+    with _lock:
+        if not cfg["ativo"]:
+            return _ATIVO
+        _ATIVO = True
+    porta = int(cfg.get("porta") or 0)
+    if porta and _servidor is None:
+        try:
+            _servidor = ThreadingHTTPServer((cfg.get("endereco") or "127.0.0.1", porta), _handler())
+            _servidor.daemon_threads = True
+            threading.Thread(target=_servidor.serve_forever, daemon=True, name="bora-metricas").start()
+            if logger:
+                logger.log(f"Métricas em http://{cfg.get('endereco')}:{porta}/metrics", "INFO", "📈")
+        except OSError as e:
+            _servidor = None
+            if logger:
+                logger.log(f"Porta de métricas {porta} indisponível: {e}", "WARNING", "⚠️")
+    arquivo = str(cfg.get("arquivo") or "")
+    if arquivo and _escritor is None:
+        _parar.clear()
+        _escritor = threading.Thread(target=_loop_arquivo, args=(Path(arquivo), float(cfg["intervalo_s"])),
+                                     daemon=True, name="bora-metricas-arquivo")
+        _escritor.start()
+        if logger:
+            logger.log(f"Métricas gravadas em {arquivo} a cada {cfg['intervalo_s']}s", "INFO", "📈")
+    return True
+
+
+def encerrar() -> None:
+    """Para os exportadores (o textfile recebe um último retrato) e desliga o registro."""
+    global _ATIVO, _servidor, _escritor
+    _parar.set()
+    if _escritor is not None:
+        _escritor.join(timeout=5)
+        _escritor = None
+    if _servidor is not None:
+        _servidor.shutdown()
+        _servidor.server_close()
+        _servidor = None
+    _ATIVO = False
+
@@ -0,0 +1,85 @@
+# Módulo: price_index.py
+# Função: índice invertido de regras de preço (palavras-chave de prices.json + faixas de regras_preco.json).
+# Chamadas: CSVGenerator._price_for_name -> PriceIndex.lookup(nome)
+# Regras:
+#  - uma regra casa quando TODOS os tokens da chave aparecem no nome (palavra inteira);
+#  - palavras-chave (prices.json) têm prioridade sobre faixas (regras_preco.json);
+#  - dentro da mesma prioridade vence o maior (promocional, preço); empate → primeira no JSON;
+#  - nada casou → preço padrão.
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+PRIORIDADE_PALAVRA_CHAVE = 2
+PRIORIDADE_FAIXA = 1
+
+
+class _Regra:
+    __slots__ = ('tokens', 'preco', 'promo', 'fonte', 'prioridade', 'ordem')
+
+    def __init__(self, tokens, preco, promo, fonte, prioridade, ordem):
+        self.tokens = tokens
+        self.preco = preco
+        self.promo = promo
+        self.fonte = fonte
+        self.prioridade = prioridade
+        self.ordem = ordem
+
+    def chave(self) -> Tuple[int, float, float, int]:
+        return (self.prioridade, self.promo, self.preco, -self.ordem)
+
+
+def _num(v) -> float:
+    try:
+        return float(v or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PriceIndex:
+    def __init__(self, prices: Dict[str, Any], tokenize: Callable[[str], Iterable[str]],
+                 regras: Optional[Dict[str, Any]] = None):
+        self.tokenize = tokenize
+        padrao = (prices or {}).get('preco_padrao') or {}
+        self.padrao = (_num(padrao.get('preco')), _num(padrao.get('preco_promocional')))
+        self._regras: List[_Regra] = []
+        self._por_token: Dict[str, List[_Regra]] = {}
+
+        for key, val in ((prices or {}).get('palavras_chave') or {}).items():
+            if not isinstance(val, dict):
+                continue
+            self._add(key, _num(val.get('preco')), _num(val.get('preco_promocional')),
+                      f"palavra-chave: {key}", PRIORIDADE_PALAVRA_CHAVE)
+
+        for key, val in (regras or {}).items():
+            if not isinstance(val, dict):
+                continue
+            base = _num(val.get('preco_base'))
+            mult = _num(val.get('multiplicador')) or 1.0
+            self._add(key, round(base * mult, 2), 0.0,
+                      f"regra: {key} ({base:.2f} × {mult:g})", PRIORIDADE_FAIXA)
+
+    def _add(self, key: str, preco: float, promo: float, fonte: str, prioridade: int) -> None:
+        tokens = frozenset(self.tokenize(key))
+        if not tokens:
+            return
+        regra = _Regra(tokens, preco, promo, fonte, prioridade, len(self._regras))
+        self._regras.append(regra)
+        # cada regra entra no índice por um único token → verificada no máximo 1x por nome
+        self._por_token.setdefault(min(tokens), []).append(regra)
+
+    def __len__(self) -> int:
+        return len(self._regras)
+
+    def lookup(self, nome: str) -> Tuple[float, float, str]:
+        """(preço, promocional, fonte) para o nome do produto."""
+        n_tokens = set(self.tokenize(nome))
+        best = None
+        for tok in n_tokens:
+            for regra in self._por_token.get(tok, ()):
+                if not regra.tokens.issubset(n_tokens):
+                    continue
+                if best is None or regra.chave() > best.chave():
+                    best = regra
+        if best is None:
+            return self.padrao[0], self.padrao[1], "preço padrão"
+        return best.preco, best.promo, best.fonte
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+profiling.py — Perfil de CPU e memória de uma execução, ligado pelo config ("profiling")
+- cProfile (padrão) ou amostragem com pyinstrument, se instalado (perfilador: "amostragem" | "auto")
+- tracemalloc opcional: retrato em cada marco(...) (fronteiras de etapa) + comparação entre marcos
+- Relatório em Logs/perfil-<nome>-<ts>.txt (top por tempo acumulado/próprio, top de alocações)
+  e Logs/perfil-<nome>-<ts>.prof (pstats; abre no snakeviz) quando o perfilador é o cProfile
+- Só a thread que abriu a sessão é medida pelo perfilador (workers do pool ficam de fora;
+  o tracemalloc enxerga todas as threads)
+
+Uso:
+    with sessao("pipeline", config_dict) as p:      # nulo se profiling.ativo=false e forcar=False
+        ...
+        marco("metadados")
+    p.arquivos  # [Path do .txt, Path do .prof]
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import linecache
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULTS = {
+    "ativo": False,
+    "perfilador": "cprofile",   # "cprofile" | "amostragem" (pyinstrument) | "auto"
+    "tracemalloc": False,
+    "quadros": 10,              # profundidade da pilha guardada pelo tracemalloc
+    "top": 30,                  # linhas por seção do relatório
+    "pasta": "Logs",
+}
+
+_ATUAL: Optional["SessaoPerfil"] = None
+_lock = threading.Lock()
+
+
+def _config(config: Optional[Dict]) -> Dict:
+    cfg = dict(DEFAULTS)
+    cfg.update((config or {}).get("profiling") or {})
+    return cfg
+
+
+class _SessaoNula:
+    arquivos: List[Path] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def marco(self, rotulo: str) -> None:
+        pass
+
+
+class SessaoPerfil:
+    def __init__(self, nome: str, cfg: Dict, logger=None):
+        self.nome = nome
+        self.cfg = cfg
+        self.logger = logger
+        self.top = int(cfg.get("top") or 30)
+        self.pasta = Path(cfg.get("pasta") or "Logs")
+        self.arquivos: List[Path] = []
+        self._perfilador = str(cfg.get("perfilador") or "cprofile").lower()
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._amostrador = None
+        self._memoria = bool(cfg.get("tracemalloc"))
+        self._iniciou_tracemalloc = False
+        self._marcos: List[Tuple[str, float, tracemalloc.Snapshot, int, int]] = []
+        self._inicio = 0.0
+        self._inicio_em = datetime.now()
+        self._inerte = False
+        self._medindo = False
+
+    # ------------------------------ Ciclo ------------------------------
+    def _novo_amostrador(self):
+        if self._perfilador not in ("amostragem", "auto"):
+            return None
+        try:
+            from pyinstrument import Profiler  # opcional
+        except ImportError:
+            if self._perfilador == "amostragem" and self.logger:
+                self.logger.log("pyinstrument não instalado; usando cProfile", "WARNING", "⚠️")
+            return None
+        return Profiler()
+
+    def __enter__(self) -> "SessaoPerfil":
+        global _ATUAL
+        with _lock:
+            if _ATUAL is not None:  # outra thread abriu uma sessão antes: esta fica inerte
+                self._inerte = True
+                return self
+            _ATUAL = self
+        if self._memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(int(self.cfg.get("quadros") or 10))
+                self._iniciou_tracemalloc = True
+            self.marco("inicio")
+        self._amostrador = self._novo_amostrador()
+        self._inicio = time.perf_counter()
+        if self._amostrador is not None:
+            self._amostrador.start()
+        else:
+            self._cprofile = cProfile.Profile()
+            try:
+                self._cprofile.enable()
+                self._medindo = True
+            except ValueError as e:  # outro perfilador/depurador já ativo no processo
+                self._cprofile = None
+                if self.logger:
+                    self.logger.log(f"cProfile indisponível: {e}", "WARNING", "⚠️")
+        return self
+
+    def __exit__(self, tipo, valor, tb) -> bool:
+        global _ATUAL
+        if self._inerte:
+            return False
+        duracao = time.perf_counter() - self._inicio
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._amostrador is not None:
+            self._amostrador.stop()
+        self._medindo = False
+        if self._memoria:
+            self.marco("fim")
+            if self._iniciou_tracemalloc:
+                tracemalloc.stop()
+        with _lock:
+            if _ATUAL is self:
+                _ATUAL = None
+        try:
+            self._salvar(duracao)
+        except Exception as e:  # o perfil nunca derruba a execução
+            if self.logger:
+                self.logger.log(f"Falha ao gravar perfil: {e}", "WARNING", "⚠️")
+        return False
+
+    def marco(self, rotulo: str) -> None:
+        """Retrato de memória na fronteira de uma etapa (só com tracemalloc ligado)."""
+        if not (self._memoria and tracemalloc.is_tracing()):
+            return
+        # o retrato não entra no perfil de CPU; o filtro (caro) fica para o relatório
+        pausar = self._cprofile is not None and self._medindo
+        if pausar:
+            self._cprofile.disable()
+        try:
+            atual, pico = tracemalloc.get_traced_memory()
+            self._marcos.append((rotulo, time.perf_counter(), tracemalloc.take_snapshot(), atual, pico))
+        finally:
+            if pausar:
+                self._cprofile.enable()
+
+    # ------------------------------ Relatório ---------------------------
+    def _secao_cpu(self, out: io.StringIO) -> None:
+        if self._amostrador is None and self._cprofile is None:
+            return
+        if self._amostrador is not None:
+            out.write("== Amostragem (pyinstrument) ==\n")
+            out.write(self._amostrador.output_text(unicode=True, color=False))
+            out.write("\n")
+            return
+        for titulo, ordem in (("tempo acumulado", "cumulative"), ("tempo próprio", "tottime")):
+            out.write(f"== Top {self.top} funções por {titulo} ==\n")
+            stats = pstats.Stats(self._cprofile, stream=out)
+            stats.strip_dirs().sort_stats(ordem).print_stats(self.top)
+
+    def _secao_memoria(self, out: io.StringIO) -> None:
+        if not self._marcos:
+            return
+        mb = 1024 * 1024
+        filtros = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+        self._marcos = [(r, t, snap.filter_traces(filtros), a, p) for r, t, snap, a, p in self._marcos]
+        out.write("== Memória (tracemalloc) ==\n")
+        for rotulo, _, _, atual, pico in self._marcos:
+            out.write(f"  {rotulo:<20} atual {atual / mb:8.1f} MB   pico {pico / mb:8.1f} MB\n")
+        ultimo = self._marcos[-1][2]
+        out.write(f"\n-- Top {self.top} locais de alocação (retrato '{self._marcos[-1][0]}') --\n")
+        for st in ultimo.statistics("lineno")[: self.top]:
+            out.write(f"  {st.size / 1024:10.1f} KiB  {st.count:8d} blocos  {st.traceback[0]}\n")
+        for (r0, _, s0, _, _), (r1, _, s1, _, _) in zip(self._marcos, self._marcos[1:]):
+            out.write(f"\n-- Crescimento {r0} → {r1} (top {min(self.top, 10)}) --\n")
+            for d in s1.compare_to(s0, "lineno")[: min(self.top, 10)]:
+                out.write(f"  {d.size_diff / 1024:+10.1f} KiB  {d.count_diff:+8d} blocos  {d.traceback[0]}\n")
+
+    def _salvar(self, duracao: float) -> None:
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        base = self.pasta / f"perfil-{self.nome}-{self._inicio_em:%Y%m%d-%H%M%S}"
+        out = io.StringIO()
+        perfilador = "pyinstrument" if self._amostrador is not None else ("cProfile" if self._cprofile else "-")
+        out.write(f"Perfil: {self.nome} | {perfilador} | {duracao:.2f}s | "
+                  f"thread {threading.current_thread().name} | {self._inicio_em:%d/%m/%Y %H:%M:%S}\n\n")
+        self._secao_cpu(out)
+        self._secao_memoria(out)
+        txt = base.with_suffix(".txt")
+        txt.write_text(out.getvalue(), encoding="utf-8")
+        self.arquivos.append(txt)
+        if self._cprofile is not None:
+            prof = base.with_suffix(".prof")
+            self._cprofile.dump_stats(str(prof))
+            self.arquivos.append(prof)
+        if self.logger:
+            self.logger.log(f"🔬 Perfil salvo em: {txt}", "SUCCESS", "🔬")
+
+
+def sessao(nome: str, config: Optional[Dict] = None, forcar: bool = False, memoria: Optional[bool] = None,
+           logger=None):
+    """Sessão de perfil se profiling.ativo (ou forcar); senão um contexto nulo.
+    Não aninha: com uma sessão já aberta, devolve o contexto nulo."""
+    cfg = _config(config)
+    if memoria is not None:
+        cfg["tracemalloc"] = memoria
+    if not (cfg["ativo"] or forcar) or _ATUAL is not None:
+        return _SessaoNula()
+    return SessaoPerfil(nome, cfg, logger)
+
+
+def marco(rotulo: str) -> None:
+    """Marca a fronteira de uma etapa na sessão aberta (no-op sem sessão)."""
+    s = _ATUAL
+    if s is not None:
+        s.marco(rotulo)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+rate_limiter.py — Controle de taxa adaptativo por host
+- Um intervalo mínimo entre requisições para cada host (netloc)
+- Respostas saudáveis reduzem o intervalo aos poucos (mais vazão)
+- 429/5xx/timeouts dobram o intervalo com jitter (backoff exponencial)
+- Respeita o cabeçalho Retry-After
+- Limites por host em config.json → "rate_limit" (substitui delay_padrao/delay_apos_erro)
+- Métricas (system.metrics): fila e em andamento por host, respostas por status, novas tentativas, 429
+- Cancelamento (system.cancelamento): esperas e backoff acordam na hora; sem novas tentativas após cancelar;
+  abortavel(r) fecha o socket de um download em streaming quando o job é cancelado
+
+Uso:
+    from system.rate_limiter import get_limiter
+    r = get_limiter().request(session, "GET", url, timeout=20)
+"""
+from __future__ import annotations
+
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from . import cancelamento, metrics
+from .tracing import span
+
+# Status que indicam sobrecarga/limite do servidor
+BACKOFF_STATUS = {429, 500, 502, 503, 504}
+
+DEFAULT_LIMITS = {
+    "delay": 0.5,          # intervalo inicial entre requisições (s)
+    "min_delay": 0.1,      # piso quando o host responde bem
+    "max_delay": 60.0,     # teto do backoff
+    "error_delay": 5.0,    # intervalo mínimo após erro
+    "speedup": 0.9,        # fator aplicado ao intervalo a cada sucesso
+    "max_retries": 3,      # novas tentativas em 429/5xx/timeout
+}
+
+
+@dataclass
+class _HostState:
+    delay: float
+    min_delay: float
+    max_delay: float
+    error_delay: float
+    speedup: float
+    max_retries: int
+    next_slot: float = 0.0
+    failures: int = 0
+
+
+def _load_config() -> Dict:
+    from system.config_service import get_config_service
+    return get_config_service().dados()
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Converte Retry-After (segundos ou data HTTP) em segundos."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+        return max(0.0, dt.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class HostRateLimiter:
+    def __init__(self, config: Optional[Dict] = None):
+        cfg = config or {}
+        rl = cfg.get("rate_limit") or {}
+        base = dict(DEFAULT_LIMITS)
+        # compatibilidade: chaves antigas servem de padrão se rate_limit não as definir
+        if "delay_padrao" in cfg:
+            base["delay"] = float(cfg["delay_padrao"])
+        if "delay_apos_erro" in cfg:
+            base["error_delay"] = float(cfg["delay_apos_erro"])
+        base.update(rl.get("default") or {})
+        self._default = base
+        self._hosts_cfg = {k.lower(): v for k, v in (rl.get("hosts") or {}).items()}
+        self._states: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------ Estado ------------------------------
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _limits_for(self, host: str) -> Dict:
+        limits = dict(self._default)
+        # casa host exato ou sufixo (ex.: "yupoo.com" cobre "loja.x.yupoo.com")
+        for key, val in self._hosts_cfg.items():
+            if host == key or host.endswith("." + key):
+                limits.update(val or {})
+                break
+        return limits
+
+    def _state(self, host: str) -> _HostState:
+        st = self._states.get(host)
+        if st is None:
+            lim = self._limits_for(host)
+            st = _HostState(
+                delay=float(lim["delay"]),
+                min_delay=float(lim["min_delay"]),
+                max_delay=float(lim["max_delay"]),
+                error_delay=float(lim["error_delay"]),
+                speedup=float(lim["speedup"]),
+                max_retries=int(lim["max_retries"]),
+            )
+            self._states[host] = st
+        return st
+
+    def current_delay(self, url: str) -> float:
+        with self._lock:
+            return self._state(self.host_of(url)).delay
+
+    # ------------------------------ Controle ----------------------------
+    def wait(self, url: str) -> None:
+        """Reserva o próximo horário livre do host e dorme até ele."""
+        host = self.host_of(url)
+        with self._lock:
+            st = self._state(host)
+            now = time.monotonic()
+            slot = max(now, st.next_slot)
+            st.next_slot = slot + st.delay
+        pause = slot - time.monotonic()
+        if pause > 0:
+            cancelamento.esperar(pause)
+        cancelamento.verificar()
+
+    def success(self, url: str) -> None:
+        with self._lock:
+            st = self._state(self.host_of(url))
+            st.failures = 0
+            st.delay = max(st.min_delay, st.delay * st.speedup)
+
+    def failure(self, url: str, retry_after: Optional[float] = None) -> float:
+        """Registra falha (429/5xx/timeout) e devolve a espera aplicada ao host."""
+        with self._lock:
+            st = self._state(self.host_of(url))
+            st.failures += 1
+            backoff = max(st.error_delay, st.delay * 2)
+            backoff = min(st.max_delay, backoff) * random.uniform(0.8, 1.2)
+            st.delay = min(st.max_delay, max(st.delay * 2, st.min_delay))
+            if retry_after is not None:
+                backoff = max(backoff, min(retry_after, st.max_delay * 5))
+            st.next_slot = max(st.next_slot, time.monotonic() + backoff)
+            return backoff
+
+    def max_retries(self, url: str) -> int:
+        with self._lock:
+            return self._state(self.host_of(url)).max_retries
+
+    # ------------------------------ HTTP --------------------------------
+    def request(self, session, method: str, url: str, **kwargs) -> requests.Response:
+        """Executa a requisição respeitando o limite do host.
+        Faz novas tentativas em 429/5xx/timeout; devolve a última resposta
+        (o chamador decide sobre raise_for_status) ou relança a última exceção.
+        """
+        sess = session or requests
+        retries = self.max_retries(url)
+        attempt = 0
+        espera = 0.0
+        host = self.host_of(url)
+        with span("fetch", url=url, host=host, metodo=method) as s:
+            while True:
+                t = time.perf_counter()
+                metrics.add("bora_http_fila", 1, host=host)
+                try:
+                    self.wait(url)
+                finally:
+                    metrics.add("bora_http_fila", -1, host=host)
+                espera += time.perf_counter() - t
+                metrics.add("bora_http_em_andamento", 1, host=host)
+                try:
+                    r = sess.request(method, url, **kwargs)
+                except (requests.Timeout, requests.ConnectionError) as e:
+                    metrics.inc("bora_http_requisicoes_total", host=host, status=type(e).__name__)
+                    cancelamento.verificar()  # conexão derrubada pelo cancelamento: sem nova tentativa
+                    self.failure(url)
+                    if attempt >= retries:
+                        s.set(tentativas=attempt + 1, espera_s=round(espera, 3))
+                        raise
+                    metrics.inc("bora_http_retentativas_total", host=host, motivo="timeout")
+                    attempt += 1
+                    continue
+                finally:
+                    metrics.add("bora_http_em_andamento", -1, host=host)
+                metrics.inc("bora_http_requisicoes_total", host=host, status=r.status_code)
+                if r.status_code in BACKOFF_STATUS:
+                    if r.status_code == 429:
+                        metrics.inc("bora_http_429_total", host=host)
+                    self.failure(url, _retry_after_seconds(r.headers.get("Retry-After")))
+                    if attempt >= retries:
+                        s.set(status=r.status_code, tentativas=attempt + 1, espera_s=round(espera, 3))
+                        return r
+                    metrics.inc("bora_http_retentativas_total", host=host, motivo=r.status_code)
+                    r.close()
+                    cancelamento.verificar()
+                    attempt += 1
+                    continue
+                self.success(url)
+                # stream=True: o tempo cobre só até os cabeçalhos; o corpo entra no span de download
+                tamanho = int(r.headers.get("Content-Length") or 0)
+                if not tamanho and not kwargs.get("stream"):
+                    tamanho = len(r.content or b"")
+                s.set(status=r.status_code, tentativas=attempt + 1, espera_s=round(espera, 3), bytes=tamanho)
+                return r
+
+    def get(self, session, url: str, **kwargs) -> requests.Response:
+        return self.request(session, "GET", url, **kwargs)
+
+
+def abortar(resposta: requests.Response) -> None:
+    """Derruba a conexão de uma resposta em streaming (a leitura parada em outra thread acorda)."""
+    raw = getattr(resposta, "raw", None)
+    conexao = getattr(raw, "_connection", None) or getattr(raw, "connection", None)
+    sock = getattr(conexao, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)  # close() sozinho não interrompe um recv bloqueado
+        except OSError:
+            pass
+    resposta.close()
+
+
+@contextmanager
+def abortavel(resposta: requests.Response,
+              token: Optional[cancelamento.TokenCancelamento] = None) -> Iterator[requests.Response]:
+    """Enquanto o corpo é lido, cancelar o token (ou o do contexto) aborta a conexão."""
+    token = token or cancelamento.atual()
+    if token is None:
+        yield resposta
+        return
+    with token.ao_cancelar(lambda: abortar(resposta)):
+        yield resposta
+
+
+# Instância compartilhada entre crawler, scraper e downloaders
+_SHARED: Optional[HostRateLimiter] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_limiter(config: Optional[Dict] = None) -> HostRateLimiter:
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = HostRateLimiter(config if config is not None else _load_config())
+        return _SHARED
+
+
+def reset_limiter() -> None:
+    """Descarta o estado compartilhado (ex.: após salvar novas configurações)."""
+    global _SHARED
+    with _SHARED_LOCK:
+        _SHARED = None
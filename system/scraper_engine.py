@@ -3,11 +3,17 @@
 # Função: extrai metadados mínimos de páginas de produto WordPress e Yupoo.
 # Chamadas: DataProcessor -> get_metadata(url, platform)
 # Atualização: fallbacks extras de título Yupoo; limpeza de sufixos; filtros de imagens.
+# Cache: resultados ficam em album_cache (TTL+LRU persistente); refresh=True ignora o cache.
 
 import re
 import requests
 from bs4 import BeautifulSoup
 
+from .rate_limiter import get_limiter
+from .album_cache import get_album_cache
+from .text_norm import clean_site_suffix
+from .tracing import span
+
 UA_POOL = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17 Safari/605.1.15",
@@ -32,17 +38,13 @@ def _images_from_meta(soup):
     return out
 
 def _clean_yupoo_suffix(txt: str) -> str:
-    if not txt:
-        return ""
-    # Remover sufixos comuns
-    txt = re.sub(r"\s*\|\s*又拍图片管家\s*$", "", txt)
-    txt = re.sub(r"\s*\|\s*Yupoo\s*$", "", txt, flags=re.I)
-    txt = re.sub(r"\s*-\s*相册\s*-\s*Yupoo\s*$", "", txt, flags=re.I)
-    return txt.strip()
+    # Remover sufixos comuns (mesma limpeza do app.py: um só título no album_cache)
+    return clean_site_suffix(txt)
 
 def scrape_wordpress(url: str) -> dict:
-    r = _session().get(url, allow_redirects=True, timeout=20)
-    soup = BeautifulSoup(r.text, "lxml")
+    r = get_limiter().get(_session(), url, allow_redirects=True, timeout=20)
+    with span("parse", bytes=len(r.content or b"")):
+        soup = BeautifulSoup(r.text, "lxml")
     # título
     h1 = soup.select_one("h1")
     album_title = (h1.get_text(strip=True) if h1 else "") or _title_from_og(soup)
@@ -99,8 +101,9 @@ def _yupoo_title_fallbacks(soup) -> str:
     return ""
 
 def scrape_yupoo(url: str) -> dict:
-    r = _session().get(url, allow_redirects=True, timeout=20)
-    soup = BeautifulSoup(r.text, "lxml")
+    r = get_limiter().get(_session(), url, allow_redirects=True, timeout=20)
+    with span("parse", bytes=len(r.content or b"")):
+        soup = BeautifulSoup(r.text, "lxml")
     raw_title = _yupoo_title_fallbacks(soup)
     raw_title = _clean_yupoo_suffix(raw_title)
 
@@ -126,12 +129,26 @@ def scrape_yupoo(url: str) -> dict:
         "images_candidates": imgs,
     }
 
-def get_metadata(url: str, platform: str) -> dict:
-    try:
-        if platform == "wordpress":
-            return scrape_wordpress(url)
-        if platform == "yupoo":
-            return scrape_yupoo(url)
-    except Exception:
-        pass
-    return {"album_title": "", "page_title": "", "raw_sizes": None, "images_candidates": []}
+def get_metadata(url: str, platform: str, refresh: bool = False) -> dict:
+    # cache compartilhado com app.py: reprocessar a mesma URL não refaz a requisição
+    with span("extrair", url=url, plataforma=platform) as s:
+        cache = get_album_cache()
+        if not refresh:
+            hit = (cache.get(url) or {}).get("metadata")
+            if hit:
+                s.set(cache=True)
+                return dict(hit)
+        try:
+            meta = None
+            if platform == "wordpress":
+                meta = scrape_wordpress(url)
+            elif platform == "yupoo":
+                meta = scrape_yupoo(url)
+            if meta is not None:
+                if meta.get("album_title") or meta.get("images_candidates"):
+                    cache.update(url, title=meta.get("page_title") or meta.get("album_title"),
+                                 images=meta.get("images_candidates"), metadata=meta)
+                return meta
+        except Exception as e:
+            s.set(falha=type(e).__name__)
+        return {"album_title": "", "page_title": "", "raw_sizes": None, "images_candidates": []}
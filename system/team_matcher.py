@@ -0,0 +1,113 @@
+# Módulo: team_matcher.py
+# Função: casar nomes de equipes (equipes.json) em textos de produto com um autômato Aho-Corasick.
+# Chamadas: CSVGenerator._team_info_for_product -> TeamMatcher.for_buckets(equipes).find(texto)
+# Semântica (igual à varredura antiga por bucket): dentro de cada bucket vence a chave mais longa
+# contida no texto (empate → a que aparece primeiro no JSON); entre buckets vale a ordem de prioridade.
+
+import hashlib
+import json
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+BUCKET_ORDER = ('times_brasileiros', 'times_internacionais', 'selecoes')
+
+_MEMO_MAX = 20000
+_CACHE: Dict[str, "TeamMatcher"] = {}
+
+
+class TeamMatcher:
+    def __init__(self, buckets: Dict[str, Dict[str, Any]], norm: Callable[[str], str],
+                 order: Sequence[str] = BUCKET_ORDER):
+        self.norm = norm
+        self.order = tuple(order)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, int, int, Any]]] = [[]]  # (bucket, len, seq, info)
+
+        seq = 0
+        for b_idx, name in enumerate(self.order):
+            for team_key, info in (buckets.get(name) or {}).items():
+                tk = norm(team_key)
+                if not tk:
+                    continue
+                state = 0
+                for ch in tk:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        outputs.append([])
+                    state = nxt
+                outputs[state].append((b_idx, len(tk), seq, info))
+                seq += 1
+
+        # links de falha (BFS) e saídas herdadas do sufixo
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                cand = goto[f].get(ch, 0)
+                fail[nxt] = cand if cand != nxt else 0
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+        # por estado, só interessa o melhor candidato de cada bucket
+        best: List[Dict[int, Tuple[int, int, Any]]] = []
+        for outs in outputs:
+            per_bucket: Dict[int, Tuple[int, int, Any]] = {}
+            for b_idx, length, s, info in outs:
+                cur = per_bucket.get(b_idx)
+                if cur is None or (length, -s) > (cur[0], -cur[1]):
+                    per_bucket[b_idx] = (length, s, info)
+            best.append(per_bucket)
+
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+        self._memo: Dict[str, Optional[Any]] = {}
+
+    @classmethod
+    def for_buckets(cls, buckets: Dict[str, Dict[str, Any]], norm: Callable[[str], str]) -> "TeamMatcher":
+        """Autômato construído uma vez por conteúdo de equipes.json (cache por hash)."""
+        key = hashlib.sha1(json.dumps(buckets, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+        matcher = _CACHE.get(key)
+        if matcher is None:
+            _CACHE.clear()
+            matcher = _CACHE[key] = cls(buckets, norm)
+        return matcher
+
+    def match_buckets(self, text: str) -> Dict[int, Tuple[int, int, Any]]:
+        """Melhor (len, seq, info) de cada bucket encontrado no texto."""
+        goto, fail, best = self._goto, self._fail, self._best
+        found: Dict[int, Tuple[int, int, Any]] = {}
+        state = 0
+        for ch in self.norm(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for b_idx, cand in best[state].items():
+                cur = found.get(b_idx)
+                if cur is None or (cand[0], -cand[1]) > (cur[0], -cur[1]):
+                    found[b_idx] = cand
+        return found
+
+    def find(self, text: str) -> Optional[Any]:
+        """Info da equipe do bucket de maior prioridade presente no texto (ou None)."""
+        if not text:
+            return None
+        if text in self._memo:
+            return self._memo[text]
+        found = self.match_buckets(text)
+        info = None
+        for b_idx in range(len(self.order)):
+            if b_idx in found and found[b_idx][2]:
+                info = found[b_idx][2]
+                break
+        if len(self._memo) >= _MEMO_MAX:
+            self._memo.clear()
+        self._memo[text] = info
+        return info
@@ -0,0 +1,126 @@
+# Módulo: text_norm.py
+# Função: normalização de texto compartilhada (acentos, slug, nomes de pasta) com regex pré-compiladas
+#         e caches LRU limitados — os mesmos títulos passam por CSV, metadados e app várias vezes.
+# Chamadas:
+#   CSVGenerator._strip_accents/_norm/_tokenize_words/_slug_from_name -> strip_accents/norm/tokenize_words/slug_from_name
+#   app.SanitizadorNomes._remover_acentos -> strip_accents
+#   data_processor_main._sanitize_win/_intersecao_textual -> sanitize_win/intersecao_textual
+#   metadata_generator._sanitize_folder_name -> sanitize_folder_name
+#   scraper_engine._clean_yupoo_suffix, app._buscar_titulo -> clean_site_suffix (o mesmo título no album_cache)
+# Regras: resultados idênticos às versões antigas de cada módulo (só mudou onde o trabalho é feito).
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Tuple
+
+CACHE_MAX = 65536
+
+_RE_SPACES = re.compile(r'\s+')
+_RE_SLUG_INVALID = re.compile(r'[^a-z0-9_-]+')
+_RE_MULTI_DASH = re.compile(r'-{2,}')
+_RE_WORDS = re.compile(r'[a-z0-9]+')
+_RE_SIZE_TAIL_X = re.compile(r'(S-\s*X{1,4}L)\d+', re.I)
+_RE_SIZE_TAIL_D = re.compile(r'(S-\s*\dXL)\d*', re.I)
+_RE_SIZE_TAIL_FOLDER = re.compile(r'(S-X{0,4}XL|S-\dXL)\d+\b', re.IGNORECASE)
+
+# data_processor_main: '/' vira '-', o resto some
+_WIN_DROP = str.maketrans('', '', '<>:"\\|?*')
+# metadata_generator: todos os proibidos viram '_'
+_WIN_UNDERSCORE = str.maketrans({ch: '_' for ch in '<>:"/\\|?*'})
+_SITE_SUFFIXES = (' | Yupoo', ' | 又拍图片管家', '| Yupoo', '| 又拍图片管家')
+# scraper_engine: sufixos do <title> das páginas Yupoo
+_RE_TITLE_SUFFIXES = (
+    re.compile(r'\s*\|\s*又拍图片管家\s*$'),
+    re.compile(r'\s*\|\s*Yupoo\s*$', re.I),
+    re.compile(r'\s*-\s*相册\s*-\s*Yupoo\s*$', re.I),
+)
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def strip_accents(text: str) -> str:
+    if not text:
+        return ''
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+def norm(s: str) -> str:
+    return strip_accents((s or '').lower())
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def tokenize_words(s: str) -> Tuple[str, ...]:
+    return tuple(_RE_WORDS.findall(norm(s)))
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def slug_from_name(name: str) -> str:
+    s = norm(name)
+    s = s.replace('/', '-').replace('\\', '-')
+    s = _RE_SPACES.sub('-', s)
+    s = _RE_SLUG_INVALID.sub('', s)
+    s = _RE_MULTI_DASH.sub('-', s).strip('-')
+    if len(s) > 120:
+        s = s[:120].rstrip('-')
+    return s
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def sanitize_win(name: str) -> str:
+    cleaned = name.replace('/', '-').translate(_WIN_DROP).strip().rstrip(' .')
+    return cleaned[:120]
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def intersecao_textual(a: str, b: str) -> str:
+    a, b = (a or '').strip(), (b or '').strip()
+    if not a: return b
+    if not b: return a
+    al, bl = a.lower(), b.lower()
+    if al in bl: base = a
+    elif bl in al: base = b
+    else:
+        aw, bw = a.split(), b.split()
+        common = []
+        for x, y in zip(aw, bw):
+            if x.lower() == y.lower(): common.append(x)
+            else: break
+        base = ' '.join(common) if common else a
+    base = base.replace('25/26', '25-26')
+    base = _RE_SIZE_TAIL_X.sub(r'\1', base)
+    base = _RE_SIZE_TAIL_D.sub(r'\1', base)
+    return base.strip()
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def clean_site_suffix(txt: str) -> str:
+    if not txt:
+        return ''
+    for rx in _RE_TITLE_SUFFIXES:
+        txt = rx.sub('', txt)
+    return txt.strip()
+
+
+@lru_cache(maxsize=CACHE_MAX)
+def sanitize_folder_name(name: str) -> str:
+    name = name.replace('25/26', '25-26').replace('24/25', '24-25').replace('23/24', '23-24')
+    for suf in _SITE_SUFFIXES:
+        name = name.replace(suf, '').strip()
+    name = _RE_SIZE_TAIL_FOLDER.sub(r'\1', name)
+    name = name.translate(_WIN_UNDERSCORE)
+    return name.rstrip(' .')
+
+
+def cache_info() -> dict:
+    """Estatísticas dos caches (diagnóstico/benchmark)."""
+    return {f.__name__: f.cache_info() for f in
+            (strip_accents, tokenize_words, slug_from_name, sanitize_win, intersecao_textual, clean_site_suffix,
+             sanitize_folder_name)}
+
+
+def cache_clear() -> None:
+    for f in (strip_accents, tokenize_words, slug_from_name, sanitize_win, intersecao_textual, clean_site_suffix,
+              sanitize_folder_name):
+        f.cache_clear()
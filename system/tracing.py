@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+tracing.py — Spans de tempo por etapa e relatório de desempenho da execução
+- span("fetch", url=..., host=...) como gerenciador de contexto; filhos herdam o span aberto (contextvars)
+- execucao("metadados") abre a raiz; ao fechar grava Logs/desempenho-<nome>-<ts>.json
+- Sem execução ativa, span() devolve um objeto nulo compartilhado (custo ~ uma consulta ao contextvar)
+- Threads: envolva a função com propagar(fn) para que os spans do worker entrem na mesma árvore
+- Memória limitada em crawls longos: cada span fechado entra nos agregados e é descartado;
+  só uma amostra (reservatório de AMOSTRA_SPANS) fica crua
+
+Relatório:
+    por_etapa        contagem, total, média, p95 (histograma logarítmico, erro < 2%) e máximo por nome
+    por_caminho      mesma agregação pelo caminho na árvore (metadados/extrair/fetch)
+    por_host         requisições, tempo, bytes, erros e status por host
+    urls_mais_lentas as 20 URLs que mais consumiram tempo (span mais externo de cada URL; acima de
+                     MAX_URLS URLs acompanhadas, as mais rápidas saem da disputa)
+    amostra          até AMOSTRA_SPANS spans crus (nome, caminho, ms, url) escolhidos ao acaso
+
+Uso:
+    with execucao("metadados", urls=10) as run:
+        with span("extrair", url=u) as s:
+            ...
+            s.set(status=200)
+    run.arquivo  # Path do relatório
+"""
+from __future__ import annotations
+
+import contextvars
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+PASTA_PADRAO = Path("Logs")
+TOP_URLS = 20
+MAX_URLS = 5000       # URLs acompanhadas para urls_mais_lentas antes de podar as mais rápidas
+AMOSTRA_SPANS = 200   # spans crus guardados no relatório
+_RAZAO_BALDE = 1.02   # largura relativa dos baldes do histograma (erro do percentil)
+_MENOR_BALDE = 1e-6
+
+_ids = itertools.count(1)
+_SPAN_ATUAL: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("bora_span", default=None)
+
+
+class _SpanNulo:
+    """Usado quando não há execução ativa: nada é medido nem guardado."""
+    __slots__ = ()
+    relatorio = None
+    arquivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def resumo(self, n: int = 3) -> List[str]:
+        return []
+
+
+_NULO = _SpanNulo()
+
+
+class Span:
+    __slots__ = ("id", "nome", "attrs", "pai", "execucao", "caminho", "inicio", "fim", "erro", "_token")
+    # quando execucao() vira span de uma execução maior, quem grava o relatório é a raiz
+    relatorio = None
+    arquivo = None
+
+    def __init__(self, nome: str, pai: Optional["Span"], execucao: "Execucao", attrs: Dict[str, Any]):
+        self.id = next(_ids)
+        self.nome = nome
+        self.attrs = attrs
+        self.pai = pai
+        self.execucao = execucao
+        self.caminho = f"{pai.caminho}/{nome}" if pai else nome
+        self.inicio = 0.0
+        self.fim = 0.0
+        self.erro: Optional[str] = None
+        self._token = None
+
+    @property
+    def duracao(self) -> float:
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def resumo(self, n: int = 3) -> List[str]:
+        return []
+
+    def __enter__(self) -> "Span":
+        self.inicio = time.perf_counter()
+        self._token = _SPAN_ATUAL.set(self)
+        return self
+
+    def __exit__(self, tipo, valor, tb) -> bool:
+        self.fim = time.perf_counter()
+        if tipo is not None:
+            self.erro = tipo.__name__
+        try:
+            _SPAN_ATUAL.reset(self._token)
+        except ValueError:  # fechado em outro contexto
+            _SPAN_ATUAL.set(self.pai)
+        self.execucao._registrar(self)
+        return False
+
+
+def span(nome: str, **attrs):
+    """Span filho do span aberto neste contexto; nulo se não houver execução ativa."""
+    pai = _SPAN_ATUAL.get()
+    if pai is None:
+        return _NULO
+    if "url" in attrs and "host" not in attrs:
+        attrs["host"] = urlparse(attrs["url"]).netloc.lower()
+    return Span(nome, pai, pai.execucao, attrs)
+
+
+def ativo() -> bool:
+    return _SPAN_ATUAL.get() is not None
+
+
+def registrar(nome: str, duracao: float, **attrs) -> None:
+    """Span já medido (ex.: tempo somado dentro de um laço) como filho do span atual."""
+    pai = _SPAN_ATUAL.get()
+    if pai is None:
+        return
+    s = Span(nome, pai, pai.execucao, attrs)
+    s.fim = time.perf_counter()
+    s.inicio = s.fim - duracao
+    pai.execucao._registrar(s)
+
+
+def propagar(fn: Callable) -> Callable:
+    """Envolve fn para rodar (em outra thread) com o span atual como pai."""
+    ctx = contextvars.copy_context()
+
+    def _rodar(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return _rodar
+
+
+class _Agregado:
+    """Contagem, soma, máximo, erros e histograma logarítmico das durações (memória constante)."""
+    __slots__ = ("contagem", "total", "maximo", "erros", "baldes")
+
+    def __init__(self):
+        self.contagem = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.erros = 0
+        self.baldes: Dict[int, int] = defaultdict(int)
+
+    def add(self, d: float, erro: bool) -> None:
+        self.contagem += 1
+        self.total += d
+        self.maximo = max(self.maximo, d)
+        self.erros += bool(erro)
+        self.baldes[0 if d <= _MENOR_BALDE else int(math.log(d / _MENOR_BALDE, _RAZAO_BALDE)) + 1] += 1
+
+    def percentil(self, p: float) -> float:
+        k = min(self.contagem - 1, max(0, int(round(p / 100.0 * (self.contagem - 1)))))
+        vistos = 0
+        for b in sorted(self.baldes):
+            vistos += self.baldes[b]
+            if vistos > k:
+                return min(self.maximo, _MENOR_BALDE * _RAZAO_BALDE ** b)  # limite superior do balde
+        return self.maximo
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "contagem": self.contagem,
+            "total_s": round(self.total, 3),
+            "media_ms": round(self.total / self.contagem * 1000, 2),
+            "p95_ms": round(self.percentil(95) * 1000, 2),
+            "max_ms": round(self.maximo * 1000, 2),
+            "erros": self.erros,
+        }
+
+
+class Execucao:
+    """Raiz de uma execução; agrega os spans conforme fecham e monta o relatório."""
+
+    def __init__(self, nome: str, pasta: Path = PASTA_PADRAO, gravar: bool = True, **attrs):
+        self.nome = nome
+        self.pasta = Path(pasta)
+        self.gravar = gravar
+        self.raiz = Span(nome, None, self, attrs)
+        self.total_spans = 0
+        self._por_nome: Dict[str, _Agregado] = defaultdict(_Agregado)
+        self._por_caminho: Dict[str, _Agregado] = defaultdict(_Agregado)
+        self._hosts: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"requisicoes": 0, "total_s": 0.0, "bytes": 0, "erros": 0, "status": defaultdict(int)})
+        self._por_url: Dict[str, Dict[str, Any]] = {}
+        self.amostra: List[Dict[str, Any]] = []
+        self._sorteio = random.Random(0)
+        self._lock = threading.Lock()
+        self.inicio_em = datetime.now()
+        self.relatorio: Optional[Dict[str, Any]] = None
+        self.arquivo: Optional[Path] = None
+
+    def _registrar(self, s: Span) -> None:
+        if s is self.raiz:
+            return
+        d = s.duracao
+        url = s.attrs.get("url")
+        # só o span mais externo de cada URL conta (fetch dentro de extrair não soma duas vezes)
+        externo = bool(url) and not (s.pai and s.pai.attrs.get("url") == url)
+        with self._lock:
+            self.total_spans += 1
+            self._por_nome[s.nome].add(d, s.erro)
+            self._por_caminho[s.caminho].add(d, s.erro)
+            if s.nome == "fetch":
+                h = self._hosts[s.attrs.get("host") or "?"]
+                h["requisicoes"] += 1
+                h["total_s"] += d
+                h["bytes"] += int(s.attrs.get("bytes") or 0)
+                status = s.attrs.get("status")
+                if s.erro or (isinstance(status, int) and status >= 400):
+                    h["erros"] += 1
+                h["status"][str(status if status is not None else s.erro)] += 1
+            if externo:
+                u = self._por_url.get(url)
+                if u is None:
+                    if len(self._por_url) >= MAX_URLS:
+                        self._podar_urls()
+                    u = self._por_url[url] = {"url": url, "total_s": 0.0, "spans": defaultdict(float)}
+                u["total_s"] += d
+                u["spans"][s.nome] += d
+            # reservatório: cada span fechado tem a mesma chance de estar na amostra
+            cru = None
+            if len(self.amostra) < AMOSTRA_SPANS:
+                cru = len(self.amostra)
+                self.amostra.append({})
+            else:
+                j = self._sorteio.randrange(self.total_spans)
+                cru = j if j < AMOSTRA_SPANS else None
+            if cru is not None:
+                self.amostra[cru] = {"nome": s.nome, "caminho": s.caminho, "ms": round(d * 1000, 2),
+                                     "url": url, "erro": s.erro}
+
+    def _podar_urls(self) -> None:
+        """Mantém só as URLs mais lentas até aqui (as rápidas não chegariam ao top)."""
+        manter = sorted(self._por_url.values(), key=lambda u: u["total_s"], reverse=True)[:MAX_URLS // 2]
+        self._por_url = {u["url"]: u for u in manter}
+
+    def __enter__(self) -> "Execucao":
+        self.raiz.__enter__()
+        return self
+
+    def __exit__(self, tipo, valor, tb) -> bool:
+        self.raiz.__exit__(tipo, valor, tb)
+        try:
+            self.relatorio = self.montar_relatorio()
+            if self.gravar:
+                self.arquivo = self._salvar(self.relatorio)
+        except Exception:
+            pass  # o relatório nunca derruba a execução
+        return False
+
+    def set(self, **attrs) -> None:
+        self.raiz.set(**attrs)
+
+    def montar_relatorio(self) -> Dict[str, Any]:
+        with self._lock:
+            por_nome = sorted(self._por_nome.items(), key=lambda kv: kv[1].total, reverse=True)
+            por_caminho = sorted(self._por_caminho.items())
+            hosts = sorted(self._hosts.items(), key=lambda kv: kv[1]["total_s"], reverse=True)
+            lentas = sorted(self._por_url.values(), key=lambda u: u["total_s"], reverse=True)[:TOP_URLS]
+            amostra = list(self.amostra)
+            total_spans = self.total_spans
+        total = self.raiz.duracao
+        return {
+            "execucao": self.nome,
+            "inicio": self.inicio_em.isoformat(timespec="seconds"),
+            "duracao_s": round(total, 3),
+            "atributos": self.raiz.attrs,
+            "spans": total_spans,
+            "por_etapa": {n: a.como_dict() for n, a in por_nome},
+            "por_caminho": {c: a.como_dict() for c, a in por_caminho},
+            "por_host": {h: {**v, "total_s": round(v["total_s"], 3), "status": dict(v["status"])}
+                         for h, v in hosts},
+            "urls_mais_lentas": [
+                {"url": u["url"], "total_s": round(u["total_s"], 3),
+                 "por_etapa": {k: round(v, 3) for k, v in u["spans"].items()}}
+                for u in lentas
+            ],
+            "amostra": amostra,
+        }
+
+    def resumo(self, n: int = 3) -> List[str]:
+        """Linhas curtas com as etapas de maior tempo total (para logs e a tela de resumo)."""
+        if not self.relatorio:
+            return []
+        return [f"{nome}: {e['total_s']:.1f}s em {e['contagem']}x (p95 {e['p95_ms']:.0f} ms)"
+                for nome, e in list(self.relatorio["por_etapa"].items())[:n]]
+
+    def _salvar(self, relatorio: Dict[str, Any]) -> Path:
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        path = self.pasta / f"desempenho-{self.nome}-{self.inicio_em:%Y%m%d-%H%M%S}.json"
+        path.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+        return path
+
+
+def execucao(nome: str, pasta: Path = PASTA_PADRAO, gravar: bool = True, **attrs):
+    """Abre uma execução; se já houver uma ativa neste contexto, vira um span dela."""
+    if _SPAN_ATUAL.get() is not None:
+        return span(nome, **attrs)
+    return Execucao(nome, pasta=pasta, gravar=gravar, **attrs)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+zip_stream.py — ZIP montado à medida que as imagens chegam
+- Escreve direto num arquivo em disco (nunca em memória)
+- Formatos já comprimidos (jpg/png/webp/gif) entram em modo STORED; o resto DEFLATED
+- Opcionalmente apaga a imagem depois de copiada para o ZIP (disco limitado também)
+- Thread-safe: pode receber arquivos de vários downloaders ao mesmo tempo
+
+Uso:
+    with ZipStream(destino_zip, base_dir=pasta_imagens) as zs:
+        image_downloader.main_integrated(logger, [json], out_root=pasta_imagens, on_saved=zs.add)
+"""
+from __future__ import annotations
+
+import threading
+import zipfile
+from pathlib import Path
+from typing import Optional, Union
+
+STORED_EXT = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+
+
+class ZipStream:
+    def __init__(self, zip_path: Union[str, Path], base_dir: Union[str, Path], remove_after: bool = True):
+        self.zip_path = Path(zip_path)
+        self.base_dir = Path(base_dir)
+        self.remove_after = remove_after
+        self.count = 0
+        self._lock = threading.Lock()
+        self.zip_path.parent.mkdir(parents=True, exist_ok=True)
+        self._zf: Optional[zipfile.ZipFile] = zipfile.ZipFile(self.zip_path, mode="w", allowZip64=True)
+
+    def _arcname(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return path.name
+
+    def add(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        if not path.is_file():
+            return
+        compress = zipfile.ZIP_STORED if path.suffix.lower() in STORED_EXT else zipfile.ZIP_DEFLATED
+        with self._lock:
+            if self._zf is None:
+                return
+            # ZipFile.write copia em blocos; o arquivo nunca é lido inteiro para a memória
+            self._zf.write(path, self._arcname(path), compress_type=compress)
+            self.count += 1
+        if self.remove_after:
+            path.unlink(missing_ok=True)
+
+    def close(self) -> Path:
+        with self._lock:
+            if self._zf is not None:
+                self._zf.close()
+                self._zf = None
+        return self.zip_path
+
+    def __enter__(self) -> "ZipStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()